@@ -0,0 +1,99 @@
+"""
+JWT authentication that can skip the per-request user lookup.
+
+With ``STATELESS_JWT_AUTH = True`` the request user is built from the signed
+claims (``user_id``, ``role``, ``assigned_admin_id``) instead of loading the
+``User`` row. Tokens also carry ``ver``, the user's ``token_version`` when
+they were issued; it is compared with the current version, which is kept in
+the local cache for ``TOKEN_VERSION_CACHE_TIMEOUT`` seconds. Any change to a
+claim (role, admin, deactivation) bumps the version, so stale tokens stop
+working at once in the worker that made the change and within the cache
+timeout everywhere else.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# Cached version of a deleted account; never matches an issued token.
+DELETED = -1
+
+
+def token_version_key(user_id):
+    return f'accounts:token_version:{user_id}'
+
+
+def cache_token_version(user_id, version):
+    cache.set(token_version_key(user_id), version, getattr(settings, 'TOKEN_VERSION_CACHE_TIMEOUT', 60))
+
+
+def get_token_version(user_id):
+    """Current token version of ``user_id``, from the cache or one indexed lookup."""
+    version = cache.get(token_version_key(user_id))
+    if version is None:
+        row = User.objects.filter(pk=user_id, is_active=True).values_list('token_version', flat=True).first()
+        version = DELETED if row is None else row
+        cache_token_version(user_id, version)
+    return version
+
+
+def add_token_claims(token, user):
+    """Stamp the claims the stateless mode relies on onto a new token."""
+    token['role'] = user.role
+    token['assigned_admin_id'] = user.assigned_admin_id
+    token['ver'] = user.token_version
+    return token
+
+
+class ClaimsUser(TokenUser):
+    """Request user backed by token claims, with the fields the views branch on."""
+
+    @cached_property
+    def id(self):
+        # SimpleJWT stores the id as a string; compare like a real User.pk.
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def assigned_admin_id(self):
+        return self.token.get('assigned_admin_id')
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that checks ``ver`` and, when ``STATELESS_JWT_AUTH``
+    is on, returns a ``ClaimsUser`` without touching the database.
+    """
+
+    def get_user(self, validated_token):
+        if 'ver' not in validated_token or 'role' not in validated_token:
+            # Issued before these claims existed: fall back to the row.
+            return super().get_user(validated_token)
+        if not getattr(settings, 'STATELESS_JWT_AUTH', False):
+            user = super().get_user(validated_token)
+            if user.token_version != validated_token['ver']:
+                raise InvalidToken('Token has been revoked.')
+            return user
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        version = get_token_version(user_id)
+        if version == DELETED:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if version != validated_token['ver']:
+            raise InvalidToken('Token has been revoked.')
+        return ClaimsUser(validated_token)
@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.benchmarking import benchmark_database, format_table, measure
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and latency per API request with and without STATELESS_JWT_AUTH.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        from core.testing import create_sample_data
+        from tasks.views import CustomTokenObtainPairSerializer
+
+        with benchmark_database():
+            data = create_sample_data(users_per_admin=5, tasks_per_user=20)
+            report = data.users[0].tasks.filter(status='completed').first()
+            cases = [
+                ('list (user)', data.users[0], reverse('user-tasks')),
+                ('list (admin)', data.admins[0], reverse('user-tasks')),
+                ('list (superadmin)', data.superadmin, reverse('user-tasks')),
+                ('report (admin)', data.admins[0], reverse('task-report', args=[report.pk])),
+            ]
+            rows = []
+            for label, user, url in cases:
+                client = APIClient()
+                token = CustomTokenObtainPairSerializer.get_token(user).access_token
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+                for stateless in (False, True):
+                    cache.clear()
+                    with override_settings(STATELESS_JWT_AUTH=stateless):
+                        stats = measure(lambda: client.get(url), iterations=options['iterations'])
+                    rows.append({'endpoint': label, 'mode': 'stateless' if stateless else 'db user', **stats})
+        self.stdout.write(format_table(rows, ['endpoint', 'mode', 'queries', 'p50_ms', 'p95_ms', 'p99_ms']))
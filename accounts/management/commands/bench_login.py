@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmarking import benchmark_database, format_table, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Login storm: misconfigured clients retry POST /api/login/ with a wrong password while one '
+        'client logs in normally. Reports the CPU the workers spend and the normal client\'s latency, '
+        'with and without the login throttle.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=20, help='Storming clients, each with its own IP.')
+        parser.add_argument('--accounts', type=int, default=2,
+                            help='Usernames the storming clients share (one stale password, many hosts).')
+        parser.add_argument('--retry-delay', type=float, default=0.1,
+                            help='Seconds a storming client waits between attempts; it ignores Retry-After.')
+        parser.add_argument('--workers', type=int, default=4, help='Requests served at once.')
+        parser.add_argument('--seconds', type=float, default=15.0, help='Length of each storm.')
+        parser.add_argument('--interval', type=float, default=2.5,
+                            help='Seconds between the normal client\'s logins.')
+
+    def handle(self, *args, **options):
+        from core.testing import create_sample_data
+
+        # Every refused or failed login would log a warning.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        with benchmark_database():
+            data = create_sample_data(users_per_admin=max(1, options['accounts']))
+            rows = []
+            for throttled in (False, True):
+                caches[settings.LOGIN_THROTTLE_CACHE].clear()
+                rates = settings.LOGIN_THROTTLE_RATES if throttled else {}
+                with override_settings(LOGIN_THROTTLE_RATES=rates):
+                    rows.append(self.storm(data, throttled, options))
+        self.stdout.write(format_table(rows, [
+            'throttle', 'attempts', 'refused', 'hashed', 'worker_cpu_s', 'cpu_ms_per_attempt', 'cpu_cores',
+            'login_p50_ms', 'login_p95_ms', 'login_errors',
+        ]))
+
+    def storm(self, data, throttled, options):
+        url = reverse('token_obtain_pair')
+        # A worker is one of --workers slots; its CPU time is what the storm costs the server.
+        slots = threading.Semaphore(options['workers'])
+        lock = threading.Lock()
+        statuses, cpu, timings, errors = [], [], [], []
+        stop = threading.Event()
+
+        def serve(client, username, password):
+            with slots:
+                start = time.thread_time()
+                response = client.post(url, {'username': username, 'password': password})
+                spent = time.thread_time() - start
+            with lock:
+                cpu.append(spent)
+            return response
+
+        def storming(index):
+            client = Client(REMOTE_ADDR=f'10.0.{index // 250}.{index % 250 + 1}')
+            username = data.users[index % options['accounts']].username
+            while not stop.is_set():
+                response = serve(client, username, 'wrong password')
+                with lock:
+                    statuses.append(response.status_code)
+                stop.wait(options['retry_delay'])
+
+        def normal():
+            client = Client(REMOTE_ADDR='192.168.0.1')
+            while not stop.is_set():
+                start = time.perf_counter()
+                response = serve(client, data.admins[0].username, 'pw')
+                timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+                stop.wait(options['interval'])
+
+        threads = [threading.Thread(target=storming, args=(i,)) for i in range(options['clients'])]
+        threads.append(threading.Thread(target=normal))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        refused = statuses.count(429)
+        worker_cpu = sum(cpu)
+        return {
+            'throttle': 'on' if throttled else 'off',
+            'attempts': len(statuses),
+            'refused': refused,
+            'hashed': len(statuses) - refused + len(timings),
+            'worker_cpu_s': round(worker_cpu, 2),
+            'cpu_ms_per_attempt': round(worker_cpu / len(cpu) * 1000, 1),
+            # Cores kept busy on average; the machine's core count caps it.
+            'cpu_cores': round(worker_cpu / elapsed, 2),
+            'login_p50_ms': round(percentile(timings, 50), 1) if timings else '',
+            'login_p95_ms': round(percentile(timings, 95), 1) if timings else '',
+            'login_errors': len(errors),
+        }
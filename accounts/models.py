@@ -1,6 +1,6 @@
 
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 
 class User(AbstractUser):
@@ -11,6 +11,44 @@ class User(AbstractUser):
 	]
 	role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
 	assigned_admin = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, limit_choices_to={'role': 'admin'}, related_name='assigned_users')
+	# Bumped whenever a claim baked into issued JWTs changes; tokens carrying an
+	# older value are rejected (see accounts.authentication).
+	token_version = models.PositiveIntegerField(default=0, editable=False)
+
+	# Fields copied into JWT claims, or that decide whether a token is usable at all.
+	TOKEN_CLAIM_FIELDS = ('role', 'assigned_admin_id', 'is_active')
+
+	class Meta(AbstractUser.Meta):
+		indexes = [
+			# manage_users / manage_admins and the role-limited form choices.
+			models.Index(fields=['role', 'username'], name='user_role_username_idx'),
+		]
+
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		if all(f in instance.__dict__ for f in cls.TOKEN_CLAIM_FIELDS):
+			instance._loaded_claims = instance.token_claims()
+		return instance
+
+	def token_claims(self):
+		return tuple(getattr(self, f) for f in self.TOKEN_CLAIM_FIELDS)
+
+	def save(self, *args, **kwargs):
+		# Revoke outstanding tokens when their claims go stale, whichever
+		# view (admin panel, Django admin, shell) made the change.
+		loaded = getattr(self, '_loaded_claims', None)
+		revoke = loaded is not None and loaded != self.token_claims()
+		if revoke:
+			self.token_version += 1
+			if kwargs.get('update_fields') is not None:
+				kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+		super().save(*args, **kwargs)
+		self._loaded_claims = self.token_claims()
+		if revoke:
+			from .authentication import cache_token_version
+			pk, version = self.pk, self.token_version
+			transaction.on_commit(lambda: cache_token_version(pk, version))
 
 	def __str__(self):
 		return f"{self.username} ({self.get_role_display()})"
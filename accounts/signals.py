@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .authentication import DELETED, cache_token_version
+from .models import User
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: cache_token_version(pk, DELETED))
@@ -1,3 +1,140 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from accounts import throttling
+from core.testing import QueryBudgetMixin, create_sample_data
+from tasks.views import CustomTokenObtainPairSerializer
+
+
+@override_settings(STATELESS_JWT_AUTH=True)
+class StatelessJWTAuthTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user):
+        self.refresh = CustomTokenObtainPairSerializer.get_token(user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        return client
+
+    def test_requests_skip_the_user_lookup(self):
+        client = self.client_for(self.data.admins[0])
+        client.get(reverse('user-tasks'))  # warms the token version cache
+        # The list's ETag aggregate and its page; no user row is loaded.
+        response = self.assertQueryBudget(2, client.get, reverse('user-tasks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'])
+
+    def test_role_change_revokes_tokens(self):
+        admin = self.data.admins[0]
+        client = self.client_for(admin)
+        self.assertEqual(client.get(reverse('user-tasks')).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.role = 'user'
+            admin.save()
+        self.assertEqual(client.get(reverse('user-tasks')).status_code, 401)
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    # SimpleJWT's modules share one settings object, so patching it is what
+    # changing SIMPLE_JWT['USER_ID_CLAIM'] at startup amounts to.
+    @mock.patch.object(jwt_settings, 'USER_ID_CLAIM', 'uid')
+    def test_refresh_uses_the_configured_user_id_claim(self):
+        user = self.data.users[0]
+        self.client_for(user)
+        self.assertNotIn('user_id', self.refresh)
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.is_active = False
+            user.save()
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_unrelated_changes_keep_tokens(self):
+        user = self.data.users[0]
+        client = self.client_for(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.email = 'new@example.com'
+            user.save()
+        self.assertEqual(client.get(reverse('user-tasks')).status_code, 200)
+
+    def test_deleted_user_is_rejected(self):
+        user = self.data.users[0]
+        client = self.client_for(user)
+        self.assertEqual(client.get(reverse('user-tasks')).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertEqual(client.get(reverse('user-tasks')).status_code, 401)
+
+    @override_settings(STATELESS_JWT_AUTH=False)
+    def test_database_mode_checks_version(self):
+        user = self.data.users[0]
+        client = self.client_for(user)
+        user.is_active = False
+        user.save()
+        user.is_active = True
+        user.save()
+        self.assertEqual(client.get(reverse('user-tasks')).status_code, 401)
+
+
+@override_settings(LOGIN_THROTTLE_RATES={'username': '3/min', 'ip': '5/min'})
+class LoginThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def setUp(self):
+        caches[settings.LOGIN_THROTTLE_CACHE].clear()
+        # Counts the password checks that actually run.
+        patcher = mock.patch.object(ModelBackend, 'authenticate', autospec=True, side_effect=ModelBackend.authenticate)
+        self.authenticate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def api_login(self, username, password='wrong', ip='10.0.0.1'):
+        return Client(REMOTE_ADDR=ip).post(reverse('token_obtain_pair'), {'username': username, 'password': password})
+
+    def test_api_login(self):
+        username = self.data.users[0].username
+        self.assertEqual([self.api_login(username).status_code for _ in range(3)], [401] * 3)
+        # Refused before any hashing, in any letter case, even with the right password.
+        response = self.api_login(username.upper(), password='pw')
+        self.assertEqual(response.status_code, 429)
+        self.assertAlmostEqual(int(response['Retry-After']), 20, delta=3)
+        self.assertEqual(self.authenticate.call_count, 3)
+        # Other accounts keep their own budget until the IP's runs out.
+        self.assertEqual(self.api_login(self.data.users[1].username, password='pw').status_code, 200)
+        self.assertEqual(self.api_login(self.data.users[2].username).status_code, 401)
+        self.assertEqual(self.api_login(self.data.users[3].username).status_code, 429)
+        self.assertEqual(self.api_login(self.data.users[3].username, ip='10.0.0.2').status_code, 401)
+
+    def test_form_login(self):
+        client = Client(REMOTE_ADDR='10.0.0.3')
+        username = self.data.admins[0].username
+        for _ in range(3):
+            self.assertEqual(client.post(reverse('login'), {'username': username, 'password': 'x'}).status_code, 200)
+        response = client.post(reverse('login'), {'username': username, 'password': 'pw'})
+        self.assertContains(response, 'Too many login attempts', status_code=429)
+        self.assertEqual(self.authenticate.call_count, 3)
+        self.assertEqual(self.api_login(username, password='pw', ip='10.0.0.4').status_code, 429)
+
+    def test_bucket_refills(self):
+        idents = {'username': 'someone', 'ip': '10.0.0.5'}
+        self.assertEqual([throttling.take(idents, now=0) for _ in range(3)], [0, 0, 0])
+        self.assertEqual(throttling.take(idents, now=0), 20)
+        self.assertEqual(throttling.take(idents, now=10), 10)
+        self.assertEqual(throttling.take(idents, now=20), 0)
+        self.assertEqual(throttling.take(idents, now=20), 20)
+        with override_settings(LOGIN_THROTTLE_RATES={}):
+            self.assertEqual(throttling.take(idents, now=20), 0)
@@ -0,0 +1,106 @@
+"""
+Login throttling, checked before any password is hashed.
+
+Each login attempt (POST /api/login/ or the login form) takes a token from
+two buckets: one for the username and one for the client IP. A bucket holds
+up to N tokens and refills evenly at N per period, so a client may burst N
+attempts and then gets about one per period / N. When either bucket is
+empty the attempt is refused with 429 and a Retry-After, and no token is
+spent. Rates come from ``LOGIN_THROTTLE_RATES`` ("5/min" style, as in DRF).
+
+Buckets live in the ``LOGIN_THROTTLE_CACHE`` cache. Workers only share a
+budget if they share that cache; the read-then-write is not atomic, so
+concurrent attempts may let a few extra through, which is harmless here.
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'5/min'`` as ``(5, 60)``: tokens and the seconds they refill over."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+class TokenBucket:
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.capacity, self.period = parse_rate(rate)
+
+    def key(self, ident):
+        # Hashed: usernames may hold characters some cache backends reject in keys.
+        digest = hashlib.sha256(ident.encode('utf-8')).hexdigest()[:32]
+        return f'accounts:login_throttle:{self.scope}:{digest}'
+
+    def level(self, state, now):
+        """Tokens in a bucket last stored as ``state`` (None when full), refilled up to ``now``."""
+        if state is None:
+            return self.capacity
+        tokens, stamp = state
+        return min(self.capacity, tokens + (now - stamp) * self.capacity / self.period)
+
+    def wait(self, tokens):
+        """Seconds until a bucket holding ``tokens`` has a whole one."""
+        return (1 - tokens) * self.period / self.capacity
+
+
+def get_buckets():
+    rates = getattr(settings, 'LOGIN_THROTTLE_RATES', None) or {}
+    return {scope: TokenBucket(scope, rate) for scope, rate in rates.items() if rate}
+
+
+def take(idents, now=None):
+    """Take a token from each ``{scope: ident}`` bucket, all or none.
+
+    Returns 0 if the tokens were taken, else the seconds until they can be.
+    Scopes without a configured rate are not limited.
+    """
+    buckets = get_buckets()
+    wanted = {buckets[scope].key(ident): (buckets[scope], ident)
+              for scope, ident in idents.items() if scope in buckets and ident}
+    if not wanted:
+        return 0
+    now = time.time() if now is None else now
+    cache = caches[settings.LOGIN_THROTTLE_CACHE]
+    stored = cache.get_many(list(wanted))
+    levels = {key: bucket.level(stored.get(key), now) for key, (bucket, _) in wanted.items()}
+    wait = max((bucket.wait(levels[key]) for key, (bucket, _) in wanted.items() if levels[key] < 1), default=0)
+    if wait:
+        return wait
+    # An idle bucket is full again after one period, so the entry can go then.
+    cache.set_many({key: (levels[key] - 1, now) for key in wanted},
+                   max(bucket.period for bucket, _ in wanted.values()))
+    return 0
+
+
+class LoginRateThrottle(BaseThrottle):
+    """Throttles login attempts per username and per client IP; see the module docstring.
+
+    Works on DRF requests and plain Django ones (the login form).
+    """
+
+    def allow_request(self, request, view):
+        data = getattr(request, 'data', None)
+        if data is None:
+            data = request.POST
+        username = data.get(get_user_model().USERNAME_FIELD) if hasattr(data, 'get') else None
+        # Usernames differing only in case would otherwise get a bucket each.
+        username = username.casefold() if isinstance(username, str) else None
+        self.wait_seconds = take({'username': username, 'ip': self.get_ident(request)})
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+    def retry_after(self):
+        """``wait()`` rounded up to whole seconds, for a Retry-After header."""
+        return math.ceil(self.wait_seconds)
@@ -1,7 +1,20 @@
 
 from django.contrib.auth.views import LoginView
 
+from .throttling import LoginRateThrottle
+
 class RoleBasedLoginView(LoginView):
+	def post(self, request, *args, **kwargs):
+		# Checked before the form authenticates, which hashes the password.
+		throttle = LoginRateThrottle()
+		if not throttle.allow_request(request, self):
+			form = self.get_form_class()(request, initial={'username': request.POST.get('username', '')})
+			response = self.render_to_response(
+				self.get_context_data(form=form, retry_after=throttle.retry_after()), status=429)
+			response['Retry-After'] = str(throttle.retry_after())
+			return response
+		return super().post(request, *args, **kwargs)
+
 	def get_success_url(self):
 		user = self.request.user
 		if hasattr(user, 'role'):
@@ -0,0 +1,153 @@
+"""Streaming bulk import of tasks from CSV or NDJSON uploads."""
+
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from tasks.models import Task
+from tasks.signals import tasks_bulk_saved
+
+# Columns read from each row; anything else is ignored.
+IMPORT_FIELDS = ('title', 'description', 'due_date', 'status', 'assigned_to')
+CHUNK_SIZE = 500
+# Only the first errors are kept so a bad file cannot grow memory without bound.
+MAX_REPORTED_ERRORS = 200
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        # Last line read before the file turned out unreadable, if it did.
+        self.stopped_after = None
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    @property
+    def truncated_errors(self):
+        return self.failed - len(self.errors)
+
+
+def iter_csv(stream):
+    reader = csv.DictReader(stream)
+    # Line numbers count the header so they match what a spreadsheet shows.
+    for line, row in enumerate(reader, start=2):
+        yield line, row
+
+
+def iter_ndjson(stream):
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            yield line, ValueError(f'Invalid JSON: {e}')
+            continue
+        if not isinstance(row, dict):
+            yield line, ValueError('Each line must be a JSON object.')
+            continue
+        yield line, row
+
+
+def detect_format(upload, requested):
+    if requested != 'auto':
+        return requested
+    name = (upload.name or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+
+def import_tasks(upload, fmt, users, assigned_by):
+    """Create tasks from ``upload`` row by row.
+
+    ``users`` is the queryset of accounts the caller may assign to; it is
+    queried once per chunk for the usernames that chunk mentions. Each chunk
+    is inserted with one ``bulk_create`` in its own transaction, so a bad row
+    only costs that row and the file is never held in memory as a whole.
+    If the file cannot be decoded or parsed partway, the rows read before
+    that point are still imported or reported, and ``stopped_after`` says
+    where reading ended.
+    """
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    rows = iter_ndjson(stream) if fmt == 'ndjson' else iter_csv(stream)
+    result = ImportResult()
+    chunk, read_error = [], None
+    # The CSV header is line 1.
+    line = 0 if fmt == 'ndjson' else 1
+    try:
+        for line, row in rows:
+            chunk.append((line, row))
+            if len(chunk) == CHUNK_SIZE:
+                _import_chunk(chunk, users, assigned_by, result)
+                chunk = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        read_error = e
+    finally:
+        # Leave the upload open for Django to clean up.
+        stream.detach()
+    if chunk:
+        _import_chunk(chunk, users, assigned_by, result)
+    if read_error is not None:
+        result.stopped_after = line
+        result.add_error(line + 1, {'file': [
+            f'Could not read the file after line {line}: {read_error}. '
+            'Nothing from this line on was imported.']})
+    return result
+
+
+def _import_chunk(chunk, users, assigned_by, result):
+    usernames = {
+        str(row.get('assigned_to') or '').strip()
+        for _, row in chunk if isinstance(row, dict)
+    }
+    assignees = users.filter(username__in=usernames).in_bulk(field_name='username')
+
+    tasks = []
+    for line, row in chunk:
+        if isinstance(row, Exception):
+            result.add_error(line, {'row': [str(row)]})
+            continue
+        values = {field: row.get(field) for field in IMPORT_FIELDS}
+        # JSON can hold numbers, lists or objects, which the fields cannot parse.
+        not_text = {field: ['Must be a string.'] for field, value in values.items()
+                    if value is not None and not isinstance(value, str)}
+        if not_text:
+            result.add_error(line, not_text)
+            continue
+        username = str(values.pop('assigned_to') or '').strip()
+        values = {k: (v.strip() if isinstance(v, str) else v) for k, v in values.items()}
+        if not values['status']:
+            values['status'] = 'pending'
+        task = Task(assigned_by=assigned_by, **values)
+        errors = {}
+        assignee = assignees.get(username)
+        if assignee is None:
+            errors['assigned_to'] = [f"Unknown user '{username}' or not one of your users."]
+        else:
+            task.assigned_to = assignee
+        try:
+            # Both FKs hold loaded users, so this runs no per-row queries (Task.clean_fields).
+            task.clean_fields()
+            task.clean()
+        except ValidationError as e:
+            for field, messages in e.message_dict.items():
+                errors.setdefault(field, []).extend(messages)
+        if errors:
+            result.add_error(line, errors)
+        else:
+            tasks.append(task)
+
+    if tasks:
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            tasks_bulk_saved.send(sender=Task, instances=tasks, created=True)
+        result.created += len(tasks)
@@ -0,0 +1,381 @@
+import datetime
+import json
+import warnings
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from tasks import archive
+from tasks.models import ArchivedTask, Task
+
+from core.testing import QueryBudgetMixin, QueryPlanMixin, create_sample_data
+
+
+def fetch(client, url):
+    """GET ``url``, draining streaming responses so their queries run too."""
+    response = client.get(url)
+    if response.streaming:
+        response.content_bytes = b''.join(response.streaming_content)
+    return response
+
+
+class AdminPanelQueryPlanTests(QueryPlanMixin, TestCase):
+    """The role-scoped admin panel querysets must stay on indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def get(self, user, url, allow_index_scan=()):
+        self.client.force_login(user)
+        response = self.assertNoFullScans(fetch, self.client, url, allow_index_scan=allow_index_scan)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_admin_task_views(self):
+        admin = self.data.admins[0]
+        task = self.data.users[0].tasks.first()
+        self.get(admin, reverse('adminpanel:manage_tasks'))
+        self.get(admin, reverse('adminpanel:task_reports'))
+        self.get(admin, reverse('adminpanel:manage_tasks') + f'?assigned_to={task.assigned_to_id}&status=completed')
+        self.get(admin, reverse('adminpanel:task_reports') + '?due_from=2025-01-02&due_to=2025-01-31')
+        self.get(admin, reverse('adminpanel:task_report_detail', args=[self.data.users[0].tasks.filter(status='completed').first().pk]))
+        self.get(admin, reverse('adminpanel:search_tasks') + '?q=task')
+        self.get(admin, reverse('adminpanel:add_task'))
+        self.get(admin, reverse('adminpanel:edit_task', args=[task.pk]))
+        self.get(admin, reverse('adminpanel:delete_task', args=[task.pk]))
+
+    def test_superadmin_views(self):
+        root = self.data.superadmin
+        # Unfiltered pages walk the due date index up to their LIMIT; the export reads all of it.
+        self.get(root, reverse('adminpanel:manage_tasks'), allow_index_scan=('task_due_idx',))
+        self.get(root, reverse('adminpanel:manage_tasks') + '?ordering=-id&status=pending')
+        self.get(root, reverse('adminpanel:manage_tasks') + f'?admin={self.data.admins[0].pk}&ordering=updated_at')
+        self.get(root, reverse('adminpanel:task_reports'), allow_index_scan=('archived_due_idx',))
+        self.get(root, reverse('adminpanel:search_tasks') + '?q=task+user0*')
+        self.get(root, reverse('adminpanel:export_task_reports') + '?format=csv', allow_index_scan=('archived_due_idx',))
+        self.get(root, reverse('adminpanel:manage_users'))
+        self.get(root, reverse('adminpanel:manage_admins'))
+        self.get(root, reverse('adminpanel:assign_user_to_admin'))
+        self.get(root, reverse('adminpanel:edit_user', args=[self.data.users[0].pk]))
+
+
+
+class AdminPanelQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every admin panel page runs a fixed number of queries, whatever the row count.
+
+    Budgets include the session and request.user lookups (2 queries).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(users_per_admin=4, tasks_per_user=6)
+
+    def assertPageBudget(self, budget, user, name, *args):
+        self.client.force_login(user)
+        response = self.assertQueryBudget(budget, fetch, self.client, reverse(name, args=args))
+        self.assertEqual(response.status_code, 200)
+
+    def test_superadmin_pages(self):
+        root = self.data.superadmin
+        user = self.data.users[0]
+        cases = [
+            # Dashboards add one grouped query over the TaskStat summary table.
+            (3, 'adminpanel:superadmin_dashboard'),
+            (3, 'adminpanel:manage_users'),
+            (4, 'adminpanel:manage_admins'),
+            # Task tables: filter choices (users, admins) plus one page query.
+            (5, 'adminpanel:manage_tasks'),
+            # Reports add the page query on the archive table.
+            (6, 'adminpanel:task_reports'),
+            (3, 'adminpanel:add_task'),
+            (4, 'adminpanel:assign_user_to_admin'),
+            (2, 'adminpanel:create_admin'),
+            (3, 'adminpanel:create_user'),
+        ]
+        for budget, name in cases:
+            with self.subTest(name):
+                self.assertPageBudget(budget, root, name)
+        self.assertPageBudget(4, root, 'adminpanel:edit_user', user.pk)
+        self.assertPageBudget(3, root, 'adminpanel:delete_user', user.pk)
+
+    def test_admin_pages(self):
+        admin = self.data.admins[0]
+        task = self.data.users[0].tasks.first()
+        cases = [
+            (3, 'adminpanel:admin_dashboard'),
+            (4, 'adminpanel:manage_tasks'),
+            (5, 'adminpanel:task_reports'),
+            (3, 'adminpanel:search_tasks'),
+            (3, 'adminpanel:add_task'),
+        ]
+        for budget, name in cases:
+            with self.subTest(name):
+                self.assertPageBudget(budget, admin, name)
+        self.assertPageBudget(2, admin, 'adminpanel:import_tasks')
+        self.assertPageBudget(4, admin, 'adminpanel:export_task_reports')
+        self.assertPageBudget(4, admin, 'adminpanel:edit_task', task.pk)
+        self.assertPageBudget(3, admin, 'adminpanel:delete_task', task.pk)
+        report = self.data.users[0].tasks.filter(status='completed').first()
+        self.assertPageBudget(3, admin, 'adminpanel:task_report_detail', report.pk)
+
+
+class TaskImportTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(tasks_per_user=0)
+
+    def setUp(self):
+        self.client.force_login(self.data.admins[0])
+
+    def upload(self, name, content, fmt='auto'):
+        return self.client.post(reverse('adminpanel:import_tasks'), {
+            'file': SimpleUploadedFile(name, content.encode('utf-8')),
+            'format': fmt,
+        })
+
+    def test_csv_rows_are_imported_and_errors_reported(self):
+        own, other = self.data.users[0].username, self.data.users[-1].username
+        content = (
+            'title,description,due_date,status,assigned_to\n'
+            f'Write docs,All of them,2025-03-01,,{own}\n'
+            f'Not mine,Nope,2025-03-01,pending,{other}\n'
+            f'Bad date,Oops,03/01/2025,pending,{own}\n'
+            f'Done already,x,2025-03-01,completed,{own}\n'
+        )
+        response = self.upload('tasks.csv', content)
+        self.assertEqual(response.status_code, 200)
+        result = response.context['result']
+        self.assertEqual(result.created, 1)
+        self.assertEqual([e['line'] for e in result.errors], [3, 4, 5])
+        self.assertIn('assigned_to', result.errors[0]['errors'])
+        self.assertIn('due_date', result.errors[1]['errors'])
+        self.assertIn('completion_report', result.errors[2]['errors'])
+        task = Task.objects.get(title='Write docs')
+        self.assertEqual((task.status, task.assigned_by), ('pending', self.data.admins[0]))
+
+    def test_ndjson_non_string_values_are_row_errors(self):
+        own = self.data.users[0].username
+        lines = [
+            f'{{"title": "Good one", "description": "d", "due_date": "2025-03-01", "assigned_to": "{own}"}}',
+            f'{{"title": "Numeric date", "description": "d", "due_date": 5, "assigned_to": "{own}"}}',
+            f'{{"title": ["list"], "description": {{"a": 1}}, "due_date": "2025-03-01", "assigned_to": "{own}"}}',
+            f'{{"title": "Good two", "description": "d", "due_date": "2025-03-02", "assigned_to": "{own}"}}',
+        ]
+        response = self.upload('tasks.ndjson', '\n'.join(lines))
+        result = response.context['result']
+        self.assertEqual((result.created, result.failed), (2, 2))
+        self.assertEqual([(e['line'], sorted(e['errors'])) for e in result.errors],
+                         [(2, ['due_date']), (3, ['description', 'title'])])
+        self.assertEqual(set(Task.objects.values_list('title', flat=True)), {'Good one', 'Good two'})
+
+    def test_unreadable_file_keeps_the_rows_read_before(self):
+        own = self.data.users[0].username
+        # The upload is decoded 8 KiB at a time: the long row shares its block with the bad bytes.
+        content = (
+            'title,description,due_date,status,assigned_to\n'
+            f'First,d,2025-03-01,,{own}\n'
+            f'Bad date,d,tomorrow,,{own}\n'
+            f'Long,{"x" * 9000},2025-03-01,,{own}\n'
+        ).encode('utf-8') + b'Broken,\xff\xfe,2025-03-01,,x\n'
+        response = self.client.post(reverse('adminpanel:import_tasks'), {
+            'file': SimpleUploadedFile('tasks.csv', content), 'format': 'auto'})
+        result = response.context['result']
+        self.assertEqual((result.created, result.stopped_after), (1, 3))
+        self.assertEqual([e['line'] for e in result.errors], [3, 4])
+        self.assertIn('after line 3', result.errors[1]['errors']['file'][0])
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['First'])
+
+    def test_ndjson_queries_per_chunk(self):
+        own = self.data.users[0].username
+        lines = [f'{{"title": "T{i}", "description": "d", "due_date": "2025-03-01", "assigned_to": "{own}"}}'
+                 for i in range(300)]
+        lines.append('not json')
+        # Session, user, one assignee lookup for the chunk, then its bulk INSERT
+        # inside a savepoint; SQLite's 999-parameter cap splits 300 rows into 4 statements.
+        # All rows share one TaskStat group: UPDATE, admin lookup and INSERT.
+        response = self.assertQueryBudget(12, self.upload, 'tasks.ndjson', '\n'.join(lines))
+        result = response.context['result']
+        self.assertEqual((result.created, result.failed), (300, 1))
+        self.assertEqual(Task.objects.filter(assigned_to=self.data.users[0]).count(), 300)
+
+
+class TaskReportExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(tasks_per_user=6)
+
+    def export(self, user, query):
+        self.client.force_login(user)
+        response = self.client.get(reverse('adminpanel:export_task_reports') + query)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_is_scoped_to_the_admin(self):
+        lines = self.export(self.data.admins[0], '?format=csv').splitlines()
+        expected = Task.objects.filter(status='completed', assigned_to__assigned_admin=self.data.admins[0])
+        self.assertEqual(lines[0], 'id,title,user,assigned_by,due_date,worked_hours,completion_report,updated_at')
+        self.assertEqual(len(lines) - 1, expected.count())
+
+    def test_ndjson_with_date_range(self):
+        body = self.export(self.data.superadmin, '?format=ndjson&due_from=2025-01-06&due_to=2025-01-06')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), Task.objects.filter(status='completed', due_date='2025-01-06').count())
+        self.assertTrue(rows)
+        self.assertEqual(rows[0]['worked_hours'], '1.50')
+
+    async def test_streamed_in_chunks_under_asgi(self):
+        await self.async_client.aforce_login(self.data.superadmin)
+        with mock.patch('adminpanel.views.EXPORT_CHUNK_SIZE', 3), warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            response = await self.async_client.get(reverse('adminpanel:export_task_reports') + '?format=csv')
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        # No "must consume synchronous iterators" fallback to a list.
+        self.assertEqual([str(w.message) for w in caught], [])
+        lines = b''.join(chunks).decode('utf-8').splitlines()
+        self.assertEqual(len(lines) - 1, await Task.objects.filter(status='completed').acount())
+        self.assertEqual(len(chunks), -(-len(lines) // 3))
+
+
+class TaskFilterTests(TestCase):
+    """The filters and sort links of the task tables return the right rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(tasks_per_user=6)
+
+    def rows(self, user, view, query='', status=200):
+        self.client.force_login(user)
+        response = self.client.get(reverse(view) + query)
+        self.assertEqual(response.status_code, status)
+        key = 'tasks' if view == 'adminpanel:manage_tasks' else 'reports'
+        return [task.pk for task in response.context[key]], response
+
+    def ids(self, **filters):
+        return sorted(Task.objects.filter(**filters).values_list('pk', flat=True))
+
+    def test_manage_tasks_filters(self):
+        admin, user = self.data.admins[0], self.data.users[0]
+        scope = {'assigned_to__assigned_admin': admin}
+        cases = [
+            ('', scope),
+            ('?status=pending', {**scope, 'status': 'pending'}),
+            (f'?assigned_to={user.pk}', {'assigned_to': user}),
+            (f'?assigned_to={user.pk}&status=completed', {'assigned_to': user, 'status': 'completed'}),
+            ('?due_from=2025-01-03', {**scope, 'due_date__gte': '2025-01-03'}),
+            ('?due_to=2025-01-02', {**scope, 'due_date__lte': '2025-01-02'}),
+            ('?due_from=2025-01-02&due_to=2025-01-04&status=in_progress',
+             {**scope, 'due_date__range': ('2025-01-02', '2025-01-04'), 'status': 'in_progress'}),
+        ]
+        for query, filters in cases:
+            with self.subTest(query=query):
+                ids, _ = self.rows(admin, 'adminpanel:manage_tasks', query)
+                self.assertTrue(ids)
+                self.assertEqual(sorted(ids), self.ids(**filters))
+
+    def test_superadmin_admin_filter(self):
+        root, admin = self.data.superadmin, self.data.admins[1]
+        ids, _ = self.rows(root, 'adminpanel:manage_tasks', '?page_size=200')
+        self.assertEqual(sorted(ids), self.ids())
+        ids, _ = self.rows(root, 'adminpanel:manage_tasks', f'?admin={admin.pk}&status=pending')
+        self.assertEqual(sorted(ids), self.ids(assigned_to__assigned_admin=admin, status='pending'))
+        ids, _ = self.rows(root, 'adminpanel:task_reports', f'?admin={admin.pk}')
+        self.assertEqual(sorted(ids), self.ids(assigned_to__assigned_admin=admin, status='completed'))
+
+    def test_sort_links(self):
+        admin = self.data.admins[0]
+        tasks = Task.objects.filter(assigned_to=self.data.users[1])
+        query = f'?assigned_to={self.data.users[1].pk}'
+        ids, response = self.rows(admin, 'adminpanel:manage_tasks', query + '&ordering=due_date')
+        self.assertEqual(ids, [t.pk for t in sorted(tasks, key=lambda t: (t.due_date, t.pk))])
+        self.assertEqual(response.context['ordering'], 'due_date')
+
+        # The link on the current column flips it, and keeps the filters.
+        self.client.force_login(admin)
+        response = self.client.get(reverse('adminpanel:manage_tasks') + response.context['sort_urls']['due_date'])
+        self.assertEqual(response.context['ordering'], '-due_date')
+        self.assertEqual([t.pk for t in response.context['tasks']],
+                         [t.pk for t in sorted(tasks, key=lambda t: (t.due_date, t.pk), reverse=True)])
+        response = self.client.get(reverse('adminpanel:manage_tasks') + response.context['sort_urls']['id'])
+        self.assertEqual([t.pk for t in response.context['tasks']], sorted(t.pk for t in tasks))
+
+    def test_task_reports_filters(self):
+        admin, user = self.data.admins[0], self.data.users[1]
+        ids, _ = self.rows(admin, 'adminpanel:task_reports')
+        self.assertEqual(sorted(ids), self.ids(assigned_to__assigned_admin=admin, status='completed'))
+        ids, _ = self.rows(admin, 'adminpanel:task_reports', f'?assigned_to={user.pk}&due_from=2025-01-04')
+        self.assertEqual(sorted(ids), self.ids(assigned_to=user, status='completed', due_date__gte='2025-01-04'))
+        self.assertEqual(len(ids), 1)
+        ids, _ = self.rows(admin, 'adminpanel:task_reports', '?due_to=2025-01-03&ordering=-due_date')
+        self.assertEqual(sorted(ids), self.ids(assigned_to__assigned_admin=admin, status='completed',
+                                               due_date__lte='2025-01-03'))
+
+    def test_invalid_filters_are_rejected(self):
+        admin = self.data.admins[0]
+        # A user of the other admin is not a valid choice for this one.
+        other_user = self.data.users[-1]
+        for view, query in [
+            ('adminpanel:manage_tasks', '?status=bogus'),
+            ('adminpanel:manage_tasks', f'?assigned_to={other_user.pk}'),
+            ('adminpanel:manage_tasks', '?due_from=not-a-date'),
+            ('adminpanel:task_reports', f'?assigned_to={other_user.pk}'),
+            ('adminpanel:task_reports', '?due_to=2025-13-01'),
+        ]:
+            with self.subTest(view=view, query=query):
+                ids, response = self.rows(admin, view, query, status=400)
+                self.assertEqual(ids, [])
+                self.assertTrue(response.context['form'].errors)
+                self.assertContains(response, 'invalid-feedback', status_code=400)
+        response = self.client.get(reverse('adminpanel:export_task_reports') + '?format=csv&due_from=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_task_report_detail(self):
+        admin = self.data.admins[0]
+        own = Task.objects.filter(assigned_to__assigned_admin=admin, status='completed').first()
+        other = Task.objects.filter(assigned_to__assigned_admin=self.data.admins[1], status='completed').first()
+        open_task = Task.objects.filter(assigned_to__assigned_admin=admin, status='pending').first()
+        self.client.force_login(admin)
+        response = self.client.get(reverse('adminpanel:task_report_detail', args=[own.pk]))
+        self.assertEqual(response.context['task'].pk, own.pk)
+        self.assertContains(response, own.title)
+        self.assertEqual(self.client.get(reverse('adminpanel:task_report_detail', args=[other.pk])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('adminpanel:task_report_detail', args=[open_task.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('adminpanel:task_report_detail', args=[0])).status_code, 404)
+        self.client.force_login(self.data.superadmin)
+        response = self.client.get(reverse('adminpanel:task_report_detail', args=[other.pk]))
+        self.assertEqual(response.context['task'].pk, other.pk)
+
+
+class ArchivedReportTests(QueryPlanMixin, TestCase):
+    """Task reports list, show and export archived tasks along with hot ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(tasks_per_user=6)
+        Task.objects.update(updated_at=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+        archive.archive_completed(datetime.date(2025, 1, 5))
+
+    def test_reports_merge_both_tables(self):
+        admin = self.data.admins[0]
+        self.client.force_login(admin)
+        hot = Task.objects.filter(status='completed', assigned_to__assigned_admin=admin)
+        cold = ArchivedTask.objects.filter(assigned_to__assigned_admin=admin)
+        self.assertTrue(hot.exists() and cold.exists())
+        expected = sorted([(t.due_date, t.pk) for t in [*hot, *cold]], reverse=True)
+
+        response = self.assertNoFullScans(fetch, self.client, reverse('adminpanel:task_reports') + '?ordering=-due_date&page_size=3')
+        self.assertEqual([(r.due_date, r.pk) for r in response.context['reports']], expected[:3])
+        response = self.client.get(response.context['next_url'])
+        self.assertEqual([(r.due_date, r.pk) for r in response.context['reports']], expected[3:6])
+
+        response = self.client.get(reverse('adminpanel:task_report_detail', args=[cold.first().pk]))
+        self.assertContains(response, cold.first().title)
+        page = self.client.get(reverse('adminpanel:manage_tasks')).context['page']
+        self.assertEqual(len(page), Task.objects.filter(assigned_to__assigned_admin=admin).count())
+
+        lines = fetch(self.client, reverse('adminpanel:export_task_reports') + '?format=csv').content_bytes.decode().splitlines()[1:]
+        ids = [int(line.split(',')[0]) for line in lines]
+        self.assertEqual(ids, [pk for _, pk in sorted(expected)])
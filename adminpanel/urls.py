@@ -9,12 +9,16 @@ urlpatterns = [
     path('manage-users/', views.manage_users, name='manage_users'),
     path('manage-admins/', views.manage_admins, name='manage_admins'),
     path('manage-tasks/', views.manage_tasks, name='manage_tasks'),
+    path('manage-tasks/search/', views.search_tasks, name='search_tasks'),
     path('task-reports/', views.task_reports, name='task_reports'),
+    path('task-reports/export/', views.export_task_reports, name='export_task_reports'),
+    path('task-reports/<int:task_id>/', views.task_report_detail, name='task_report_detail'),
     path('edit-user/<int:user_id>/', views.edit_user, name='edit_user'),
     path('delete-user/<int:user_id>/', views.delete_user, name='delete_user'),
     path('edit-task/<int:task_id>/', views.edit_task, name='edit_task'),
     path('delete-task/<int:task_id>/', views.delete_task, name='delete_task'),
     path('add-task/', views.add_task, name='add_task'),
+    path('import-tasks/', views.import_tasks, name='import_tasks'),
     path('assign-user-to-admin/', views.assign_user_to_admin, name='assign_user_to_admin'),
     path('create-admin/', views.create_admin, name='create_admin'),
     path('create-user/', views.create_user, name='create_user'),
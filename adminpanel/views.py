@@ -1,13 +1,47 @@
+import csv
+import heapq
+import json
+from itertools import islice
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from core.forms import UserEditForm, TaskEditForm, TaskCreateForm, AssignUserToAdminForm
+from core.forms import UserEditForm, TaskEditForm, TaskCreateForm, AssignUserToAdminForm, TaskFilterForm, TaskImportForm
+from core.routers import reads_from_replica
 from accounts.models import User
-from tasks.models import Task
-from django.http import HttpResponseForbidden
+from tasks.models import ArchivedTask, Task, TaskStat
+from tasks import events, search
+from tasks.visibility import Hidden, Visibility
+from tasks.stats import summarize
+from tasks.pagination import TaskTablePagination
+from .imports import IMPORT_FIELDS, detect_format, import_tasks as run_import
+from django.db.models.functions import Substr
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseForbidden, HttpResponseBadRequest, Http404, StreamingHttpResponse
+from rest_framework.exceptions import NotFound
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 
+# Characters of a completion report shown in the report list; the full text is on the detail page.
+REPORT_EXCERPT_LENGTH = 200
+
+# (column name, values_list path) of the report export.
+REPORT_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('title', 'title'),
+    ('user', 'assigned_to__username'),
+    ('assigned_by', 'assigned_by__username'),
+    ('due_date', 'due_date'),
+    ('worked_hours', 'worked_hours'),
+    ('completion_report', 'completion_report'),
+    ('updated_at', 'updated_at'),
+]
+EXPORT_CHUNK_SIZE = 2000
+
 @login_required
 def create_admin(request):
     if not is_superadmin(request.user):
@@ -72,10 +106,7 @@ def add_task(request):
         return HttpResponseForbidden()
     if request.method == 'POST':
         form = TaskCreateForm(request.POST)
-        if is_admin(request.user):
-            form.fields['assigned_to'].queryset = User.objects.filter(role='user', assigned_admin=request.user)
-        else:
-            form.fields['assigned_to'].queryset = User.objects.filter(role='user')
+        form.fields['assigned_to'].queryset = Visibility.for_request(request).managed_users()
         if form.is_valid():
             task = form.save(commit=False)
             task.assigned_by = request.user
@@ -93,12 +124,30 @@ def add_task(request):
                             form.add_error(None, err)
     else:
         form = TaskCreateForm()
-        if is_admin(request.user):
-            form.fields['assigned_to'].queryset = User.objects.filter(role='user', assigned_admin=request.user)
-        else:
-            form.fields['assigned_to'].queryset = User.objects.filter(role='user')
+        form.fields['assigned_to'].queryset = Visibility.for_request(request).managed_users()
     return render(request, 'adminpanel/add_task.html', {'form': form})
 
+@login_required
+def import_tasks(request):
+    if not (is_superadmin(request.user) or is_admin(request.user)):
+        return HttpResponseForbidden()
+    result = None
+    if request.method == 'POST':
+        form = TaskImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            users = Visibility.for_request(request).managed_users()
+            upload = form.cleaned_data['file']
+            result = run_import(upload, detect_format(upload, form.cleaned_data['format']), users, request.user)
+            if result.created:
+                messages.success(request, f'{result.created} task(s) imported.')
+            if result.failed:
+                messages.error(request, f'{result.failed} row(s) could not be imported.')
+            if result.stopped_after is not None:
+                messages.error(request, f'Reading the file stopped after line {result.stopped_after}.')
+    else:
+        form = TaskImportForm()
+    return render(request, 'adminpanel/import_tasks.html', {'form': form, 'result': result, 'columns': IMPORT_FIELDS})
+
 @login_required
 def edit_user(request, user_id):
     if not is_superadmin(request.user):
@@ -140,50 +189,55 @@ def delete_user(request, user_id):
         return redirect('adminpanel:manage_users')
     return render(request, 'adminpanel/delete_user.html', {'user_obj': user})
 
+def _managed_task(request, task_id):
+    """(task, None) if the caller manages task ``task_id``, else (None, a 403 response); 404 if there is none."""
+    visibility = Visibility.for_request(request)
+    if not visibility.is_staff:
+        return None, HttpResponseForbidden()
+    try:
+        return visibility.get(task_id, Task.objects.select_related('assigned_to')), None
+    except Hidden:
+        return None, HttpResponseForbidden()
+    except Task.DoesNotExist:
+        raise Http404('No Task matches the given query.')
+
 @login_required
 def edit_task(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
-    if is_superadmin(request.user) or (is_admin(request.user) and getattr(task.assigned_to, 'assigned_admin_id', None) == request.user.id):
-        if request.method == 'POST':
-            form = TaskEditForm(request.POST, instance=task)
-            if is_admin(request.user):
-                form.fields['assigned_to'].queryset = User.objects.filter(role='user', assigned_admin=request.user)
-            else:
-                form.fields['assigned_to'].queryset = User.objects.filter(role='user')
-            if form.is_valid():
-                task = form.save(commit=False)
-                try:
-                    task.full_clean()
-                    task.save()
-                    messages.success(request, 'Task updated successfully.')
-                    return redirect('adminpanel:manage_tasks')
-                except ValidationError as e:
-                    for field, errors in e.message_dict.items():
-                        for err in errors:
-                            if field in form.fields:
-                                form.add_error(field, err)
-                            else:
-                                form.add_error(None, err)
-        else:
-            form = TaskEditForm(instance=task)
-            if is_admin(request.user):
-                form.fields['assigned_to'].queryset = User.objects.filter(role='user', assigned_admin=request.user)
-            else:
-                form.fields['assigned_to'].queryset = User.objects.filter(role='user')
-        return render(request, 'adminpanel/edit_task.html', {'form': form, 'task': task})
-    return HttpResponseForbidden()
+    task, forbidden = _managed_task(request, task_id)
+    if forbidden:
+        return forbidden
+    if request.method == 'POST':
+        form = TaskEditForm(request.POST, instance=task)
+        form.fields['assigned_to'].queryset = Visibility.for_request(request).managed_users()
+        if form.is_valid():
+            task = form.save(commit=False)
+            try:
+                task.full_clean()
+                task.save()
+                messages.success(request, 'Task updated successfully.')
+                return redirect('adminpanel:manage_tasks')
+            except ValidationError as e:
+                for field, errors in e.message_dict.items():
+                    for err in errors:
+                        if field in form.fields:
+                            form.add_error(field, err)
+                        else:
+                            form.add_error(None, err)
+    else:
+        form = TaskEditForm(instance=task)
+        form.fields['assigned_to'].queryset = Visibility.for_request(request).managed_users()
+    return render(request, 'adminpanel/edit_task.html', {'form': form, 'task': task})
 
 @login_required
 def delete_task(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
-    if is_superadmin(request.user) or (is_admin(request.user) and getattr(task.assigned_to, 'assigned_admin_id', None) == request.user.id):
-        if request.method == 'POST':
-            task.delete()
-            messages.success(request, 'Task deleted successfully.')
-            return redirect('adminpanel:manage_tasks')
-        return render(request, 'adminpanel/delete_task.html', {'task': task})
-    return HttpResponseForbidden()
-
+    task, forbidden = _managed_task(request, task_id)
+    if forbidden:
+        return forbidden
+    if request.method == 'POST':
+        task.delete()
+        messages.success(request, 'Task deleted successfully.')
+        return redirect('adminpanel:manage_tasks')
+    return render(request, 'adminpanel/delete_task.html', {'task': task})
 
 def is_superadmin(user):
     return user.is_authenticated and user.role == 'superadmin'
@@ -196,22 +250,25 @@ def is_admin(user):
 def superadmin_dashboard(request):
     if not is_superadmin(request.user):
         return HttpResponseForbidden()
-    return render(request, 'adminpanel/superadmin_dashboard.html')
+    return render(request, 'adminpanel/superadmin_dashboard.html', {'stats': summarize(TaskStat.objects.all())})
 
 @login_required
 def admin_dashboard(request):
     if not is_admin(request.user):
         return HttpResponseForbidden()
-    return render(request, 'adminpanel/admin_dashboard.html')
+    stats = summarize(TaskStat.objects.filter(admin=request.user))
+    return render(request, 'adminpanel/admin_dashboard.html', {'stats': stats})
 
 @login_required
+@reads_from_replica
 def manage_users(request):
     if not is_superadmin(request.user):
         return HttpResponseForbidden()
-    users = User.objects.filter(role='user')
+    users = User.objects.filter(role='user').select_related('assigned_admin')
     return render(request, 'adminpanel/manage_users.html', {'users': users})
 
 @login_required
+@reads_from_replica
 def manage_admins(request):
     if not is_superadmin(request.user):
         return HttpResponseForbidden()
@@ -221,22 +278,163 @@ def manage_admins(request):
               .order_by('username'))
     return render(request, 'adminpanel/manage_admins.html', {'admins': admins})
 
+def _task_table_context(request, *querysets):
+    """Keyset-paginate a task table and build its sort links.
+
+    Only the current page is fetched, so the page cost depends on the page
+    size and not on how many tasks match the filters. Several querysets
+    (a table and its archive) are shown as one merged table.
+    """
+    paginator = TaskTablePagination()
+    try:
+        page = paginator.paginate_querysets(querysets, request)
+    except NotFound:
+        raise Http404('Invalid page cursor.')
+    sort_urls = {}
+    for field in ('id', 'due_date', 'updated_at'):
+        params = request.GET.copy()
+        params.pop('cursor', None)
+        params['ordering'] = f'-{field}' if paginator.ordering == field else field
+        sort_urls[field] = f'?{params.urlencode()}'
+    return {
+        'page': page,
+        'ordering': paginator.ordering,
+        'sort_urls': sort_urls,
+        'next_url': paginator.get_next_link(),
+        'previous_url': paginator.get_previous_link(),
+    }
+
 @login_required
+@reads_from_replica
 def manage_tasks(request):
-    if is_superadmin(request.user):
-        tasks = Task.objects.all()
-    elif is_admin(request.user):
-        tasks = Task.objects.filter(assigned_to__assigned_admin=request.user)
-    else:
+    visibility = Visibility.for_request(request)
+    if not visibility.is_staff:
+        return HttpResponseForbidden()
+    form = TaskFilterForm(request.GET, users=visibility.managed_users(), with_admin=visibility.is_superadmin)
+    tasks = (form.filter_queryset(visibility.tasks())
+             .select_related('assigned_to', 'assigned_by')
+             .defer('description', 'completion_report')
+             # One character past the 60 the template shows, so truncatechars still adds the ellipsis.
+             .annotate(report_excerpt=Substr('completion_report', 1, 61)))
+    context = _task_table_context(request, tasks)
+    context.update(form=form, tasks=context['page'], live_events=events.available(request))
+    return render(request, 'adminpanel/manage_tasks.html', context, status=400 if form.errors else 200)
+
+@login_required
+@reads_from_replica
+def search_tasks(request):
+    """Ranked full-text search over the tasks Manage Tasks would show."""
+    visibility = Visibility.for_request(request)
+    if not visibility.is_staff:
         return HttpResponseForbidden()
-    return render(request, 'adminpanel/manage_tasks.html', {'tasks': tasks})
+    query = request.GET.get('q', '').strip()
+    results, previous_url, next_url = search.search_page(
+        visibility.tasks().select_related('assigned_to').defer('description', 'completion_report'),
+        query, request.GET, request.build_absolute_uri())
+    return render(request, 'adminpanel/search_tasks.html', {
+        'query': query, 'tasks': results, 'previous_url': previous_url, 'next_url': next_url,
+    })
+
+def _report_scope(request):
+    """Completed and archived tasks the caller may see, with the user choices for filtering them."""
+    visibility = Visibility.for_request(request)
+    if not visibility.is_staff:
+        return None, None, None
+    return (visibility.tasks().filter(status='completed'), visibility.tasks(ArchivedTask),
+            visibility.managed_users())
 
 @login_required
+@reads_from_replica
 def task_reports(request):
-    if is_superadmin(request.user):
-        reports = Task.objects.filter(status='completed')
-    elif is_admin(request.user):
-        reports = Task.objects.filter(status='completed', assigned_to__assigned_admin=request.user)
+    reports, archived, users = _report_scope(request)
+    if reports is None:
+        return HttpResponseForbidden()
+    form = TaskFilterForm(request.GET, users=users, with_admin=is_superadmin(request.user), with_status=False)
+    reports, archived = (
+        form.filter_queryset(queryset)
+        .select_related('assigned_to')
+        .defer('description', 'completion_report')
+        .annotate(report_excerpt=Substr('completion_report', 1, REPORT_EXCERPT_LENGTH + 1))
+        for queryset in (reports, archived)
+    )
+    context = _task_table_context(request, reports, archived)
+    export_params = request.GET.copy()
+    for param in ('cursor', 'ordering', 'page_size'):
+        export_params.pop(param, None)
+    context.update(form=form, reports=context['page'], excerpt_length=REPORT_EXCERPT_LENGTH,
+                   export_query=export_params.urlencode())
+    return render(request, 'adminpanel/task_reports.html', context, status=400 if form.errors else 200)
+
+@login_required
+def export_task_reports(request):
+    """Stream the filtered task reports as CSV or NDJSON.
+
+    Rows are read with a server-side iterator in chunks and written as they
+    arrive, so memory stays flat and the first byte goes out right away.
+    Under ASGI the lines are pulled a chunk at a time off the event loop;
+    a sync iterator would be read into a list before anything is sent.
+    """
+    reports, archived, users = _report_scope(request)
+    if reports is None:
+        return HttpResponseForbidden()
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return HttpResponseBadRequest('format must be csv or ndjson.')
+    form = TaskFilterForm(request.GET, users=users, with_admin=is_superadmin(request.user), with_status=False)
+    if not form.is_valid():
+        return HttpResponseBadRequest(' '.join(f'{field}: {" ".join(errors)}' for field, errors in form.errors.items()))
+    header = [name for name, _ in REPORT_EXPORT_COLUMNS]
+    # Both tables are read in (due_date, id) order, which their indexes
+    # already give, and merged so the export stays in one order.
+    rows = heapq.merge(*(
+        form.filter_queryset(queryset)
+        .order_by('due_date', 'id')
+        .values_list(*(source for _, source in REPORT_EXPORT_COLUMNS))
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for queryset in (reports, archived)
+    ), key=itemgetter(header.index('due_date'), header.index('id')))
+    if fmt == 'csv':
+        content, content_type = _iter_csv(header, rows), 'text/csv'
     else:
+        content, content_type = _iter_ndjson(header, rows), 'application/x-ndjson'
+    if isinstance(request, ASGIRequest):
+        content = _aiter_chunks(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="task-reports.{fmt}"'
+    return response
+
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer's caller."""
+    def write(self, value):
+        return value
+
+def _iter_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+def _iter_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+async def _aiter_chunks(lines):
+    # Thread-sensitive, so every chunk reads from the connection the
+    # server-side cursor was opened on.
+    next_chunk = sync_to_async(lambda: ''.join(islice(lines, EXPORT_CHUNK_SIZE)))
+    while chunk := await next_chunk():
+        yield chunk
+
+@login_required
+def task_report_detail(request, task_id):
+    # Admins may read the reports of their users' tasks and of tasks they assigned;
+    # reports of archived tasks are found in the archive.
+    try:
+        task = Visibility.for_request(request).get(
+            task_id, Task.objects.select_related('assigned_to', 'assigned_by').filter(status='completed'),
+            ArchivedTask.objects.select_related('assigned_to', 'assigned_by'), reports=True)
+    except Hidden:
         return HttpResponseForbidden()
-    return render(request, 'adminpanel/task_reports.html', {'reports': reports})
+    except Task.DoesNotExist:
+        raise Http404('No Task matches the given query.')
+    return render(request, 'adminpanel/task_report_detail.html', {'task': task})
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        # Hook the query timers into connection_created before any connection opens.
+        from . import metrics, slowlog  # noqa: F401
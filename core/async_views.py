@@ -0,0 +1,39 @@
+"""
+Async counterpart of DRF's APIView.
+
+DRF dispatches synchronously, so under ASGI every request to a plain APIView
+holds a worker thread. ``AsyncAPIView`` keeps DRF's request parsing,
+authentication, permissions, exception handling and rendering, runs the
+blocking part of that (authentication may read the user row) in a thread,
+and awaits ``async def`` handlers that use the async ORM.
+"""
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """APIView whose handlers (``get``, ``put``, ...) are coroutines."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
@@ -0,0 +1,76 @@
+"""
+Helpers for the ``bench_*`` management commands.
+
+Benchmarks run in-process against a throwaway database created the same way
+the test runner creates one, so they never touch ``db.sqlite3``.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database(name=None):
+    """Create a fresh, migrated database for the duration of the block.
+
+    ``name`` is an SQLite file path to use instead of an in-memory database,
+    for datasets that should not live in RAM.
+    """
+    setup_test_environment()
+    test_settings = connection.settings_dict['TEST']
+    previous_name = test_settings.get('NAME')
+    if name:
+        test_settings['NAME'] = str(name)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = previous_name
+        teardown_test_environment()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(func, iterations=100, warmup=5):
+    """Call ``func`` repeatedly and summarise latency and queries per call.
+
+    Returns a dict with ``p50_ms``, ``p95_ms``, ``p99_ms``, ``mean_ms`` and
+    ``queries`` (mean queries per call).
+    """
+    for _ in range(warmup):
+        func()
+    timings, queries = [], []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(ctx))
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': round(statistics.fmean(queries), 2),
+    }
+
+
+def format_table(rows, columns):
+    """Render ``rows`` (dicts) as a fixed-width text table."""
+    widths = {c: max(len(c), *(len(str(r.get(c, ''))) for r in rows)) for c in columns}
+    lines = ['  '.join(c.ljust(widths[c]) for c in columns)]
+    lines.append('  '.join('-' * widths[c] for c in columns))
+    for row in rows:
+        lines.append('  '.join(str(row.get(c, '')).ljust(widths[c]) for c in columns))
+    return '\n'.join(lines)
@@ -0,0 +1,111 @@
+"""
+Synthetic datasets for benchmarks and local load testing.
+
+Accounts follow the naming of ``core.testing.create_sample_data``
+(``root``, ``admin{a}``, ``user{a}_{u}``, all with password ``pw``), so the
+same URLs and logins work against either. Rows are written with
+``bulk_create`` and the TaskStat summary is rebuilt once at the end.
+"""
+
+import datetime
+import random
+from decimal import Decimal
+from types import SimpleNamespace
+
+DEFAULT_STATUS_MIX = {'pending': 0.4, 'in_progress': 0.3, 'completed': 0.3}
+
+WORDS = (
+    'review update client report deploy fix check draft meeting notes budget '
+    'schedule design test release invoice follow-up migrate document analyse '
+    'prepare plan sync backlog feedback summary data audit vendor contract '
+    'training onboarding support ticket survey metrics roadmap'
+).split()
+
+
+def parse_status_mix(text):
+    """Parse ``pending=0.5,completed=0.5`` into normalised weights."""
+    from tasks.models import Task
+
+    allowed = {s for s, _ in Task.STATUS_CHOICES}
+    mix = {}
+    for part in text.split(','):
+        status, _, weight = part.partition('=')
+        status = status.strip()
+        if status not in allowed:
+            raise ValueError(f"Unknown status '{status}'. Allowed values: {', '.join(sorted(allowed))}.")
+        mix[status] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError('Status weights must add up to more than zero.')
+    return {status: weight / total for status, weight in mix.items()}
+
+
+def _text(rng, size):
+    """Roughly ``size`` characters of word salad."""
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words).capitalize() + '.'
+
+
+def generate_dataset(admins=2, users_per_admin=10, tasks_per_user=50, status_mix=None,
+                     report_size=200, seed=0, prefix='', batch_size=10000, progress=None):
+    """Insert one superadmin, ``admins`` admins with their users, and their tasks.
+
+    Completed tasks get a completion report of about ``report_size``
+    characters (varying by +/-50%) and worked hours. ``progress`` is called
+    with the number of tasks written so far after every batch.
+    Returns a namespace with ``superadmin``, ``admins``, ``users`` and ``tasks``
+    (the task count).
+    """
+    from django.contrib.auth.hashers import make_password
+    from accounts.models import User
+    from tasks import stats
+    from tasks.models import Task
+
+    rng = random.Random(seed)
+    mix = status_mix or DEFAULT_STATUS_MIX
+    statuses, weights = list(mix), list(mix.values())
+    password = make_password('pw')
+
+    superadmin = User.objects.create(username=f'{prefix}root', password=password, role='superadmin')
+    admin_rows = User.objects.bulk_create([
+        User(username=f'{prefix}admin{a}', password=password, role='admin') for a in range(admins)
+    ])
+    user_rows = User.objects.bulk_create([
+        User(username=f'{prefix}user{a}_{u}', password=password, role='user', assigned_admin=admin)
+        for a, admin in enumerate(admin_rows) for u in range(users_per_admin)
+    ], batch_size=batch_size)
+
+    first_due = datetime.date.today() - datetime.timedelta(days=180)
+    written, batch = 0, []
+    for user in user_rows:
+        for t in range(tasks_per_user):
+            status = rng.choices(statuses, weights)[0]
+            completed = status == 'completed'
+            batch.append(Task(
+                title=f'{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} #{t}',
+                description=_text(rng, rng.randint(20, 120)),
+                assigned_to_id=user.pk,
+                assigned_by_id=user.assigned_admin_id,
+                due_date=first_due + datetime.timedelta(days=rng.randrange(365)),
+                status=status,
+                completion_report=_text(rng, rng.randint(report_size // 2, report_size * 3 // 2)) if completed else None,
+                worked_hours=Decimal(rng.randint(2, 32)) / 4 if completed else None,
+            ))
+            if len(batch) >= batch_size:
+                Task.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+                if progress:
+                    progress(written)
+    if batch:
+        Task.objects.bulk_create(batch)
+        written += len(batch)
+        if progress:
+            progress(written)
+    # bulk_create sends no signals; build the summary table in one pass instead.
+    stats.rebuild()
+    return SimpleNamespace(superadmin=superadmin, admins=admin_rows, users=user_rows, tasks=written)
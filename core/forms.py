@@ -37,3 +37,54 @@ class TaskCreateForm(forms.ModelForm):
         widgets = {
             'due_date': forms.DateInput(attrs={'type': 'date'}),
         }
+
+class TaskFilterForm(forms.Form):
+    """GET filters for the admin panel task tables.
+
+    ``users`` limits the assignee choices to the caller's scope; the admin
+    filter is only offered when ``with_admin`` is set (superadmin).
+    """
+    status = forms.ChoiceField(choices=[('', 'Any status')] + Task.STATUS_CHOICES, required=False)
+    assigned_to = forms.ModelChoiceField(queryset=User.objects.none(), required=False, empty_label='Any user')
+    admin = forms.ModelChoiceField(queryset=User.objects.filter(role='admin'), required=False, empty_label='Any admin')
+    due_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    due_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def __init__(self, *args, users=None, with_admin=False, with_status=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['assigned_to'].queryset = (users if users is not None else User.objects.filter(role='user')).order_by('username')
+        self.fields['admin'].queryset = self.fields['admin'].queryset.order_by('username')
+        if not with_admin:
+            self.fields.pop('admin')
+        if not with_status:
+            self.fields.pop('status')
+        for field in self.fields.values():
+            css = 'form-select' if isinstance(field.widget, forms.Select) else 'form-control'
+            field.widget.attrs['class'] = f'{css} {css}-sm'
+
+    def filter_queryset(self, queryset):
+        # An invalid filter matches nothing rather than being dropped, so a
+        # typo never widens the table; callers report form.errors with a 400.
+        if not self.is_valid():
+            return queryset.none()
+        data = self.cleaned_data
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        if data.get('assigned_to'):
+            queryset = queryset.filter(assigned_to=data['assigned_to'])
+        if data.get('admin'):
+            queryset = queryset.filter(assigned_to__assigned_admin=data['admin'])
+        if data.get('due_from'):
+            queryset = queryset.filter(due_date__gte=data['due_from'])
+        if data.get('due_to'):
+            queryset = queryset.filter(due_date__lte=data['due_to'])
+        return queryset
+
+class TaskImportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ('auto', 'Detect from file name'),
+        ('csv', 'CSV (header row)'),
+        ('ndjson', 'NDJSON (one JSON object per line)'),
+    ]
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, initial='auto')
@@ -0,0 +1,263 @@
+"""
+Per-view request metrics, kept in process and served in Prometheus text format.
+
+``MetricsMiddleware`` records, for each resolved URL name, the request
+count, a latency histogram, the number of SQL queries and the time spent in
+them, and the response size. Updates are a few additions under a lock, and
+``METRICS_SAMPLE_RATE`` (0.0-1.0) limits recording to a fraction of
+requests. Counters are per process: scrape every worker, or sum them.
+
+The request's query timer lives in a ContextVar read by an execute wrapper
+installed on every connection as it is opened. Connections are per thread,
+and under ASGI the ORM runs in ``sync_to_async`` worker threads; the
+ContextVar follows the request there.
+"""
+
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNRESOLVED = '<unresolved>'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _ViewSeries:
+    __slots__ = ('requests', 'buckets', 'seconds', 'queries', 'query_seconds', 'bytes')
+
+    def __init__(self):
+        self.requests = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.bytes = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, seconds, queries, query_seconds, size):
+        with self._lock:
+            series = self._views.get(view)
+            if series is None:
+                series = self._views[view] = _ViewSeries()
+            series.requests += 1
+            series.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            series.seconds += seconds
+            series.queries += queries
+            series.query_seconds += query_seconds
+            series.bytes += size
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+    def snapshot(self):
+        """{view: series copy}, taken under the lock so each series is consistent."""
+        with self._lock:
+            copies = {}
+            for view, series in self._views.items():
+                copy = _ViewSeries()
+                for field in _ViewSeries.__slots__:
+                    value = getattr(series, field)
+                    setattr(copy, field, list(value) if isinstance(value, list) else value)
+                copies[view] = copy
+            return copies
+
+    def render(self):
+        """The current values in the Prometheus text exposition format."""
+        views = sorted(self.snapshot().items())
+        lines = [
+            '# HELP app_metrics_sample_rate Fraction of requests recorded by these metrics.',
+            '# TYPE app_metrics_sample_rate gauge',
+            f'app_metrics_sample_rate {sample_rate()}',
+        ]
+
+        def family(name, kind, help_text, value):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for view, series in views:
+                lines.append(f'{name}{{view="{_escape(view)}"}} {value(series)}')
+
+        family('app_http_requests_total', 'counter', 'Requests handled, by URL name.', lambda s: s.requests)
+        lines.append('# HELP app_http_request_duration_seconds Request latency, by URL name.')
+        lines.append('# TYPE app_http_request_duration_seconds histogram')
+        for view, series in views:
+            label = _escape(view)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), series.buckets):
+                cumulative += count
+                lines.append(f'app_http_request_duration_seconds_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'app_http_request_duration_seconds_sum{{view="{label}"}} {series.seconds:.6f}')
+            lines.append(f'app_http_request_duration_seconds_count{{view="{label}"}} {series.requests}')
+        family('app_db_queries_total', 'counter', 'SQL queries run, by URL name.', lambda s: s.queries)
+        family('app_db_query_duration_seconds_total', 'counter', 'Time spent in SQL queries, by URL name.',
+               lambda s: f'{s.query_seconds:.6f}')
+        family('app_http_response_bytes_total', 'counter', 'Response body bytes sent, by URL name.',
+               lambda s: s.bytes)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def sample_rate():
+    return getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+
+
+class _QueryTimer:
+    """Database execute wrapper counting the queries of one request and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+    @contextmanager
+    def watch(self):
+        token = _current_timer.set(self)
+        try:
+            yield
+        finally:
+            _current_timer.reset(token)
+
+
+_current_timer = ContextVar('query_timer', default=None)
+
+
+def _execute(execute, sql, params, many, context):
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install(connection, **kwargs):
+    """Add the query timer hook to ``connection``; connected to ``connection_created``."""
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+connection_created.connect(install)
+# Connections this thread opened before the module was imported.
+for _connection in connections.all(initialized_only=True):
+    install(_connection)
+
+
+class MetricsMiddleware:
+    """Record per-view metrics into ``registry``; place it first in MIDDLEWARE."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not _sampled():
+            return self.get_response(request)
+        start, timer = time.perf_counter(), _QueryTimer()
+        with timer.watch():
+            response = self.get_response(request)
+        return self.finish(request, response, start, timer)
+
+    async def __acall__(self, request):
+        if not _sampled():
+            return await self.get_response(request)
+        start, timer = time.perf_counter(), _QueryTimer()
+        with timer.watch():
+            response = await self.get_response(request)
+        return self.finish(request, response, start, timer)
+
+    def finish(self, request, response, start, timer):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else UNRESOLVED
+        if response.streaming:
+            # Streamed bodies are produced (and queried for) after we return;
+            # record once the server has drained them.
+            stream = self._astream if response.is_async else self._stream
+            response.streaming_content = stream(response.streaming_content, view, start, timer)
+            return response
+        size = len(response.content)
+        registry.record(view, time.perf_counter() - start, timer.count, timer.seconds, size)
+        return response
+
+    def _stream(self, content, view, start, timer):
+        size = 0
+        content = iter(content)
+        try:
+            while True:
+                # Set per chunk: the server may pull each one in a different context.
+                with timer.watch():
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.record(view, time.perf_counter() - start, timer.count, timer.seconds, size)
+
+    async def _astream(self, content, view, start, timer):
+        size = 0
+        content = aiter(content)
+        try:
+            while True:
+                with timer.watch():
+                    try:
+                        chunk = await anext(content)
+                    except StopAsyncIteration:
+                        break
+                size += len(chunk)
+                yield chunk
+        finally:
+            registry.record(view, time.perf_counter() - start, timer.count, timer.seconds, size)
+
+
+def _sampled():
+    rate = sample_rate()
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class MetricsView(APIView):
+    """Prometheus scrape endpoint; superadmins only, by JWT or admin panel session."""
+
+    authentication_classes = [*api_settings.DEFAULT_AUTHENTICATION_CLASSES, SessionAuthentication]
+
+    def get(self, request):
+        if getattr(request.user, 'role', None) != 'superadmin':
+            return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
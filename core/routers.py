@@ -0,0 +1,126 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to ``default`` too, except inside
+``read_replica()`` (or views decorated with ``@reads_from_replica``), which
+routes them to ``settings.READ_DATABASE``. A user who wrote something is
+pinned to the primary for ``READ_AFTER_WRITE_SECONDS`` so they never read a
+replica that has not caught up with their own change; the pin is kept in
+the cache, so it holds across workers that share one.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_read_alias = ContextVar('read_alias', default=None)
+# Per-request {'wrote': bool}, set by ReadAfterWriteMiddleware.
+_request_state = ContextVar('request_state', default=None)
+
+
+def _sticky_key(user_id):
+    return f'db-sticky:{user_id}'
+
+
+def replica_alias():
+    """The configured read alias, or None when reads all go to the primary."""
+    alias = getattr(settings, 'READ_DATABASE', DEFAULT_DB_ALIAS)
+    return None if alias == DEFAULT_DB_ALIAS else alias
+
+
+def read_alias_for(user):
+    """Where ``user``'s read-only queries should go right now."""
+    alias = replica_alias()
+    user_id = getattr(user, 'id', None)
+    if alias and user_id is not None and cache.get(_sticky_key(user_id)):
+        return None
+    return alias
+
+
+@contextmanager
+def read_replica(user):
+    """Route the reads made inside the block to the replica, unless ``user`` is pinned."""
+    token = _read_alias.set(read_alias_for(user))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def reads_from_replica(view):
+    """Decorator for read-only function views; apply it below @login_required."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with read_replica(request.user):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def pin_to_primary(user_id):
+    cache.set(_sticky_key(user_id), 1, getattr(settings, 'READ_AFTER_WRITE_SECONDS', 5))
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        # Session saves happen on most admin panel requests and never feed a listing.
+        if state is not None and model._meta.app_label != 'sessions':
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema by copying the primary.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReadAfterWriteMiddleware:
+    """Pin the requesting user to the primary after a request that wrote."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = {'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        self.finish(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = {'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        self.finish(request, state)
+        return response
+
+    def finish(self, request, state):
+        # DRF copies the user it authenticated onto the Django request.
+        user_id = getattr(getattr(request, 'user', None), 'id', None)
+        if state['wrote'] and user_id is not None and replica_alias():
+            pin_to_primary(user_id)
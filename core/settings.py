@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
+    'core',
     'adminpanel',
     'tasks',
     'accounts',
@@ -47,11 +49,16 @@ INSTALLED_APPS = [
 # REST Framework and JWT settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # SimpleJWT authentication plus token_version revocation; see STATELESS_JWT_AUTH.
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'tasks.pagination.KeysetPagination',
+    # Default page size for list endpoints; clients may ask for up to
+    # KeysetPagination.max_page_size with ?page_size=
+    'PAGE_SIZE': 50,
 }
 
 # SimpleJWT configuration
@@ -60,15 +67,50 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=14),
 }
 
+# Build request.user from the signed JWT claims (id, role, assigned_admin_id)
+# instead of loading the User row on every API request. Revocation uses the
+# per-user token_version, cached for TOKEN_VERSION_CACHE_TIMEOUT seconds, so
+# other workers notice a role change or deactivation within that window.
+STATELESS_JWT_AUTH = False
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Login throttle buckets, per process unless LOGIN_THROTTLE_CACHE_DIR names
+    # a directory every worker on the host can write.
+    'login_throttle': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['LOGIN_THROTTLE_CACHE_DIR'],
+    } if os.environ.get('LOGIN_THROTTLE_CACHE_DIR') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'login-throttle',
+    },
+}
+
+# Login throttling (accounts.throttling): every POST /api/login/ and login form
+# submission takes a token from a bucket per username and one per client IP
+# before the password is hashed; an empty bucket answers 429. "N/period" allows
+# a burst of N, refilled evenly over the period; drop a key to turn it off.
+# Behind a proxy, set REST_FRAMEWORK['NUM_PROXIES'] so the client IP is used.
+LOGIN_THROTTLE_RATES = {'username': '5/min', 'ip': '30/min'}
+LOGIN_THROTTLE_CACHE = 'login_throttle'
+
 # Custom user model (to be created in accounts)
 AUTH_USER_MODEL = 'accounts.User'
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack; see METRICS_SAMPLE_RATE.
+    'core.metrics.MetricsMiddleware',
+    'core.slowlog.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.routers.ReadAfterWriteMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,7 +132,18 @@ TEMPLATES = [
     },
 ]
 
+# Fraction of requests recorded by core.metrics (served at /metrics/); 0 turns recording off.
+METRICS_SAMPLE_RATE = 1.0
+
+# Slow query log (core.slowlog): set SLOW_QUERY_LOG to a file path to log
+# queries taking at least SLOW_QUERY_THRESHOLD_MS, with their plans, as JSON lines.
+SLOW_QUERY_LOG = None
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 
 # Database
@@ -100,8 +153,36 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Read-only copy of default, used by the listing and report views (see
+    # core.routers). Point DJANGO_REPLICA_DB at a second SQLite file kept in
+    # sync with `manage.py sync_replica` to try it locally.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DJANGO_REPLICA_DB') or BASE_DIR / 'db.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Alias the read-only views read from; 'default' turns replica reads off.
+READ_DATABASE = 'replica' if os.environ.get('DJANGO_REPLICA_DB') else 'default'
+# After a write, a user reads from the primary for this many seconds so
+# they see their own change even while the replica lags.
+READ_AFTER_WRITE_SECONDS = 5
+
+# Task sync (GET /api/tasks/changes/): changes younger than SYNC_SETTLE_SECONDS
+# wait for the next sync, so a cursor never passes an uncommitted write;
+# deletion tombstones are kept TOMBSTONE_RETENTION_DAYS, and older cursors
+# must start over.
+SYNC_SETTLE_SECONDS = 2
+TOMBSTONE_RETENTION_DAYS = 30
+
+# Live task events (GET /api/tasks/events/, served under ASGI). LocalBackend
+# only reaches streams in the same process; with several workers point
+# TASK_EVENTS_FILE at a file they all share to use FileBackend.
+TASK_EVENTS_FILE = os.environ.get('TASK_EVENTS_FILE')
+TASK_EVENTS_BACKEND = 'tasks.events.FileBackend' if TASK_EVENTS_FILE else 'tasks.events.LocalBackend'
+TASK_EVENTS_HEARTBEAT_SECONDS = 15
 
 
 # Password validation
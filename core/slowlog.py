@@ -0,0 +1,216 @@
+"""
+Opt-in slow query log.
+
+With ``SLOW_QUERY_LOG`` set to a file path, ``SlowQueryMiddleware`` watches
+the queries of each request and appends every query slower
+than ``SLOW_QUERY_THRESHOLD_MS`` to that file as one JSON object per line:
+the SQL, its parameters, the duration, the view that ran it and the
+database's query plan. The file rotates at ``SLOW_QUERY_LOG_MAX_BYTES``,
+keeping ``SLOW_QUERY_LOG_BACKUPS`` old files. ``manage.py slow_query_report``
+summarises it.
+
+As in ``core.metrics``, the request's logger is held in a ContextVar and
+read by an execute wrapper on every connection, so queries run in
+``sync_to_async`` worker threads under ASGI are seen too.
+"""
+
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+
+_logger = logging.getLogger('core.slowlog')
+_logger.setLevel(logging.INFO)
+_logger.propagate = False
+_handler_lock = threading.Lock()
+_explaining = threading.local()
+
+
+def get_logger():
+    """The logger writing to SLOW_QUERY_LOG; its file handler follows the setting."""
+    path = settings.SLOW_QUERY_LOG
+    with _handler_lock:
+        current = _logger.handlers[0] if _logger.handlers else None
+        if current is None or current.baseFilename != os.path.abspath(path):
+            if current is not None:
+                _logger.removeHandler(current)
+                current.close()
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=getattr(settings, 'SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+                backupCount=getattr(settings, 'SLOW_QUERY_LOG_BACKUPS', 5),
+                encoding='utf-8',
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            _logger.addHandler(handler)
+    return _logger
+
+
+def explain(connection, sql, params):
+    """The database's plan for ``sql`` as a list of strings, or None if it cannot be explained."""
+    prefix = connection.ops.explain_query_prefix()
+    _explaining.active = True
+    try:
+        # A savepoint, so a failing EXPLAIN cannot break the caller's transaction.
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            # SQLite puts the step description last; other backends return one column.
+            return [str(row[-1]) for row in cursor.fetchall()]
+    except DatabaseError:
+        return None
+    finally:
+        _explaining.active = False
+
+
+class SlowQueryLogger:
+    """Execute wrapper logging the queries of one request that exceed the threshold."""
+
+    def __init__(self, request=None, threshold_ms=None):
+        self.request = request
+        self.threshold = (threshold_ms if threshold_ms is not None
+                          else getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100)) / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_explaining, 'active', False):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= self.threshold:
+            self.log(context['connection'], sql, params, many, duration)
+        return result
+
+    def log(self, connection, sql, params, many, duration):
+        match = getattr(self.request, 'resolver_match', None)
+        entry = {
+            'ts': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'view': match.view_name if match else None,
+            'path': getattr(self.request, 'path', None),
+            'alias': connection.alias,
+            'duration_ms': round(duration * 1000, 3),
+            'sql': sql,
+            'params': _params(params, many),
+            'plan': None if many else explain(connection, sql, params),
+        }
+        get_logger().info(json.dumps(entry, default=str))
+
+    @contextmanager
+    def watch(self):
+        token = _current_logger.set(self)
+        try:
+            yield
+        finally:
+            _current_logger.reset(token)
+
+    def stream(self, content):
+        # Streamed bodies query the database after the middleware has returned;
+        # watch each chunk, as the server may pull them in different contexts.
+        content = iter(content)
+        while True:
+            with self.watch():
+                chunk = next(content, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def astream(self, content):
+        content = aiter(content)
+        while True:
+            with self.watch():
+                try:
+                    chunk = await anext(content)
+                except StopAsyncIteration:
+                    return
+            yield chunk
+
+
+_current_logger = ContextVar('slow_query_logger', default=None)
+
+
+def _execute(execute, sql, params, many, context):
+    logger = _current_logger.get()
+    if logger is None:
+        return execute(sql, params, many, context)
+    return logger(execute, sql, params, many, context)
+
+
+def install(connection, **kwargs):
+    """Add the slow query hook to ``connection``; connected to ``connection_created``."""
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+connection_created.connect(install)
+# Connections this thread opened before the module was imported.
+for _connection in connections.all(initialized_only=True):
+    install(_connection)
+
+
+def _params(params, many):
+    if many:
+        # executemany() runs one statement per parameter set; keep the first.
+        params = next(iter(params), ())
+    if isinstance(params, dict):
+        return params
+    return list(params or ())
+
+
+class SlowQueryMiddleware:
+    """Install SlowQueryLogger for each request; unused unless SLOW_QUERY_LOG is set."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG', None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        logger = SlowQueryLogger(request)
+        with logger.watch():
+            response = self.get_response(request)
+        return self.finish(response, logger)
+
+    async def __acall__(self, request):
+        logger = SlowQueryLogger(request)
+        with logger.watch():
+            response = await self.get_response(request)
+        return self.finish(response, logger)
+
+    def finish(self, response, logger):
+        if response.streaming:
+            stream = logger.astream if response.is_async else logger.stream
+            response.streaming_content = stream(response.streaming_content)
+        return response
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """The shape of a query: literals and placeholders become ``?``, IN lists collapse."""
+    shape = _STRING.sub('?', sql.replace('%s', '?'))
+    shape = _NUMBER.sub('?', shape)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _SPACE.sub(' ', shape).strip()
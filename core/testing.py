@@ -0,0 +1,116 @@
+"""Shared helpers for the test suites of the project apps."""
+
+import datetime
+import re
+from types import SimpleNamespace
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def create_sample_data(users_per_admin=2, tasks_per_user=3):
+    """Create a superadmin, two admins with their users, and tasks in every status.
+
+    Returns a namespace with ``superadmin``, ``admins``, ``users`` and ``tasks``.
+    All accounts use the password ``pw``.
+    """
+    from django.contrib.auth.hashers import make_password
+    from accounts.models import User
+    from tasks.models import Task
+
+    # Hash once; PBKDF2 per account would dominate the test run time.
+    password = make_password('pw')
+    superadmin = User.objects.create(username='root', password=password, role='superadmin')
+    admins, users, tasks = [], [], []
+    statuses = [s for s, _ in Task.STATUS_CHOICES]
+    for a in range(2):
+        admin = User.objects.create(username=f'admin{a}', password=password, role='admin')
+        admins.append(admin)
+        for u in range(users_per_admin):
+            user = User.objects.create(username=f'user{a}_{u}', password=password, role='user', assigned_admin=admin)
+            users.append(user)
+            for t in range(tasks_per_user):
+                status = statuses[t % len(statuses)]
+                completed = status == 'completed'
+                tasks.append(Task.objects.create(
+                    title=f'Task {t} for {user.username}',
+                    description='Details',
+                    assigned_to=user,
+                    assigned_by=admin,
+                    due_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=t),
+                    status=status,
+                    completion_report='Done.' if completed else None,
+                    worked_hours='1.50' if completed else None,
+                ))
+    return SimpleNamespace(superadmin=superadmin, admins=admins, users=users, tasks=tasks)
+
+
+def explain_query_plan(sql):
+    """Return the ``detail`` column of SQLite's ``EXPLAIN QUERY PLAN`` for ``sql``."""
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[3] for row in cursor.fetchall()]
+
+
+def is_full_scan(detail, allow_index_scan=()):
+    """True for plan steps that read every row of a table or index.
+
+    SQLite reports a table walk as ``SCAN <table>`` and an index walk as
+    ``SCAN <table> USING [COVERING] INDEX <name>``; both are O(n), so an
+    index walk only passes when its index is named in ``allow_index_scan``
+    (e.g. one that a LIMIT cuts short). Lookups read ``SEARCH``. Virtual
+    tables (FTS5) read ``SCAN <table> VIRTUAL TABLE INDEX n:<plan>``, where
+    an empty plan means no constraint (e.g. MATCH) was used.
+    """
+    if ' VIRTUAL TABLE INDEX ' in detail:
+        return detail.endswith(':')
+    if not detail.startswith('SCAN '):
+        return False
+    index = re.search(r' USING (?:COVERING )?INDEX (\S+)', detail)
+    return index is None or index.group(1) not in allow_index_scan
+
+
+class QueryPlanMixin:
+    """Assert that the SQL a block of code runs never reads a whole table or index."""
+
+    # Tables whose plans are checked; framework tables (sessions, content types) are not.
+    plan_tables = ('tasks_task', 'tasks_archivedtask', 'tasks_tasktombstone', 'accounts_user')
+
+    def assertNoFullScans(self, func, *args, allow_index_scan=(), **kwargs):
+        """Run ``func`` and fail on any full scan in its queries' plans.
+
+        ``allow_index_scan`` names the indexes the code is known to walk:
+        an unfiltered listing reading one up to its LIMIT, or an aggregate
+        or export over every row.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+        checked = 0
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            if not any(f'"{table}"' in sql for table in self.plan_tables):
+                continue
+            checked += 1
+            scans = [d for d in explain_query_plan(sql) if is_full_scan(d, allow_index_scan)]
+            if scans:
+                self.fail(f'Full scan ({"; ".join(scans)}) in query:\n{sql}')
+        self.assertTrue(checked, 'No queries against the checked tables were captured.')
+        return result
+
+
+class QueryBudgetMixin:
+    """Assert that a block of code stays within a fixed number of SQL queries.
+
+    Unlike ``assertNumQueries`` the budget is an upper bound, so a view can be
+    held to it as long as its query count does not grow with the row count.
+    """
+
+    def assertQueryBudget(self, budget, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+        if len(ctx) > budget:
+            queries = '\n'.join(f'{i}. {q["sql"]}' for i, q in enumerate(ctx.captured_queries, start=1))
+            self.fail(f'{len(ctx)} queries executed, budget is {budget}:\n{queries}')
+        return result
@@ -1,7 +1,12 @@
 from django.contrib import admin
-from .models import Task
+from .models import ArchivedTask, Task
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
 	list_display = ('title', 'assigned_to', 'status', 'due_date', 'worked_hours')
 	list_filter = ('status', 'due_date')
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+	list_display = ('title', 'assigned_to', 'due_date', 'worked_hours', 'archived_at')
+	list_filter = ('due_date',)
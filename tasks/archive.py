@@ -0,0 +1,78 @@
+"""
+Moving old completed tasks from tasks_task into tasks_archivedtask.
+
+Tasks move in small batches, each in its own short transaction (copy the
+rows, then delete them from the hot table), so writers are only ever
+blocked for one batch. Archived tasks still count in TaskStat: the delete
+receivers skip rows deleted while ``is_archiving()`` is true, and the
+from-scratch aggregate reads both tables. Sync clients get a tombstone for
+each archived task, written with the batch, and open event streams a
+``deleted`` event.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import events, sync
+from .models import ArchivedTask, Task
+
+_archiving = ContextVar('archiving', default=False)
+
+
+def is_archiving():
+    return _archiving.get()
+
+
+@contextmanager
+def archiving():
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+def archivable(cutoff):
+    """Completed tasks due before ``cutoff`` and not edited since; served by the (status, due_date) index."""
+    return Task.objects.filter(status='completed', due_date__lt=cutoff, updated_at__date__lt=cutoff)
+
+
+def archive_batch(ids, cutoff):
+    """Move the tasks among ``ids`` that are still archivable; returns how many moved."""
+    with transaction.atomic(), archiving():
+        # Checked again under the lock: a task may have been reopened since it was picked.
+        tasks = list(archivable(cutoff).filter(pk__in=ids).select_for_update())
+        if not tasks:
+            return 0
+        now = timezone.now()
+        ArchivedTask.objects.bulk_create([ArchivedTask.from_task(task, archived_at=now) for task in tasks])
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+        sync.record_removed(tasks)
+        events.task_removed(tasks)
+    return len(tasks)
+
+
+def archive_completed(cutoff, batch_size=500, pause=0.0, progress=None):
+    """Archive every archivable task, ``batch_size`` at a time; returns the total moved.
+
+    ``pause`` seconds are slept between batches to leave room for other
+    writers; ``progress(total)`` is called after each batch.
+    """
+    total = 0
+    while True:
+        ids = list(archivable(cutoff).order_by('due_date', 'id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        moved = archive_batch(ids, cutoff)
+        if not moved:
+            break
+        total += moved
+        if progress:
+            progress(total)
+        if pause:
+            time.sleep(pause)
+    return total
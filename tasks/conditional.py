@@ -0,0 +1,56 @@
+"""
+Conditional GET (ETag / Last-Modified) for the task API.
+
+Validators are computed from the rows a response is built from, so a poll
+that would return the same payload is answered with 304 before anything
+is serialized.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(repr(parts).encode('utf-8'), usedforsecurity=False).hexdigest()
+    return quote_etag(digest)
+
+
+# The count catches deletions and the id sum catches rows moving in and out
+# of the scope, which leave max(changed_at) unchanged. changed_at rather than
+# updated_at, so the overdue sweeper's flags invalidate too.
+VALIDATOR_AGGREGATES = {'count': Count('id'), 'ids': Sum('id'), 'last': Max('changed_at')}
+
+
+def _validators(row):
+    return (row['count'], row['ids'], row['last'] and row['last'].isoformat()), row['last']
+
+
+async def aqueryset_validators(queryset):
+    """One aggregate query: (parts for an ETag, last modification time)."""
+    return _validators(await queryset.order_by().aaggregate(**VALIDATOR_AGGREGATES))
+
+
+def not_modified(request, etag, last_modified=None):
+    """The 304 response for ``request``, or None when it has to be rendered.
+
+    ``last_modified`` should only be passed when it changes whenever the
+    payload does; otherwise If-Modified-Since is left unanswered.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        add_validators(response, etag, last_modified)
+    return response
+
+
+def add_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Payloads are per user: let clients keep them, but always revalidate.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
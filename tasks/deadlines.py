@@ -0,0 +1,64 @@
+"""
+Upcoming and overdue tasks, and the sweeper that flags newly overdue ones.
+
+Both feeds filter ``status IN (open statuses)`` and a due date range, which
+the (assigned_to, status, due_date) and (status, due_date) indexes answer
+directly. The sweeper reads the partial ``task_unflagged_status_due_idx`` index,
+so a run only visits tasks that became overdue since the previous run, and
+flags them with one short UPDATE per batch.
+"""
+
+import datetime
+import time
+
+from django.utils import timezone
+
+from .models import Task
+
+DEFAULT_UPCOMING_DAYS = 7
+MAX_UPCOMING_DAYS = 365
+
+
+def upcoming(queryset, today=None, days=DEFAULT_UPCOMING_DAYS):
+    """Open tasks of ``queryset`` due from ``today`` through ``days`` days ahead."""
+    today = today or timezone.localdate()
+    return queryset.filter(status__in=Task.OPEN_STATUSES, due_date__gte=today,
+                           due_date__lte=today + datetime.timedelta(days=days))
+
+
+def overdue(queryset, today=None):
+    """Open tasks of ``queryset`` due before ``today``."""
+    return queryset.filter(status__in=Task.OPEN_STATUSES, due_date__lt=today or timezone.localdate())
+
+
+def unflagged_overdue(today):
+    return overdue(Task.objects.filter(overdue_since__isnull=True), today)
+
+
+def flag_overdue(today=None, batch_size=1000, pause=0.0, progress=None):
+    """Set ``overdue_since`` on open tasks that passed their due date; returns how many were flagged.
+
+    Each batch is one UPDATE of at most ``batch_size`` rows, committed on its
+    own, with ``pause`` seconds between batches. ``changed_at`` moves too,
+    since the flag is part of what the API returns; ``updated_at`` is kept
+    for edits.
+    """
+    today = today or timezone.localdate()
+    total = 0
+    while True:
+        # Unordered, so the LIMIT stops the index walk early instead of sorting every overdue task.
+        ids = list(unflagged_overdue(today).order_by().values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        now = timezone.now()
+        # The filter is repeated so a task completed meanwhile is left alone.
+        flagged = unflagged_overdue(today).filter(pk__in=ids).update(overdue_since=now, changed_at=now)
+        if not flagged:
+            break
+        total += flagged
+        if progress:
+            progress(total)
+        if pause:
+            time.sleep(pause)
+    return total
+
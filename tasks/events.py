@@ -0,0 +1,310 @@
+"""
+Live task events for GET /api/tasks/events/ (server-sent events).
+
+Task writes publish ``created``, ``updated`` and ``deleted`` events once
+their transaction commits. Each process has one ``Broker`` that hands every
+event to the open streams allowed to see it: a user's own tasks, an admin's
+users' tasks, or everything for a superadmin, as in GET /api/tasks/. A task
+that leaves a scope (reassigned, or its user moved to another admin) is
+sent there as ``deleted``.
+
+Events reach the broker through the backend named by
+``TASK_EVENTS_BACKEND``: ``LocalBackend`` delivers within the process;
+``FileBackend`` appends to ``TASK_EVENTS_FILE`` and every process tails it,
+a stand-in for a real pub/sub when several workers serve the streams.
+
+Streams do not replay missed events. A client that reconnects, or is sent
+``reset`` because it fell behind, catches up with GET /api/tasks/changes/.
+"""
+
+import asyncio
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+from accounts.models import User
+from .models import Task
+from .serializers import TaskSerializer
+
+RESET = {'type': 'reset'}
+
+
+def _encode(event):
+    return json.dumps(event, cls=JSONEncoder, separators=(',', ':'))
+
+
+class Subscription:
+    """One open stream: a bounded queue fed on the event loop that serves it."""
+
+    def __init__(self, user, loop, maxsize=100):
+        self.user_id = user.id
+        self.role = getattr(user, 'role', None)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def wants(self, event):
+        if event is RESET:
+            return True
+        if self.role == 'superadmin':
+            return event['all']
+        if self.role == 'admin':
+            return event['admin_id'] == self.user_id
+        return event['assigned_to_id'] == self.user_id
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop what is queued and tell it to resync.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESET)
+
+    async def get(self, timeout):
+        """The next event, or None after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broker:
+    def __init__(self, backend_class, **options):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self.backend = backend_class(self, **options)
+
+    def subscribe(self, user):
+        subscription = Subscription(user, asyncio.get_running_loop())
+        self.backend.start()
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscriptions)
+
+    def dispatch(self, event):
+        """Hand ``event`` to matching subscriptions; safe to call from any thread."""
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.wants(event)]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Its loop has closed; the stream is gone.
+                self.unsubscribe(subscription)
+
+    def publish(self, events):
+        if events:
+            self.backend.publish(events)
+
+
+class LocalBackend:
+    """Delivers events to the streams of this process only."""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def wants_events(self):
+        # Nobody elsewhere can listen: skip building events nobody would get.
+        return self.broker.has_subscribers()
+
+    def publish(self, events):
+        for event in events:
+            self.broker.dispatch(event)
+
+
+class FileBackend:
+    """
+    Shares events between processes through an append-only JSON lines file.
+
+    Each event is one ``write()`` in append mode, so lines from several
+    writers do not interleave. A thread per process tails the file from its
+    end and dispatches new lines. Truncating the file (logrotate
+    ``copytruncate``) is noticed and reading restarts at the top.
+    """
+
+    poll_interval = 0.1
+
+    def __init__(self, broker, path=None):
+        self.broker = broker
+        self.path = path or settings.TASK_EVENTS_FILE
+        self._started = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._started:
+            if self._thread is None:
+                # Opened here so the tail starts after everything written so far.
+                open(self.path, 'ab').close()
+                position = os.path.getsize(self.path)
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._tail, args=(position,),
+                                                name='task-events-tail', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._started:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            thread.join()
+
+    def wants_events(self):
+        return True
+
+    def publish(self, events):
+        data = ''.join(_encode(event) + '\n' for event in events).encode('utf-8')
+        with open(self.path, 'ab') as f:
+            f.write(data)
+
+    def _tail(self, position):
+        pending = b''
+        while not self._stopping.is_set():
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            if size < position:
+                position, pending = 0, b''
+            if size > position:
+                with open(self.path, 'rb') as f:
+                    f.seek(position)
+                    chunk = f.read(size - position)
+                position += len(chunk)
+                *lines, pending = (pending + chunk).split(b'\n')
+                for line in lines:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.broker.dispatch(event)
+            self._stopping.wait(self.poll_interval)
+
+
+def available(request):
+    """Whether ``request`` can hold a stream open: only under ASGI.
+
+    WSGI would collect the endless stream into a list before responding,
+    tying up the worker for good.
+    """
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = Broker(import_string(settings.TASK_EVENTS_BACKEND))
+        return _broker
+
+
+@receiver(setting_changed)
+def _reset_broker(setting, **kwargs):
+    global _broker
+    if setting in ('TASK_EVENTS_BACKEND', 'TASK_EVENTS_FILE'):
+        with _broker_lock:
+            broker, _broker = _broker, None
+        if broker is not None:
+            broker.backend.stop()
+
+
+def _event(kind, task, data, assigned_to_id, admin_id, everyone=True):
+    return {'type': kind, 'task': data if data is not None else {'id': task},
+            'assigned_to_id': assigned_to_id, 'admin_id': admin_id, 'all': everyone}
+
+
+def _admins_of(user_ids):
+    return dict(User.objects.filter(pk__in=set(user_ids)).values_list('pk', 'assigned_admin_id'))
+
+
+def _publish_on_commit(events):
+    broker = get_broker()
+    transaction.on_commit(lambda: broker.publish(events))
+
+
+def task_saved(tasks, created=False, old_assignees=None):
+    """Publish saves of ``tasks``; ``old_assignees`` maps task pk to the assignee it left."""
+    if not tasks or not get_broker().backend.wants_events():
+        return
+    old_assignees = old_assignees or {}
+    admins = _admins_of([t.assigned_to_id for t in tasks] + list(old_assignees.values()))
+    kind = 'created' if created else 'updated'
+    events = []
+    for task in tasks:
+        admin_id = admins.get(task.assigned_to_id)
+        events.append(_event(kind, task.pk, TaskSerializer(task).data, task.assigned_to_id, admin_id))
+        old = old_assignees.get(task.pk)
+        if old is not None and old != task.assigned_to_id:
+            old_admin = admins.get(old)
+            events.append(_event('deleted', task.pk, None, old,
+                                 old_admin if old_admin != admin_id else None, everyone=False))
+    _publish_on_commit(events)
+
+
+def task_removed(tasks):
+    """Publish the deletion (or archiving) of ``tasks``."""
+    if not tasks or not get_broker().backend.wants_events():
+        return
+    admins = _admins_of(t.assigned_to_id for t in tasks)
+    _publish_on_commit([_event('deleted', t.pk, None, t.assigned_to_id, admins.get(t.assigned_to_id))
+                        for t in tasks])
+
+
+def admin_changed(user_id, old_admin_id, new_admin_id):
+    """A user moved between admins: their tasks leave one admin's stream and join the other's."""
+    if not get_broker().backend.wants_events():
+        return
+    events = []
+    for task in Task.objects.filter(assigned_to_id=user_id):
+        if old_admin_id is not None:
+            events.append(_event('deleted', task.pk, None, None, old_admin_id, everyone=False))
+        if new_admin_id is not None:
+            events.append(_event('updated', task.pk, TaskSerializer(task).data, None, new_admin_id, everyone=False))
+    _publish_on_commit(events)
+
+
+async def stream(user, heartbeat=None):
+    """The SSE body for ``user``: events as they come, a comment line when idle."""
+    heartbeat = heartbeat or getattr(settings, 'TASK_EVENTS_HEARTBEAT_SECONDS', 15)
+    broker = get_broker()
+    subscription = broker.subscribe(user)
+    try:
+        # Tell EventSource how soon to reconnect after the connection drops.
+        yield 'retry: 3000\n\n'
+        while True:
+            event = await subscription.get(heartbeat)
+            if event is None:
+                yield ': keepalive\n\n'
+            elif event is RESET:
+                yield 'event: reset\ndata: {}\n\n'
+                return
+            else:
+                yield f"event: {event['type']}\ndata: {_encode(event['task'])}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,43 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tasks import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Move completed tasks due before a cutoff (and not edited since) into the archive table, '
+        'in batches of short transactions.'
+    )
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group()
+        cutoff.add_argument('--before', help='Cutoff date, YYYY-MM-DD.')
+        cutoff.add_argument('--days', type=int, default=180, help='Cutoff as days before today (default 180).')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the tasks that would move.')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                cutoff = datetime.date.fromisoformat(options['before'])
+            except ValueError:
+                raise CommandError('--before must be a date, YYYY-MM-DD.')
+        else:
+            cutoff = timezone.localdate() - datetime.timedelta(days=options['days'])
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        if options['dry_run']:
+            count = archive.archivable(cutoff).count()
+            self.stdout.write(f'{count} task(s) completed and due before {cutoff} would be archived.')
+            return
+        moved = archive.archive_completed(
+            cutoff, batch_size=options['batch_size'], pause=options['pause'],
+            progress=lambda total: self.stdout.write(f'  {total} archived', ending='\r'),
+        )
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} task(s) completed and due before {cutoff}.'))
@@ -0,0 +1,158 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.benchmarking import benchmark_database, format_table, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve the same concurrent, slow-reading clients through the WSGI handler '
+        '(a fixed pool of worker threads) and the ASGI handler (one event loop) and compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50, help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=4, help='Requests per client, one after another.')
+        parser.add_argument('--workers', type=int, default=4, help='WSGI worker threads.')
+        parser.add_argument('--client-delay', type=float, default=50,
+                            help='Milliseconds each client takes to read a response.')
+
+    def handle(self, *args, **options):
+        from core.asgi import application as asgi_application
+        from core.testing import create_sample_data
+        from core.wsgi import application as wsgi_application
+        from tasks.views import CustomTokenObtainPairSerializer
+
+        delay = options['client_delay'] / 1000
+        with benchmark_database():
+            data = create_sample_data(users_per_admin=5, tasks_per_user=20)
+            tokens = [str(CustomTokenObtainPairSerializer.get_token(u).access_token) for u in data.users]
+            # Each client polls its own task list.
+            clients = [tokens[i % len(tokens)] for i in range(options['clients'])]
+            path = reverse('user-tasks')
+            rows = [
+                self.run_wsgi(wsgi_application, path, clients, options['requests'], options['workers'], delay),
+                self.run_asgi(asgi_application, path, clients, options['requests'], delay),
+            ]
+        self.stdout.write(format_table(rows, [
+            'server', 'clients', 'workers', 'requests', 'errors', 'seconds', 'req_per_s', 'p50_ms', 'p95_ms', 'p99_ms',
+        ]))
+
+    def summarize(self, server, workers, clients, timings, errors, elapsed):
+        return {
+            'server': server,
+            'clients': clients,
+            'workers': workers,
+            'requests': len(timings),
+            'errors': errors,
+            'seconds': round(elapsed, 2),
+            'req_per_s': round(len(timings) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 1),
+            'p95_ms': round(percentile(timings, 95), 1),
+            'p99_ms': round(percentile(timings, 99), 1),
+        }
+
+    def run_wsgi(self, app, path, clients, requests, workers, delay):
+        # A sync worker is busy until the client has read the whole response.
+        slots = threading.Semaphore(workers)
+        timings, errors = [], []
+
+        def client(token):
+            for _ in range(requests):
+                statuses = []
+                start = time.perf_counter()
+                with slots:
+                    body = app(self.wsgi_environ(path, token), lambda status, headers: statuses.append(status))
+                    b''.join(body)
+                    body.close()
+                    time.sleep(delay)
+                timings.append((time.perf_counter() - start) * 1000)
+                if not statuses[0].startswith('200'):
+                    errors.append(statuses[0])
+
+        threads = [threading.Thread(target=client, args=(token,)) for token in clients]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.summarize('wsgi', workers, len(clients), timings, len(errors), time.perf_counter() - start)
+
+    def run_asgi(self, app, path, clients, requests, delay):
+        # Slow clients only suspend their own coroutine; the loop keeps serving.
+        timings, errors = [], []
+
+        async def client(token):
+            for _ in range(requests):
+                statuses = []
+                disconnect = asyncio.Event()
+                messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+                async def receive():
+                    if messages:
+                        return messages.pop()
+                    # Django listens for a disconnect while the view runs.
+                    await disconnect.wait()
+                    return {'type': 'http.disconnect'}
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        statuses.append(message['status'])
+                    elif not message.get('more_body'):
+                        await asyncio.sleep(delay)
+
+                start = time.perf_counter()
+                await app(self.asgi_scope(path, token), receive, send)
+                disconnect.set()
+                timings.append((time.perf_counter() - start) * 1000)
+                if statuses[0] != 200:
+                    errors.append(statuses[0])
+
+        async def main():
+            await asyncio.gather(*(client(token) for token in clients))
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        return self.summarize('asgi', 1, len(clients), timings, len(errors), time.perf_counter() - start)
+
+    def wsgi_environ(self, path, token):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': 'testserver',
+            'HTTP_AUTHORIZATION': f'Bearer {token}',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+
+    def asgi_scope(self, path, token):
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
@@ -0,0 +1,192 @@
+import datetime
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import resolve, reverse
+
+from core.benchmarking import benchmark_database, format_table, measure
+
+# Dataset shapes: (admins, users per admin, tasks per user).
+SIZES = {
+    '1k': (2, 10, 50),
+    '100k': (10, 100, 100),
+    '1m': (10, 100, 1000),
+}
+# URLconf modules whose every route should have a case below.
+COVERED_URLCONFS = ('tasks.urls', 'adminpanel.urls')
+# Routes a request/response timing cannot describe.
+NOT_BENCHMARKED = {'task-events'}  # an open-ended event stream
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate datasets of 1k/100k/1M tasks and report p50/p95/p99 latency and queries per '
+        'request for every /api/ and /adminpanel/ URL, as a table and as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1k,100k,1m', help=f'Comma separated, from: {", ".join(SIZES)}')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--db-dir', help='Directory for the SQLite files (default: a temporary directory).')
+
+    def handle(self, *args, **options):
+        sizes = [s.strip().lower() for s in options['sizes'].split(',') if s.strip()]
+        unknown = [s for s in sizes if s not in SIZES]
+        if unknown:
+            raise CommandError(f"Unknown size(s): {', '.join(unknown)}. Choose from {', '.join(SIZES)}.")
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            db_dir = Path(options['db_dir'] or tmp)
+            for size in sizes:
+                results.append(self.run_size(size, db_dir / f'bench_{size}.sqlite3', options))
+
+        report = {
+            'commit': self.git_commit(),
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'iterations': options['iterations'],
+            'results': results,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def run_size(self, size, path, options):
+        from core.datagen import generate_dataset
+
+        admins, users_per_admin, tasks_per_user = SIZES[size]
+        self.stdout.write(f'== {size}: generating {admins * users_per_admin * tasks_per_user} tasks')
+        # Unthrottled, so every login sample hashes a password as a first attempt does.
+        with benchmark_database(name=path), override_settings(LOGIN_THROTTLE_RATES={}):
+            start = time.perf_counter()
+            data = generate_dataset(admins=admins, users_per_admin=users_per_admin, tasks_per_user=tasks_per_user)
+            generate_s = round(time.perf_counter() - start, 2)
+            self.stdout.write(f'   generated in {generate_s}s')
+
+            rows, covered = [], set()
+            for label, iterations, call in self.cases(data):
+                response = call()
+                if response.status_code >= 400:
+                    raise CommandError(f'{label} returned {response.status_code}')
+                covered.add(resolve(response.wsgi_request.path).view_name)
+                stats = measure(call, iterations=min(iterations, options['iterations']), warmup=options['warmup'])
+                rows.append({'endpoint': label, 'status': response.status_code, **stats})
+
+        self.stdout.write(format_table(rows, ['endpoint', 'status', 'queries', 'p50_ms', 'p95_ms', 'p99_ms']))
+        missing = sorted(self.all_view_names() - covered - NOT_BENCHMARKED)
+        if missing:
+            self.stderr.write(f"No benchmark case for: {', '.join(missing)}")
+        return {'size': size, 'tasks': data.tasks, 'generate_s': generate_s, 'endpoints': rows, 'uncovered': missing}
+
+    def cases(self, data):
+        """(label, max iterations, callable returning a response) for every benchmarked request."""
+        from tasks.models import Task
+        from tasks.views import CustomTokenObtainPairSerializer
+
+        superadmin, admin, user = data.superadmin, data.admins[0], data.users[0]
+        other_user = data.users[-1]
+
+        def api(account):
+            token = CustomTokenObtainPairSerializer.get_token(account)
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+            client.refresh_token = str(token)
+            return client
+
+        def panel(account):
+            client = Client()
+            client.force_login(account)
+            return client
+
+        def drained(response):
+            # Streaming responses only run their queries while being read.
+            if response.streaming:
+                b''.join(response.streaming_content)
+            return response
+
+        api_user, api_admin, api_super = api(user), api(admin), api(superadmin)
+        web_admin, web_super = panel(admin), panel(superadmin)
+        # Writes only move open tasks to in_progress, so every run sees the same data.
+        own = list(Task.objects.filter(assigned_to=user).exclude(status='completed').values_list('pk', flat=True)[:50])
+        report = Task.objects.filter(assigned_to=user, status='completed').values_list('pk', flat=True).first()
+        tasks_url = reverse('user-tasks')
+        etag = api_admin.get(tasks_url)['ETag']
+        since = api_user.get(reverse('task-changes'), {'limit': 1000}).data['cursor']
+
+        def page(name, *args):
+            return reverse(f'adminpanel:{name}', args=args)
+
+        # Password hashing and full exports are slow by design; a few samples are enough.
+        return [
+            ('POST /api/login/', 5, lambda: Client().post(
+                reverse('token_obtain_pair'), {'username': user.username, 'password': 'pw'})),
+            ('POST /api/token/refresh/', 100, lambda: Client().post(
+                reverse('token_refresh'), {'refresh': api_user.refresh_token})),
+            ('GET /api/tasks/ (user)', 100, lambda: api_user.get(tasks_url)),
+            ('GET /api/tasks/ (admin)', 100, lambda: api_admin.get(tasks_url)),
+            ('GET /api/tasks/?fields=all (admin)', 100, lambda: api_admin.get(tasks_url, {'fields': 'all'})),
+            ('GET /api/tasks/ (superadmin)', 100, lambda: api_super.get(tasks_url)),
+            ('GET /api/tasks/ (admin, 304)', 100, lambda: api_admin.get(tasks_url, HTTP_IF_NONE_MATCH=etag)),
+            ('PUT /api/tasks/{id}/', 100, lambda: api_user.put(
+                reverse('user-task-update', args=[own[0]]), {'status': 'in_progress'}, content_type='application/json')),
+            ('PUT /api/tasks/bulk/ (50)', 100, lambda: api_user.put(
+                reverse('user-task-bulk-update'), [{'id': pk, 'status': 'in_progress'} for pk in own],
+                content_type='application/json')),
+            ('GET /api/tasks/{id}/report/', 100, lambda: api_admin.get(reverse('task-report', args=[report]))),
+            ('GET /api/tasks/upcoming/ (user)', 100, lambda: api_user.get(reverse('user-tasks-upcoming'))),
+            ('GET /api/tasks/overdue/ (admin)', 100, lambda: api_admin.get(reverse('user-tasks-overdue'))),
+            ('GET /api/tasks/changes/ (user, idle)', 100, lambda: api_user.get(reverse('task-changes'), {'since': since})),
+            ('GET /api/tasks/search/ (admin)', 100, lambda: api_admin.get(reverse('task-search'), {'q': 'budget review'})),
+            ('GET /api/tasks/search/ (superadmin)', 100, lambda: api_super.get(reverse('task-search'), {'q': 'budg*'})),
+            ('GET /api/stats/ (admin)', 100, lambda: api_admin.get(reverse('task-stats'))),
+            ('GET /api/stats/ (superadmin)', 100, lambda: api_super.get(reverse('task-stats'))),
+            ('GET superadmin dashboard', 100, lambda: web_super.get(page('superadmin_dashboard'))),
+            ('GET admin dashboard', 100, lambda: web_admin.get(page('admin_dashboard'))),
+            ('GET manage-users', 100, lambda: web_super.get(page('manage_users'))),
+            ('GET manage-admins', 100, lambda: web_super.get(page('manage_admins'))),
+            ('GET manage-tasks (admin)', 100, lambda: web_admin.get(page('manage_tasks'))),
+            ('GET manage-tasks (superadmin)', 100, lambda: web_super.get(page('manage_tasks'))),
+            ('GET manage-tasks/search (admin)', 100, lambda: web_admin.get(page('search_tasks') + '?q=vendor+contract')),
+            ('GET task-reports (admin)', 100, lambda: web_admin.get(page('task_reports'))),
+            ('GET task-reports (superadmin)', 100, lambda: web_super.get(page('task_reports'))),
+            ('GET task-reports/export csv (admin)', 3, lambda: drained(
+                web_admin.get(page('export_task_reports') + '?format=csv'))),
+            ('GET task-reports/{id}/', 100, lambda: web_admin.get(page('task_report_detail', report))),
+            ('GET edit-user', 100, lambda: web_super.get(page('edit_user', other_user.pk))),
+            ('GET delete-user', 100, lambda: web_super.get(page('delete_user', other_user.pk))),
+            ('GET edit-task', 100, lambda: web_admin.get(page('edit_task', own[0]))),
+            ('GET delete-task', 100, lambda: web_admin.get(page('delete_task', own[0]))),
+            ('GET add-task (admin)', 100, lambda: web_admin.get(page('add_task'))),
+            ('GET import-tasks', 100, lambda: web_admin.get(page('import_tasks'))),
+            ('GET assign-user-to-admin', 100, lambda: web_super.get(page('assign_user_to_admin'))),
+            ('GET create-admin', 100, lambda: web_super.get(page('create_admin'))),
+            ('GET create-user', 100, lambda: web_super.get(page('create_user'))),
+        ]
+
+    def all_view_names(self):
+        from importlib import import_module
+
+        names = set()
+        for module in COVERED_URLCONFS:
+            urlconf = import_module(module)
+            namespace = getattr(urlconf, 'app_name', None)
+            names.update(f'{namespace}:{p.name}' if namespace else p.name for p in urlconf.urlpatterns)
+        return names
+
+    def git_commit(self):
+        try:
+            return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
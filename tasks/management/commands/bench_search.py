@@ -0,0 +1,78 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarking import benchmark_database, format_table, measure
+
+from .bench_endpoints import SIZES
+
+# The generated text uses a few dozen words, so most terms match a large
+# share of the tasks; RARE is added to one title in RARE_EVERY to also time
+# a selective query, closer to searching real text.
+RARE, RARE_EVERY = 'kestrel', 1000
+QUERIES = (RARE, 'budget', 'vendor contract', 'deplo*', 'zebra')
+PAGE = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the FTS5 task search with icontains filters on generated datasets '
+        '(first page of results, superadmin and admin scopes).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1k,100k,1m', help=f'Comma separated, from: {", ".join(SIZES)}')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--db-dir', help='Directory for the SQLite files (default: a temporary directory).')
+
+    def handle(self, *args, **options):
+        sizes = [s.strip().lower() for s in options['sizes'].split(',') if s.strip()]
+        unknown = [s for s in sizes if s not in SIZES]
+        if unknown:
+            raise CommandError(f"Unknown size(s): {', '.join(unknown)}. Choose from {', '.join(SIZES)}.")
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            db_dir = Path(options['db_dir'] or tmp)
+            for size in sizes:
+                results.append(self.run_size(size, db_dir / f'bench_search_{size}.sqlite3', options))
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({'results': results}, indent=2) + '\n')
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def run_size(self, size, path, options):
+        from django.db.models import F, Value
+        from django.db.models.functions import Concat, Mod
+
+        from core.datagen import generate_dataset
+        from tasks import search
+        from tasks.models import Task
+
+        admins, users_per_admin, tasks_per_user = SIZES[size]
+        self.stdout.write(f'== {size}: generating {admins * users_per_admin * tasks_per_user} tasks')
+        with benchmark_database(name=path):
+            data = generate_dataset(admins=admins, users_per_admin=users_per_admin, tasks_per_user=tasks_per_user)
+            if not search.is_available():
+                raise CommandError('The search index needs SQLite with FTS5.')
+            (Task.objects.alias(bucket=Mod('id', RARE_EVERY)).filter(bucket=0)
+             .update(title=Concat(F('title'), Value(f' {RARE}'))))
+            scopes = {
+                'superadmin': Task.objects.all(),
+                'admin': Task.objects.filter(assigned_to__assigned_admin=data.admins[0]),
+            }
+            rows = []
+            for scope, tasks in scopes.items():
+                for query in QUERIES:
+                    for method, run in (('fts5', search.search), ('icontains', search.icontains_search)):
+                        def call(run=run, tasks=tasks, query=query):
+                            return list(run(tasks, query)[:PAGE])
+                        hits = len(call())
+                        stats = measure(call, iterations=options['iterations'], warmup=options['warmup'])
+                        rows.append({'scope': scope, 'query': query, 'method': method, 'hits': hits, **stats})
+
+        self.stdout.write(format_table(rows, ['scope', 'query', 'method', 'hits', 'p50_ms', 'p95_ms', 'p99_ms']))
+        return {'size': size, 'tasks': data.tasks, 'cases': rows}
@@ -0,0 +1,87 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarking import benchmark_database, format_table, measure
+
+
+class Command(BaseCommand):
+    help = (
+        'Rows per second of the task listing and report payloads: TaskSerializer + JSONRenderer '
+        'against the values() fast path, with the stdlib encoder and with orjson if installed. '
+        'Each call fetches the rows too, as a request would.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='50,500,5000', help='Comma separated row counts per call.')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(n) for n in options['rows'].split(',') if n.strip()]
+        except ValueError:
+            raise CommandError('--rows takes comma separated integers.')
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = self.run(counts, Path(tmp) / 'bench_serialization.sqlite3', options)
+        self.stdout.write(format_table(rows, ['payload', 'rows', 'method', 'p50_ms', 'rows_per_s', 'speedup']))
+        if options['output']:
+            Path(options['output']).write_text(json.dumps({'results': rows}, indent=2) + '\n')
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def run(self, counts, path, options):
+        from rest_framework.renderers import JSONRenderer
+
+        from core.datagen import generate_dataset
+        from tasks import payloads
+        from tasks.models import Task
+        from tasks.serializers import TaskReportSerializer, TaskSerializer
+
+        render = JSONRenderer().render
+        tasks = Task.objects.order_by('due_date', 'id')
+        reports = Task.objects.filter(status='completed').order_by('due_date', 'id')
+
+        def stdlib(call):
+            def run():
+                installed, payloads.orjson = payloads.orjson, None
+                try:
+                    return call()
+                finally:
+                    payloads.orjson = installed
+            return run
+
+        results = []
+        with benchmark_database(name=path):
+            generate_dataset(admins=2, users_per_admin=10, tasks_per_user=max(counts) // 4 + 1)
+            for count in counts:
+                cases = {
+                    'tasks': {
+                        'serializer': lambda: render(TaskSerializer(tasks[:count], many=True).data),
+                        'values': lambda: payloads.dumps(payloads.TASKS.convert(list(payloads.TASKS.rows(tasks[:count])))),
+                    },
+                    'reports': {
+                        'serializer': lambda: render(TaskReportSerializer(
+                            reports.select_related('assigned_to', 'assigned_by')[:count], many=True).data),
+                        'values': lambda: payloads.dumps(payloads.REPORTS.convert(list(payloads.REPORTS.rows(reports[:count])))),
+                    },
+                }
+                for payload, methods in cases.items():
+                    calls = {'serializer': methods['serializer'], 'values + json': stdlib(methods['values'])}
+                    if payloads.orjson is not None:
+                        calls['values + orjson'] = methods['values']
+                    expected = methods['serializer']()
+                    baseline = None
+                    for method, call in calls.items():
+                        if call() != expected:
+                            raise CommandError(f'{payload}/{method}: output differs from the serializer.')
+                        stats = measure(call, iterations=options['iterations'], warmup=options['warmup'])
+                        baseline = baseline or stats['p50_ms']
+                        results.append({
+                            'payload': payload, 'rows': count, 'method': method, **stats,
+                            'rows_per_s': round(count / stats['p50_ms'] * 1000),
+                            'speedup': f"{baseline / stats['p50_ms']:.1f}x",
+                        })
+        return results
@@ -0,0 +1,109 @@
+import json
+import statistics
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmarking import benchmark_database, format_table
+
+# The query ForeignKey.validate() runs for a user FK.
+FK_CHECK = 'SELECT 1 AS "a" FROM "accounts_user" WHERE "accounts_user"."id" ='
+
+
+class Command(BaseCommand):
+    help = (
+        'Queries per saved task on each write path (model save, API, admin panel, bulk and import), '
+        'with known foreign keys skipped by Task.clean_fields() and with every foreign key queried.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        from core.testing import create_sample_data
+        from tasks.models import Task
+
+        with benchmark_database():
+            data = create_sample_data(users_per_admin=2, tasks_per_user=80)
+            rows = []
+            for validate_all in (True, False):
+                Task.validate_known_fks = validate_all
+                try:
+                    for label, tasks_per_call, call in self.cases(data):
+                        rows.append({'path': label, 'fk_checks': 'all' if validate_all else 'unknown only',
+                                     **self.run(call, tasks_per_call, options['iterations'])})
+                finally:
+                    Task.validate_known_fks = False
+        self.stdout.write(format_table(rows, [
+            'path', 'fk_checks', 'queries_per_task', 'fk_queries_per_task', 'p50_ms',
+        ]))
+
+    def run(self, call, tasks_per_call, iterations):
+        response = call()
+        if response is not None and response.status_code >= 400:
+            raise CommandError(f'{response.wsgi_request.path} returned {response.status_code}')
+        timings, queries, checks = [], [], []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(ctx))
+            checks.append(sum(q['sql'].startswith(FK_CHECK) for q in ctx.captured_queries))
+        return {
+            'queries_per_task': round(statistics.fmean(queries) / tasks_per_call, 2),
+            'fk_queries_per_task': round(statistics.fmean(checks) / tasks_per_call, 2),
+            'p50_ms': round(statistics.median(timings), 2),
+        }
+
+    def cases(self, data):
+        """(label, tasks written per call, callable) for every path that writes tasks."""
+        from tasks.models import Task
+        from tasks.views import CustomTokenObtainPairSerializer
+
+        admin, user = data.admins[0], data.users[0]
+        open_ids = list(Task.objects.filter(assigned_to=user).exclude(status='completed')
+                        .values_list('pk', flat=True)[:50])
+        model_task = Task.objects.get(pk=open_ids[0])
+        api = Client(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}')
+        panel = Client()
+        panel.force_login(admin)
+        statuses = iter(['in_progress', 'pending'] * 10_000)
+        form = {'title': 'Benchmark', 'description': 'Saved by bench_task_saves', 'due_date': '2030-01-01',
+                'status': 'pending', 'assigned_to': user.pk}
+        rows = '\n'.join(json.dumps({'title': f'Imported {i}', 'description': 'd', 'due_date': '2030-01-01',
+                                     'assigned_to': user.username}) for i in range(100))
+
+        def model_save():
+            model_task.status = next(statuses)
+            model_task.save()
+
+        def api_put():
+            return api.put(reverse('user-task-update', args=[open_ids[1]]), {'status': next(statuses)},
+                           content_type='application/json')
+
+        def api_bulk():
+            status = next(statuses)
+            return api.put(reverse('user-task-bulk-update'), [{'id': pk, 'status': status} for pk in open_ids],
+                           content_type='application/json')
+
+        def panel_edit():
+            return panel.post(reverse('adminpanel:edit_task', args=[open_ids[2]]), {**form, 'status': next(statuses)})
+
+        def panel_import():
+            return panel.post(reverse('adminpanel:import_tasks'), {
+                'file': SimpleUploadedFile('tasks.ndjson', rows.encode('utf-8')), 'format': 'ndjson'})
+
+        return [
+            ('Task.save() (loaded task)', 1, model_save),
+            ('PUT /api/tasks/{id}/', 1, api_put),
+            (f'PUT /api/tasks/bulk/ ({len(open_ids)})', len(open_ids), api_bulk),
+            ('POST adminpanel add_task', 1, lambda: panel.post(reverse('adminpanel:add_task'), form)),
+            ('POST adminpanel edit_task', 1, panel_edit),
+            ('POST adminpanel import (100 rows)', 100, panel_import),
+        ]
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import sync
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete task tombstones older than TOMBSTONE_RETENTION_DAYS, in batches. Sync cursors '
+        'older than that are refused, so no client misses a deletion.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        removed = sync.compact(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} tombstone(s).'))
@@ -0,0 +1,29 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import deadlines
+
+
+class Command(BaseCommand):
+    help = (
+        'Flag open tasks that passed their due date (sets overdue_since), in batches of short '
+        'UPDATEs; meant to run from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+        parser.add_argument('--today', help='Treat this date (YYYY-MM-DD) as today.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        today = None
+        if options['today']:
+            try:
+                today = datetime.date.fromisoformat(options['today'])
+            except ValueError:
+                raise CommandError('--today must be a date, YYYY-MM-DD.')
+        flagged = deadlines.flag_overdue(today, batch_size=options['batch_size'], pause=options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Flagged {flagged} newly overdue task(s).'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import search
+
+
+class Command(BaseCommand):
+    help = 'Re-read every task into the full-text search index (SQLite FTS5).'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('The search index only exists on SQLite; other databases use icontains.')
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Rebuilt the task search index.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the TaskStat summary table from the tasks (archived ones included), or check it with --verify.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare the table with a fresh aggregate; fail on differences.')
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            groups = stats.rebuild()
+            self.stdout.write(f'Rebuilt {groups} task stat group(s).')
+        problems = stats.verify()
+        if problems:
+            for problem in problems[:50]:
+                self.stderr.write(problem)
+            raise CommandError(f'{len(problems)} task stat group(s) do not match tasks_task.')
+        self.stdout.write(self.style.SUCCESS('Task stats match tasks_task.'))
@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarking import format_table
+from core.slowlog import normalize
+
+
+class Command(BaseCommand):
+    help = 'Group the slow query log by query shape and rank the shapes by total time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', help='Log file (default: SLOW_QUERY_LOG); rotated backups are read too.')
+        parser.add_argument('--limit', type=int, default=20, help='Number of shapes to show.')
+        parser.add_argument('--plans', action='store_true', help='Print the plan of the slowest query of each shape.')
+        parser.add_argument('--json', action='store_true', help='Write the ranking as JSON instead of a table.')
+
+    def handle(self, *args, **options):
+        path = options['log'] or getattr(settings, 'SLOW_QUERY_LOG', None)
+        if not path:
+            raise CommandError('No log given: pass --log or set SLOW_QUERY_LOG.')
+        files = self.log_files(Path(path))
+        if not files:
+            raise CommandError(f'No slow query log at {path}.')
+
+        shapes = {}
+        for entry in self.entries(files):
+            shape = normalize(entry['sql'])
+            group = shapes.get(shape)
+            if group is None:
+                group = shapes[shape] = {'shape': shape, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                         'views': {}, 'slowest': None}
+            duration = entry['duration_ms']
+            group['count'] += 1
+            group['total_ms'] += duration
+            view = entry.get('view') or '-'
+            group['views'][view] = group['views'].get(view, 0) + 1
+            if duration >= group['max_ms']:
+                group['max_ms'] = duration
+                group['slowest'] = entry
+
+        ranked = sorted(shapes.values(), key=lambda g: g['total_ms'], reverse=True)[:options['limit']]
+        for group in ranked:
+            group['total_ms'] = round(group['total_ms'], 3)
+            group['mean_ms'] = round(group['total_ms'] / group['count'], 3)
+            group['views'] = dict(sorted(group['views'].items(), key=lambda item: -item[1]))
+
+        if options['json']:
+            self.stdout.write(json.dumps(ranked, indent=2, default=str))
+            return
+        rows = [{
+            'rank': i,
+            'total_ms': g['total_ms'],
+            'count': g['count'],
+            'mean_ms': g['mean_ms'],
+            'max_ms': g['max_ms'],
+            'views': ', '.join(g['views']),
+        } for i, g in enumerate(ranked, start=1)]
+        self.stdout.write(format_table(rows, ['rank', 'total_ms', 'count', 'mean_ms', 'max_ms', 'views']))
+        for i, group in enumerate(ranked, start=1):
+            self.stdout.write(f'\n{i}. {group["shape"]}')
+            if options['plans'] and group['slowest'].get('plan'):
+                for step in group['slowest']['plan']:
+                    self.stdout.write(f'     {step}')
+
+    def log_files(self, path):
+        """The log and its rotated backups (path.1, path.2, ...), oldest first."""
+        backups = sorted(path.parent.glob(f'{path.name}.*'),
+                         key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0, reverse=True)
+        return [p for p in [*backups, path] if p.is_file()]
+
+    def entries(self, files):
+        for file in files:
+            with file.open(encoding='utf-8') as lines:
+                for number, line in enumerate(lines, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        self.stderr.write(f'{file}:{number}: skipping unreadable line')
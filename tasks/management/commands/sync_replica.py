@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Replication stand-in for local testing: copy the default SQLite database over the '
+        'replica file, once or every --interval seconds (the interval is the replica lag).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', default='replica')
+        parser.add_argument('--interval', type=float, default=2.0)
+        parser.add_argument('--once', action='store_true')
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        replica = settings.DATABASES.get(options['alias'])
+        if replica is None:
+            raise CommandError(f"No database alias '{options['alias']}' is configured.")
+        sqlite = 'django.db.backends.sqlite3'
+        if primary['ENGINE'] != sqlite or replica['ENGINE'] != sqlite:
+            raise CommandError('sync_replica only copies SQLite files; use real replication elsewhere.')
+        if str(primary['NAME']) == str(replica['NAME']):
+            raise CommandError('The replica points at the primary file; set DJANGO_REPLICA_DB to another path.')
+
+        while True:
+            start = time.perf_counter()
+            self.copy(primary['NAME'], replica['NAME'])
+            self.stdout.write(f'Copied {primary["NAME"]} -> {replica["NAME"]} in {time.perf_counter() - start:.2f}s')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source, target):
+        # The backup API takes a consistent snapshot even while the primary is being written.
+        src, dst = sqlite3.connect(source), sqlite3.connect(target)
+        try:
+            src.backup(dst)
+        finally:
+            src.close()
+            dst.close()
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncWeek
+
+
+def populate_task_stats(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskStat = apps.get_model('tasks', 'TaskStat')
+    rows = (Task.objects
+            .annotate(week=TruncWeek('due_date'))
+            .values('assigned_to_id', 'status', 'week')
+            .annotate(admin_id=F('assigned_to__assigned_admin_id'), task_count=Count('id'), hours=Sum('worked_hours'))
+            .order_by())
+    TaskStat.objects.bulk_create([
+        TaskStat(assigned_to_id=r['assigned_to_id'], admin_id=r['admin_id'], status=r['status'], week=r['week'],
+                 task_count=r['task_count'], worked_hours=r['hours'] or 0)
+        for r in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed')], max_length=20)),
+                ('week', models.DateField()),
+                ('task_count', models.PositiveIntegerField(default=0)),
+                ('worked_hours', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('admin', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='managed_task_stats', to=settings.AUTH_USER_MODEL)),
+                ('assigned_to', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('assigned_to', 'status', 'week'), name='taskstat_unique_group')],
+            },
+        ),
+        migrations.RunPython(populate_task_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_overdue_since'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('assigned_to_id', models.BigIntegerField(blank=True, null=True)),
+                ('admin_id', models.BigIntegerField(blank=True, null=True)),
+                ('gone', models.BooleanField(default=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assigned_to_id', 'deleted_at'], name='tombstone_assignee_idx'), models.Index(fields=['admin_id', 'deleted_at'], name='tombstone_admin_idx'), models.Index(fields=['deleted_at'], name='tombstone_deleted_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+import importlib
+
+import django.utils.timezone
+from django.db import migrations, models
+
+search_index = importlib.import_module('tasks.migrations.0006_task_search_index')
+
+# Adding or removing a column rebuilds tasks_task on SQLite, which drops the
+# search index triggers; put them back afterwards.
+TRIGGERS = search_index.DROP[:3] + search_index.CREATE[1:4]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_tasktombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, search_index.run(TRIGGERS)),
+        migrations.AddField(
+            model_name='task',
+            name='changed_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunSQL('UPDATE tasks_task SET changed_at = updated_at', migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'changed_at'], name='task_assignee_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['changed_at'], name='task_changed_idx'),
+        ),
+        migrations.RunPython(search_index.run(TRIGGERS), migrations.RunPython.noop),
+    ]
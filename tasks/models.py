@@ -1,8 +1,7 @@
-
-
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 class Task(models.Model):
 	STATUS_CHOICES = [
@@ -12,7 +11,8 @@ class Task(models.Model):
 	]
 	title = models.CharField(max_length=255)
 	description = models.TextField()
-	assigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='tasks')
+	# Indexed through the composite indexes in Meta, which all lead with assigned_to.
+	assigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='tasks', db_index=False)
 	assigned_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='assigned_tasks')
 	due_date = models.DateField()
 	status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -20,6 +20,37 @@ class Task(models.Model):
 	worked_hours = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
+	# Position in the delta sync feed (tasks.sync): moves with every edit, and
+	# also when the task enters someone's view or is flagged overdue, which
+	# leave updated_at alone.
+	changed_at = models.DateTimeField(auto_now=True)
+	# Set by ``manage.py flag_overdue_tasks``, cleared once the task is completed or its due date moves on.
+	overdue_since = models.DateTimeField(null=True, blank=True)
+
+	OPEN_STATUSES = ('pending', 'in_progress')
+
+	class Meta:
+		indexes = [
+			# Per-user listings (API list view, role 'user'), ordered for keyset paging.
+			models.Index(fields=['assigned_to', 'due_date'], name='task_assignee_due_idx'),
+			models.Index(fields=['assigned_to', 'updated_at'], name='task_assignee_updated_idx'),
+			# Status-filtered lookups per user, e.g. admin task reports joined through the user.
+			models.Index(fields=['assigned_to', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+			# Superadmin views that filter on status alone (task reports).
+			models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+			# Unfiltered superadmin listings, ordered for keyset paging.
+			models.Index(fields=['due_date'], name='task_due_idx'),
+			models.Index(fields=['updated_at'], name='task_updated_idx'),
+			# The delta sync feed and the list ETag, per user and overall.
+			models.Index(fields=['assigned_to', 'changed_at'], name='task_assignee_changed_idx'),
+			models.Index(fields=['changed_at'], name='task_changed_idx'),
+			# Tasks the overdue sweeper has not flagged, so each run only reads
+			# the open tasks that became overdue since the last one. The
+			# condition has no literals: SQLite cannot match bound parameters
+			# against a partial index's WHERE clause.
+			models.Index(fields=['status', 'due_date'], name='task_unflagged_status_due_idx',
+						 condition=models.Q(overdue_since__isnull=True)),
+		]
 
 	def clean(self):
 		"""Model-level validation to ensure data integrity regardless of entry point (API, admin panel, custom views)."""
@@ -36,10 +67,168 @@ class Task(models.Model):
 			except (TypeError, ValueError):
 				raise ValidationError({'worked_hours': 'Worked hours must be a valid number.'})
 
+	# Fields whose values as loaded from the database are kept on the instance,
+	# so post_save receivers can see what a save changed (see tasks.stats).
+	TRACKED_FIELDS = ('assigned_to_id', 'status', 'due_date', 'worked_hours')
+
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		instance._remember_loaded()
+		return instance
+
+	def _remember_loaded(self):
+		if all(f in self.__dict__ for f in self.TRACKED_FIELDS):
+			self._loaded_values = {f: getattr(self, f) for f in self.TRACKED_FIELDS}
+		self._loaded_fks = {f.attname: self.__dict__[f.attname] for f in self._meta.concrete_fields
+							if f.is_relation and f.attname in self.__dict__}
+
+	# Set to True to query every foreign key in clean_fields(), known or not.
+	validate_known_fks = False
+
+	def _fk_known(self, field):
+		"""Whether ``field`` holds a row that is known to exist, so validating it needs no query.
+
+		True when the value is unchanged since the task was loaded or saved,
+		or was set from a related object loaded from the database (as forms
+		and serializers do after looking it up). The database's foreign key
+		constraint still rejects a row deleted in the meantime.
+		"""
+		if self.validate_known_fks or field.get_limit_choices_to():
+			return False
+		value = getattr(self, field.attname)
+		if value is None:
+			return False
+		if not self._state.adding and getattr(self, '_loaded_fks', {}).get(field.attname) == value:
+			return True
+		if field.is_cached(self):
+			related = field.get_cached_value(self)
+			return (related is not None and not related._state.adding
+					and getattr(related, field.target_field.attname) == value)
+		return False
+
+	def clean_fields(self, exclude=None):
+		# Skips only the existence query of known foreign keys; their value
+		# is not None, so the null and blank checks have nothing to catch.
+		exclude = set(exclude or ())
+		exclude.update(f.name for f in self._meta.concrete_fields
+					   if f.is_relation and f.name not in exclude and self._fk_known(f))
+		super().clean_fields(exclude=exclude)
+
+	def clear_stale_overdue(self):
+		"""Drop the overdue flag if the task is done or no longer past due; True if it changed."""
+		if self.overdue_since is None:
+			return False
+		if self.status == 'completed' or self.due_date >= timezone.localdate():
+			self.overdue_since = None
+			return True
+		return False
+
 	def save(self, *args, **kwargs):
 		# Ensure validation runs on every save (covers custom admin panel forms)
 		self.full_clean()
-		return super().save(*args, **kwargs)
+		self.clear_stale_overdue()
+		# One transaction for the row and whatever post_save keeps in sync with it.
+		with transaction.atomic(using=kwargs.get('using')):
+			if self.pk is not None and not hasattr(self, '_loaded_values'):
+				# Loaded without every tracked field (only()/defer()) or built by pk:
+				# read what the row holds before it is overwritten.
+				self._loaded_values = (type(self)._default_manager.using(kwargs.get('using'))
+									   .filter(pk=self.pk).values(*self.TRACKED_FIELDS).first())
+			result = super().save(*args, **kwargs)
+		self._remember_loaded()
+		return result
 
 	def __str__(self):
 		return f"{self.title} ({self.get_status_display()})"
+
+
+class ArchivedTask(models.Model):
+	"""
+	A completed task moved out of Task by ``manage.py archive_tasks``.
+
+	Keeps the task's id and columns, so reports read the same from either
+	table; ids stay unique across both because Task ids are never reused.
+	"""
+	id = models.BigIntegerField(primary_key=True)
+	title = models.CharField(max_length=255)
+	description = models.TextField()
+	assigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_tasks', db_index=False)
+	assigned_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='archived_assigned_tasks')
+	due_date = models.DateField()
+	status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES, default='completed')
+	completion_report = models.TextField(blank=True, null=True)
+	worked_hours = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+	# Copied from the task, so no auto_now here.
+	created_at = models.DateTimeField()
+	updated_at = models.DateTimeField()
+	archived_at = models.DateTimeField()
+
+	class Meta:
+		# The report listings' orderings, per assignee and overall.
+		indexes = [
+			models.Index(fields=['assigned_to', 'due_date'], name='archived_assignee_due_idx'),
+			models.Index(fields=['assigned_to', 'updated_at'], name='archived_assignee_updated_idx'),
+			models.Index(fields=['due_date'], name='archived_due_idx'),
+			models.Index(fields=['updated_at'], name='archived_updated_idx'),
+		]
+
+	@classmethod
+	def from_task(cls, task, archived_at):
+		fields = [f.attname for f in cls._meta.concrete_fields if f.name != 'archived_at']
+		return cls(archived_at=archived_at, **{name: getattr(task, name) for name in fields})
+
+	def __str__(self):
+		return f"{self.title} (Archived)"
+
+
+class TaskStat(models.Model):
+	"""
+	Running task count and worked hours per (assigned_to, admin, status, week).
+
+	Maintained by tasks.signals in the same transaction as each Task write;
+	``admin`` follows the assignee's assigned_admin and ``week`` is the
+	Monday of the task's due week. Rebuild or check it with
+	``manage.py rebuild_task_stats``.
+	"""
+	assigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='task_stats', db_index=False)
+	admin = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='managed_task_stats')
+	status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+	week = models.DateField()
+	task_count = models.PositiveIntegerField(default=0)
+	worked_hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=['assigned_to', 'status', 'week'], name='taskstat_unique_group'),
+		]
+
+	def __str__(self):
+		return f"{self.assigned_to_id} {self.status} {self.week}: {self.task_count}"
+
+
+class TaskTombstone(models.Model):
+	"""
+	A task that left someone's view, served by GET /api/tasks/changes/.
+
+	``assigned_to_id`` and ``admin_id`` say whose view it left (plain ids,
+	since the accounts may be deleted too); ``gone`` means it left every
+	view, i.e. was deleted or archived. Old tombstones are removed by
+	``manage.py compact_tombstones``.
+	"""
+	task_id = models.BigIntegerField()
+	assigned_to_id = models.BigIntegerField(null=True, blank=True)
+	admin_id = models.BigIntegerField(null=True, blank=True)
+	gone = models.BooleanField(default=True)
+	deleted_at = models.DateTimeField(default=timezone.now)
+
+	class Meta:
+		# One per sync scope (user, admin, superadmin), in cursor order.
+		indexes = [
+			models.Index(fields=['assigned_to_id', 'deleted_at'], name='tombstone_assignee_idx'),
+			models.Index(fields=['admin_id', 'deleted_at'], name='tombstone_admin_idx'),
+			models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+		]
+
+	def __str__(self):
+		return f"Task {self.task_id} removed {self.deleted_at}"
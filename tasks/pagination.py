@@ -0,0 +1,198 @@
+import base64
+import binascii
+import heapq
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a ``(sort field, id)`` tuple.
+
+    Each page is fetched with ``WHERE (field, id) > (last_field, last_id)``
+    and ``LIMIT page_size + 1``, so the cost of a page does not depend on how
+    deep the client has paged, and rows inserted while paging never shift or
+    duplicate entries of later pages. ``id`` breaks ties so the order is total.
+
+    Works with DRF requests and with plain Django requests (admin panel pages),
+    which only use ``paginate_queryset`` and the link getters, and with
+    querysets of model instances or of ``values()`` dicts.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    max_page_size = 500
+    # Allowed values for ?ordering=, a '-' prefix sorts descending.
+    orderings = ('due_date', '-due_date', 'updated_at', '-updated_at')
+    default_ordering = 'due_date'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching the page with the async ORM."""
+        return self.set_page([obj async for obj in self.get_page_queryset(queryset, request)])
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """``paginate_queryset`` over several querysets of one shape, e.g. a table and its archive.
+
+        Ids must be unique across them. Each queryset gives at most one page
+        and the pages are merged in the requested order.
+        """
+        pages = [list(self.get_page_queryset(queryset, request)) for queryset in querysets]
+        merged = heapq.merge(*pages, key=lambda obj: (self.get_value(obj, self.field), self.get_value(obj, 'id')),
+                             reverse=self.descending != self.reverse)
+        return self.set_page(list(islice(merged, self.page_size + 1)))
+
+    def get_page_queryset(self, queryset, request):
+        """The filtered, ordered queryset for the requested page, plus one look-ahead row."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        self.field = self.ordering.lstrip('-')
+        self.descending = self.ordering.startswith('-')
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor['r'])
+        # Walking backwards means running the forward query with the
+        # comparison and the ORDER BY flipped, then reversing the page.
+        descending = self.descending != self.reverse
+
+        if self.cursor is not None:
+            value = self.parse_value(queryset.model, self.cursor['v'])
+            queryset = queryset.filter(self.position_filter(value, self.cursor['id'], descending))
+
+        if descending:
+            queryset = queryset.order_by(f'-{self.field}', '-id')
+        else:
+            queryset = queryset.order_by(self.field, 'id')
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        """Trim the look-ahead row from fetched ``results`` and work out the links."""
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        if self.reverse:
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_params(self, request):
+        return getattr(request, 'query_params', request.GET)
+
+    def get_page_size(self, request):
+        default = api_settings.PAGE_SIZE or 50
+        raw = self.get_params(request).get(self.page_size_query_param)
+        if raw is None:
+            return default
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            return default
+        if size <= 0:
+            return default
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = self.get_params(request).get(self.ordering_query_param, self.default_ordering)
+        if ordering not in self.orderings:
+            return self.default_ordering
+        return ordering
+
+    def position_filter(self, value, pk, descending):
+        """Rows strictly after ``(value, pk)`` in the given direction.
+
+        Written as ``field >= value AND (field > value OR id > pk)`` rather
+        than a plain OR so SQLite can seek the (field, id) index on the
+        leading term instead of scanning it.
+        """
+        op = 'lt' if descending else 'gt'
+        bound = 'lte' if descending else 'gte'
+        return (
+            Q(**{f'{self.field}__{bound}': value})
+            & (Q(**{f'{self.field}__{op}': value}) | Q(**{f'id__{op}': pk}))
+        )
+
+    def parse_value(self, model, raw):
+        try:
+            return model._meta.get_field(self.field).to_python(raw)
+        except DjangoValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_cursor(self, request):
+        encoded = self.get_params(request).get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            cursor = {'o': data['o'], 'v': data['v'], 'id': int(data['id']), 'r': bool(data.get('r'))}
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor only makes sense for the ordering it was issued under.
+        if cursor['o'] != self.ordering:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    @staticmethod
+    def get_value(obj, name):
+        return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+    def encode_cursor(self, obj, reverse):
+        value = self.get_value(obj, self.field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        data = {'o': self.ordering, 'v': value, 'id': self.get_value(obj, 'id')}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Stepped back past an empty page; restart from the top.
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+
+class TaskTablePagination(KeysetPagination):
+    """Keyset pages for the admin panel task tables, sortable by any indexed column."""
+    max_page_size = 200
+    orderings = KeysetPagination.orderings + ('id', '-id')
+
+
+class DeadlinePagination(KeysetPagination):
+    """Keyset pages for the deadline feeds, which are always ordered by due date."""
+    orderings = ('due_date',)
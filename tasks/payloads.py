@@ -0,0 +1,192 @@
+"""
+Read-only task payloads without the serializer machinery.
+
+Listings fetch their columns with ``values()``, convert dates, datetimes
+and decimals a column at a time, and encode the page with orjson when it
+is installed (``pip install orjson``), else with the stdlib encoder. The
+result is byte for byte what ``TaskSerializer`` / ``TaskReportSerializer``
+and DRF's ``JSONRenderer`` produce; the converters are derived from the
+serializers' own fields, so the two cannot drift apart silently.
+
+``?fields=`` narrows a payload to some of its keys; ``Layout.select()``
+then fetches only the columns those keys need.
+"""
+
+import copy
+import datetime
+import decimal
+import json
+
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from .serializers import TaskReportSerializer, TaskSerializer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _datetime(field):
+    def convert(value):
+        # DRF's DateTimeField: in the current time zone, ISO 8601, 'Z' for UTC.
+        if timezone.is_aware(value):
+            value = value.astimezone(timezone.get_current_timezone())
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _date(field):
+    return datetime.date.isoformat
+
+
+def _decimal(field):
+    context = decimal.getcontext().copy()
+    context.prec = field.max_digits
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    rounding = field.rounding
+
+    def convert(value):
+        return '{:f}'.format(value.quantize(exponent, rounding=rounding, context=context))
+    return convert
+
+
+# Serializer field types whose output differs from the column value.
+CONVERTERS = (
+    (serializers.DateTimeField, _datetime),
+    (serializers.DateField, _date),
+    (serializers.DecimalField, _decimal),
+)
+
+
+class Layout:
+    """Output keys of a serializer, the ``values()`` path of each, and their converters."""
+
+    def __init__(self, serializer_class, paths=None):
+        fields = serializer_class().fields
+        for name, field in fields.items():
+            if isinstance(field, serializers.DecimalField) and (
+                    field.localize or field.normalize_output or field.decimal_places is None
+                    or not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)):
+                raise ValueError(f'{name}: only plain string decimals are supported.')
+        paths = paths or {}
+        self.keys = list(fields)
+        self.paths = [paths.get(name, name) for name in self.keys]
+        self.converters = []
+        for name, field in fields.items():
+            for field_class, factory in CONVERTERS:
+                if isinstance(field, field_class):
+                    self.converters.append((name, factory(field)))
+                    break
+        self._selections = {}
+
+    def select(self, keys):
+        """This layout narrowed to ``keys``, in this layout's order."""
+        keys = tuple(keys)
+        layout = self._selections.get(keys)
+        if layout is None:
+            layout = copy.copy(self)
+            layout.keys = [key for key in self.keys if key in keys]
+            layout.paths = [path for key, path in zip(self.keys, self.paths) if key in keys]
+            layout.converters = [(key, convert) for key, convert in self.converters if key in keys]
+            layout._selections = {}
+            self._selections[keys] = layout
+        return layout
+
+    def rows(self, queryset, *extra):
+        """``queryset`` as dicts of the columns this layout needs, plus ``extra`` ones.
+
+        ``convert()`` leaves the extra columns out of the payload.
+        """
+        return queryset.values(*dict.fromkeys([*self.paths, *extra]))
+
+    def convert(self, rows):
+        """Rows from ``rows()`` (or attribute dicts) as payloads, converted in place."""
+        for key, path in zip(self.keys, self.paths):
+            if key != path:
+                for row in rows:
+                    row[key] = row.pop(path)
+        for key, convert in self.converters:
+            for row in rows:
+                value = row[key]
+                if value is not None:
+                    row[key] = convert(value)
+        # values() returns columns in model order; the serializer has its own.
+        return [{key: row[key] for key in self.keys} for row in rows]
+
+
+TASKS = Layout(TaskSerializer)
+REPORTS = Layout(TaskReportSerializer, paths={
+    'assigned_to_id': 'assigned_to_id',
+    'assigned_to_username': 'assigned_to__username',
+    'assigned_by_id': 'assigned_by_id',
+    'assigned_by_username': 'assigned_by__username',
+})
+
+
+def _attribute(obj, path):
+    for name in path.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    return obj
+
+
+def report(task, layout=REPORTS):
+    """The report payload of a task (or archived task) loaded with its users."""
+    return layout.convert([{path: _attribute(task, path) for path in layout.paths}])[0]
+
+
+def requested_fields(request, layout, default=None):
+    """The keys named by ``?fields=a,b`` (``all`` for every key), in ``layout`` order.
+
+    Without the parameter: ``default``, or every key. Unknown names are a 400.
+    """
+    raw = request.query_params.get('fields')
+    if raw is None:
+        return list(default or layout.keys)
+    if raw.strip() == 'all':
+        return list(layout.keys)
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = names - set(layout.keys)
+    if unknown:
+        raise ValidationError({'fields': [
+            f"Unknown field(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(layout.keys)}, or all."]})
+    if not names:
+        raise ValidationError({'fields': ['Name at least one field, or all.']})
+    return [key for key in layout.keys if key in names]
+
+
+def dumps(data):
+    """``data`` as JSON bytes, exactly as DRF's JSONRenderer writes them (compact, UTF-8)."""
+    content = None
+    if orjson is not None:
+        try:
+            content = orjson.dumps(data)
+        except TypeError:
+            # E.g. an integer past 64 bits; the stdlib encoder takes anything JSON can hold.
+            pass
+    if content is None:
+        content = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+    # JSONRenderer escapes these two for JavaScript, which treats them as line ends.
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class PayloadResponse(HttpResponse):
+    """``dumps(data)`` as an application/json response; ``data`` is kept, as on DRF's Response."""
+
+    def __init__(self, data, **kwargs):
+        super().__init__(dumps(data), content_type='application/json', **kwargs)
+        self.data = data
+
+
+def accepts_plain_json(request):
+    """Whether DRF negotiated plain JSONRenderer output, which ``dumps()`` reproduces."""
+    return (type(getattr(request, 'accepted_renderer', None)) is JSONRenderer
+            and ';' not in (request.accepted_media_type or ''))
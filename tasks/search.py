@@ -0,0 +1,106 @@
+"""
+Ranked full-text search over task titles, descriptions and completion reports.
+
+On SQLite the ``tasks_task_fts`` FTS5 index (migration 0006) is joined to
+the caller's task queryset, so role scoping stays ordinary ORM filters and
+only matching rows are visited. Results are ordered by bm25 with title hits
+weighted highest. Other backends fall back to ``icontains``, unranked.
+
+Queries are reduced to plain words, all of which must match; a word ending
+in ``*`` matches as a prefix (``deplo*``).
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+FTS_TABLE = 'tasks_task_fts'
+# bm25 column weights: title, description, completion_report.
+WEIGHTS = (10.0, 1.0, 4.0)
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_TERM = re.compile(r'(\w+)(\*?)')
+
+
+def terms(query):
+    """[(word, is_prefix)] of a user query; FTS5 operators and punctuation are dropped."""
+    return [(word, bool(star)) for word, star in _TERM.findall(query or '')]
+
+
+def match_expression(query):
+    """The FTS5 MATCH string for ``query``, or '' if it holds no words."""
+    # Quoted, so words like AND/NOT/NEAR are searched for rather than parsed.
+    return ' '.join(f'"{word}"*' if prefix else f'"{word}"' for word, prefix in terms(query))
+
+
+def is_available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def search(queryset, query):
+    """``queryset`` narrowed to tasks matching ``query``, best first, with a ``rank`` attribute.
+
+    Lower ranks are better matches. Returns an empty queryset for a query
+    without words.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not is_available(queryset.db):
+        return icontains_search(queryset, query)
+    table = queryset.model._meta.db_table
+    weights = ', '.join(str(w) for w in WEIGHTS)
+    # A join the ORM cannot express: SQLite drives it from the MATCH, then
+    # looks each hit up by primary key and applies the queryset's filters.
+    return queryset.extra(
+        select={'rank': f'bm25({FTS_TABLE}, {weights})'},
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = "{table}"."id"', f'{FTS_TABLE} MATCH %s'],
+        params=[expression],
+        order_by=['rank', 'id'],
+    )
+
+
+def icontains_search(queryset, query):
+    """The fallback: every word as a substring of some column, newest first, all ranked 0."""
+    condition = Q()
+    for word, _ in terms(query):
+        condition &= (Q(title__icontains=word) | Q(description__icontains=word)
+                      | Q(completion_report__icontains=word))
+    return queryset.filter(condition).annotate(rank=Value(0.0, output_field=FloatField())).order_by('-updated_at', '-id')
+
+
+def _int_param(params, name, default):
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value >= 0 else default
+
+
+def search_page(queryset, query, params, url):
+    """One page of ``search()`` results by ?limit= / ?offset=: (results, previous_url, next_url).
+
+    Ranked results cannot be keyset-paged on an index, but SQLite ranks
+    every match before applying the LIMIT anyway, so an offset adds little.
+    """
+    limit = min(_int_param(params, 'limit', DEFAULT_LIMIT), MAX_LIMIT) or DEFAULT_LIMIT
+    offset = _int_param(params, 'offset', 0)
+    results = list(search(queryset, query)[offset:offset + limit + 1])
+    next_url = replace_query_param(url, 'offset', offset + limit) if len(results) > limit else None
+    previous_url = None
+    if offset:
+        previous_url = (replace_query_param(url, 'offset', offset - limit) if offset > limit
+                        else remove_query_param(url, 'offset'))
+    return results[:limit], previous_url, next_url
+
+
+def rebuild_index(using='default'):
+    """Re-read every task into the index, e.g. after restoring the table by other means."""
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
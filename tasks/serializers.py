@@ -3,39 +3,63 @@ from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import Task
 
 
-class TaskSerializer(serializers.ModelSerializer):
-    def __init__(self, *args, **kwargs):
+# Built once: the invalid-choice message lists the allowed values.
+STATUS_ERROR_MESSAGES = {
+    'invalid_choice': (
+        "Invalid status '{input}'. "
+        f"Allowed values: {', '.join(c[0] for c in Task.STATUS_CHOICES)}."
+    ),
+}
+
+
+def status_choice_field():
+    """Status field that lists the allowed values in its invalid-choice error."""
+    return serializers.ChoiceField(choices=Task.STATUS_CHOICES, error_messages=STATUS_ERROR_MESSAGES)
+
+
+def validate_positive_hours(value):
+    """Ensure worked_hours is positive if provided."""
+    if value is None:
+        return value
+    try:
+        val = float(value)
+        if val <= 0:
+            raise serializers.ValidationError("Worked hours must be a positive number.")
+    except (TypeError, ValueError):
+        raise serializers.ValidationError("Worked hours must be a valid number.")
+    return value
+
+
+# What task listings return unless ?fields= asks for more: the columns a
+# list view shows, without the free-text description and report.
+TASK_SUMMARY_FIELDS = ('id', 'title', 'due_date', 'status', 'updated_at', 'overdue_since', 'assigned_to')
+
+
+class SparseFieldsMixin:
+    """Accepts ``fields=[...]`` to output only those fields (in declaration order)."""
+
+    def __init__(self, *args, fields=None, **kwargs):
         super().__init__(*args, **kwargs)
-        allowed = [c[0] for c in Task.STATUS_CHOICES]
-        self.fields['status'] = serializers.ChoiceField(
-            choices=Task.STATUS_CHOICES,
-            error_messages={
-                'invalid_choice': (
-                    "Invalid status '{input}'. "
-                    f"Allowed values: {', '.join(allowed)}."
-                ),
-            }
-        )
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Task
-        fields = '__all__'
+        # changed_at only positions the task in the sync feed (tasks.sync).
+        exclude = ['changed_at']
+        # The same field as status_choice_field(), built lazily with the others
+        # instead of on every instantiation, and in the same place in the output.
+        extra_kwargs = {'status': {'required': True, 'error_messages': STATUS_ERROR_MESSAGES}}
         read_only_fields = [
-            'id', 'created_at', 'updated_at',
+            'id', 'created_at', 'updated_at', 'overdue_since',
             'assigned_to', 'title', 'description', 'due_date'
         ]
 
     def validate_worked_hours(self, value):
-        """Ensure worked_hours is positive if provided."""
-        if value is None:
-            return value
-        try:
-            val = float(value)
-            if val <= 0:
-                raise serializers.ValidationError("Worked hours must be a positive number.")
-        except (TypeError, ValueError):
-            raise serializers.ValidationError("Worked hours must be a valid number.")
-        return value
+        return validate_positive_hours(value)
 
     def validate(self, attrs):
         # Determine final values considering partial updates
@@ -90,7 +114,7 @@ class TaskSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(detail)
 
 
-class TaskReportSerializer(serializers.ModelSerializer):
+class TaskReportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     assigned_to_id = serializers.IntegerField(source='assigned_to.id', read_only=True)
     assigned_to_username = serializers.CharField(source='assigned_to.username', read_only=True)
     assigned_by_id = serializers.IntegerField(source='assigned_by.id', read_only=True, allow_null=True)
@@ -108,3 +132,19 @@ class TaskReportSerializer(serializers.ModelSerializer):
 
     def get_assigned_by_username(self, obj):
         return getattr(obj.assigned_by, 'username', None)
+
+
+class TaskBulkUpdateItemSerializer(serializers.Serializer):
+    """One entry of a bulk status update.
+
+    Only checks the shape of the item; the completion rules run against the
+    task itself (``Task.clean``) once its current values are loaded, so
+    omitted fields fall back to what is stored, as with a single PUT.
+    """
+    id = serializers.IntegerField()
+    status = status_choice_field()
+    completion_report = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    worked_hours = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, allow_null=True)
+
+    def validate_worked_hours(self, value):
+        return validate_positive_hours(value)
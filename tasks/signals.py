@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from accounts.models import User
+from . import archive, events, stats, sync
+from .models import Task
+
+# Sent by code that writes tasks with bulk_create() / bulk_update(), which
+# bypass post_save. Receivers get ``instances`` and ``created``; senders call
+# it inside the transaction that made the writes.
+tasks_bulk_saved = Signal()
+
+
+@receiver(post_save, sender=Task)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Task.save() only refreshes _loaded_values after post_save has run.
+    old_assignee = None if created else getattr(instance, '_loaded_values', {}).get('assigned_to_id')
+    stats.record_tasks([instance], created=created)
+    if old_assignee is not None and old_assignee != instance.assigned_to_id:
+        sync.record_reassigned(instance, old_assignee)
+    events.task_saved([instance], created=created, old_assignees={instance.pk: old_assignee})
+
+
+@receiver(post_delete, sender=Task)
+def update_stats_on_delete(sender, instance, **kwargs):
+    # Archived tasks keep counting; only their table changes.
+    if archive.is_archiving():
+        return
+    stats.record_tasks([instance], deleted=True)
+    sync.record_removed([instance])
+    events.task_removed([instance])
+
+
+@receiver(tasks_bulk_saved)
+def update_stats_on_bulk_save(sender, instances, created, **kwargs):
+    stats.record_tasks(instances, created=created)
+    events.task_saved(instances, created=created)
+    for instance in instances:
+        instance._remember_loaded()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def move_stats_with_admin(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if created or raw or (update_fields is not None and 'assigned_admin' not in update_fields):
+        return
+    stats.reassign_admin(instance.pk, instance.assigned_admin_id)
+    # User.save() still holds the claims it loaded until post_save has run.
+    loaded = getattr(instance, '_loaded_claims', None)
+    if loaded is not None:
+        old_admin = loaded[User.TOKEN_CLAIM_FIELDS.index('assigned_admin_id')]
+        if old_admin != instance.assigned_admin_id:
+            sync.record_admin_change(instance.pk, old_admin)
+            events.admin_changed(instance.pk, old_admin, instance.assigned_admin_id)
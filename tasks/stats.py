@@ -0,0 +1,186 @@
+"""
+Incremental maintenance of the TaskStat summary table.
+
+Every Task write turns into a few (assigned_to, status, week) deltas that
+are applied with one UPDATE per touched group, so dashboards and
+/api/stats/ read O(groups) rows instead of aggregating tasks_task.
+"""
+
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncWeek
+
+from accounts.models import User
+from .models import ArchivedTask, Task, TaskStat
+
+ZERO = Decimal('0.00')
+
+
+def week_start(day):
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def _group(values):
+    """(assigned_to_id, status, week) of a task's values, plus its hours."""
+    due = values['due_date']
+    if isinstance(due, str):
+        due = datetime.date.fromisoformat(due)
+    key = (values['assigned_to_id'], values['status'], week_start(due))
+    return key, Decimal(values['worked_hours'] or ZERO)
+
+
+def _current_values(task):
+    return {f: getattr(task, f) for f in Task.TRACKED_FIELDS}
+
+
+def add_task_deltas(deltas, task, created=False, deleted=False):
+    """Accumulate the group changes one task write causes into ``deltas``."""
+    if deleted:
+        old, new = _current_values(task), None
+    else:
+        # Task.save() reads the old values of a task it did not fully load
+        # before writing; by post_save the table already holds the new ones.
+        old = None if created else getattr(task, '_loaded_values', None)
+        new = _current_values(task)
+    if old == new:
+        return deltas
+    if old is not None:
+        key, hours = _group(old)
+        deltas[key][0] -= 1
+        deltas[key][1] -= hours
+    if new is not None:
+        key, hours = _group(new)
+        deltas[key][0] += 1
+        deltas[key][1] += hours
+    return deltas
+
+
+def new_deltas():
+    return defaultdict(lambda: [0, ZERO])
+
+
+def apply_deltas(deltas):
+    """Apply accumulated deltas: one UPDATE per group, INSERTs for new groups."""
+    missing = []
+    for key, (count, hours) in deltas.items():
+        if not count and not hours:
+            continue
+        assigned_to_id, status, week = key
+        updated = (TaskStat.objects
+                   .filter(assigned_to_id=assigned_to_id, status=status, week=week)
+                   .update(task_count=F('task_count') + count, worked_hours=F('worked_hours') + hours))
+        # Only additions can open a new group; a decrement without a row means
+        # the assignee (and with it their stats) is being deleted.
+        if not updated and count > 0:
+            missing.append((key, count, hours))
+    if missing:
+        admins = dict(User.objects
+                      .filter(pk__in={key[0] for key, _, _ in missing})
+                      .values_list('pk', 'assigned_admin_id'))
+        TaskStat.objects.bulk_create([
+            TaskStat(assigned_to_id=key[0], admin_id=admins.get(key[0]), status=key[1], week=key[2],
+                     task_count=count, worked_hours=hours)
+            for key, count, hours in missing
+        ])
+
+
+def record_tasks(tasks, created=False, deleted=False):
+    deltas = new_deltas()
+    for task in tasks:
+        add_task_deltas(deltas, task, created=created, deleted=deleted)
+    apply_deltas(deltas)
+
+
+def reassign_admin(user_id, admin_id):
+    """Move a user's groups to their new admin."""
+    TaskStat.objects.filter(assigned_to_id=user_id).exclude(admin_id=admin_id).update(admin_id=admin_id)
+
+
+def aggregate_from_tasks():
+    """The table contents computed from scratch: {(user, status, week): (admin, count, hours)}.
+
+    Archived tasks are counted along with the hot table.
+    """
+    groups = {}
+    for model in (Task, ArchivedTask):
+        rows = (model.objects
+                .annotate(week=TruncWeek('due_date'))
+                .values('assigned_to_id', 'status', 'week')
+                .annotate(admin_id=F('assigned_to__assigned_admin_id'),
+                          task_count=Count('id'),
+                          hours=Coalesce(Sum('worked_hours'), Value(ZERO)))
+                .order_by())
+        for r in rows:
+            key = (r['assigned_to_id'], r['status'], r['week'])
+            _, count, hours = groups.get(key, (None, 0, ZERO))
+            groups[key] = (r['admin_id'], count + r['task_count'], (hours + Decimal(r['hours'])).quantize(ZERO))
+    return groups
+
+
+def rebuild():
+    """Replace the table with a fresh aggregate of the tasks, archived ones included."""
+    groups = aggregate_from_tasks()
+    with transaction.atomic():
+        TaskStat.objects.all().delete()
+        TaskStat.objects.bulk_create(
+            [TaskStat(assigned_to_id=user_id, admin_id=admin_id, status=status, week=week,
+                      task_count=count, worked_hours=hours)
+             for (user_id, status, week), (admin_id, count, hours) in groups.items()],
+            batch_size=500,
+        )
+    return len(groups)
+
+
+def verify():
+    """Differences between the table and a fresh aggregate, as readable strings."""
+    expected = aggregate_from_tasks()
+    actual = {
+        (s.assigned_to_id, s.status, s.week): (s.admin_id, s.task_count, s.worked_hours.quantize(ZERO))
+        for s in TaskStat.objects.all() if s.task_count or s.worked_hours
+    }
+    problems = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        if expected.get(key) != actual.get(key):
+            problems.append(f'{key}: expected {expected.get(key)}, found {actual.get(key)}')
+    return problems
+
+
+def _empty_totals():
+    return {'tasks': 0, 'worked_hours': ZERO, 'by_status': {s: 0 for s, _ in Task.STATUS_CHOICES}}
+
+
+def _add(totals, count, hours):
+    totals['tasks'] += count
+    totals['worked_hours'] += hours
+
+
+def summarize(stats):
+    """Fold a TaskStat queryset into global, per-admin and per-user totals.
+
+    Runs one grouped query over the summary rows; nothing reads tasks_task.
+    """
+    rows = (stats
+            .values('assigned_to_id', 'assigned_to__username', 'admin_id', 'admin__username', 'status')
+            .annotate(count=Sum('task_count'), hours=Sum('worked_hours'))
+            .order_by())
+    overall = _empty_totals()
+    per_admin, per_user = {}, {}
+    for row in rows:
+        count, hours = row['count'] or 0, Decimal(row['hours'] or ZERO)
+        admin = per_admin.setdefault(row['admin_id'], {'admin_id': row['admin_id'], 'username': row['admin__username'], **_empty_totals()})
+        user = per_user.setdefault(row['assigned_to_id'], {'user_id': row['assigned_to_id'], 'username': row['assigned_to__username'], **_empty_totals()})
+        for totals in (overall, admin, user):
+            _add(totals, count, hours)
+            totals['by_status'][row['status']] += count
+    # Hours as fixed-point strings, the way the task serializers render them.
+    for totals in (overall, *per_admin.values(), *per_user.values()):
+        totals['worked_hours'] = str(totals['worked_hours'].quantize(ZERO))
+    return {
+        'global': overall,
+        'per_admin': sorted(per_admin.values(), key=lambda t: t['username'] or ''),
+        'per_user': sorted(per_user.values(), key=lambda t: t['username'] or ''),
+    }
@@ -0,0 +1,171 @@
+"""
+Incremental sync for GET /api/tasks/changes/.
+
+A sync returns the tasks in the caller's scope changed after a cursor, in
+(changed_at, id) order, and the tombstones of tasks that left
+the scope, in (deleted_at, id) order. The cursor holds one position per
+stream, so each request is two index range scans that read only changes.
+
+Changes younger than ``SYNC_SETTLE_SECONDS`` are held back until the next
+sync: a write stamps ``changed_at`` before its transaction commits, and a
+cursor must never move past a write that is not visible yet.
+
+Tombstones are written here for deletes, archiving, reassignment to another
+user and a user moving to another admin, and compacted after
+``TOMBSTONE_RETENTION_DAYS``; older cursors are refused so the client
+starts over instead of missing deletions.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from .models import Task, TaskTombstone
+from .visibility import Visibility
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class ExpiredCursor(Exception):
+    pass
+
+
+def retention():
+    return datetime.timedelta(days=getattr(settings, 'TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def _admins_of(user_ids):
+    return dict(User.objects.filter(pk__in=set(user_ids)).values_list('pk', 'assigned_admin_id'))
+
+
+def record_removed(tasks):
+    """Tombstones for tasks that were deleted or archived."""
+    if not tasks:
+        return
+    admins = _admins_of(task.assigned_to_id for task in tasks)
+    TaskTombstone.objects.bulk_create([
+        TaskTombstone(task_id=task.pk, assigned_to_id=task.assigned_to_id,
+                      admin_id=admins.get(task.assigned_to_id), gone=True)
+        for task in tasks
+    ])
+
+
+def record_reassigned(task, old_assignee_id):
+    """A tombstone for the previous assignee, and for their admin if the task left them too."""
+    admins = _admins_of([old_assignee_id, task.assigned_to_id])
+    old_admin = admins.get(old_assignee_id)
+    TaskTombstone.objects.create(
+        task_id=task.pk, assigned_to_id=old_assignee_id,
+        admin_id=old_admin if old_admin != admins.get(task.assigned_to_id) else None, gone=False)
+
+
+def record_admin_change(user_id, old_admin_id):
+    """A user moved to another admin: tombstones for the old admin, and fresh
+    ``changed_at`` values so the new admin's next sync picks the tasks up.
+
+    ``updated_at`` is left alone: the tasks themselves did not change.
+    """
+    now = timezone.now()
+    if old_admin_id is not None:
+        TaskTombstone.objects.bulk_create([
+            TaskTombstone(task_id=pk, admin_id=old_admin_id, gone=False, deleted_at=now)
+            for pk in Task.objects.filter(assigned_to_id=user_id).values_list('pk', flat=True)
+        ], batch_size=500)
+    Task.objects.filter(assigned_to_id=user_id).update(changed_at=now)
+
+
+def scoped(user):
+    """(tasks, tombstones) querysets for the caller's sync scope."""
+    visibility = Visibility(user)
+    if visibility.is_superadmin:
+        tombstones = TaskTombstone.objects.filter(gone=True)
+    elif visibility.is_admin:
+        tombstones = TaskTombstone.objects.filter(admin_id=user.id)
+    else:
+        tombstones = TaskTombstone.objects.filter(assigned_to_id=user.id)
+    return visibility.tasks(), tombstones
+
+
+def _after(field, position):
+    """Rows strictly after ``(value, pk)`` in (field, id) order; see KeysetPagination.position_filter."""
+    value, pk = position
+    return Q(**{f'{field}__gte': value}) & (Q(**{f'{field}__gt': value}) | Q(id__gt=pk))
+
+
+def decode_cursor(encoded):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        positions = {}
+        for key in ('t', 'd'):
+            value, pk = data[key]
+            moment = parse_datetime(value) if value is not None else None
+            # Cursors are always issued with an offset; a naive time cannot be compared.
+            if value is not None and (moment is None or timezone.is_naive(moment)):
+                raise ValueError(value)
+            positions[key] = (moment, int(pk))
+    except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+        raise InvalidCursor
+    return positions
+
+
+def encode_cursor(positions):
+    data = {key: [value.isoformat() if value else None, pk] for key, (value, pk) in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def changes(user, cursor=None, limit=500):
+    """One sync step: {'tasks': [Task], 'deleted': [TaskTombstone], 'cursor': str, 'has_more': bool}.
+
+    Without a cursor every task in scope is returned (over as many steps as
+    needed) and only tombstones written from now on.
+    """
+    now = timezone.now()
+    settled = now - datetime.timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 2))
+    tasks, tombstones = scoped(user)
+    if cursor is None:
+        positions = {'t': (None, 0), 'd': (settled, 0)}
+    else:
+        positions = decode_cursor(cursor)
+        if positions['d'][0] is None or positions['d'][0] < now - retention():
+            raise ExpiredCursor
+
+    tasks = tasks.filter(changed_at__lt=settled)
+    if positions['t'][0] is not None:
+        tasks = tasks.filter(_after('changed_at', positions['t']))
+    tasks = list(tasks.order_by('changed_at', 'id')[:limit + 1])
+    tombstones = list(tombstones
+                      .filter(_after('deleted_at', positions['d']), deleted_at__lt=settled)
+                      .order_by('deleted_at', 'id')[:limit + 1])
+
+    has_more = len(tasks) > limit or len(tombstones) > limit
+    tasks, tombstones = tasks[:limit], tombstones[:limit]
+    if tasks:
+        positions['t'] = (tasks[-1].changed_at, tasks[-1].pk)
+    if tombstones:
+        positions['d'] = (tombstones[-1].deleted_at, tombstones[-1].pk)
+    elif positions['d'][0] < settled:
+        # Nothing left to read: move the tombstone position up to now, so an
+        # idle client's cursor does not age past the retention window.
+        positions['d'] = (settled, 0)
+    return {'tasks': tasks, 'deleted': tombstones, 'cursor': encode_cursor(positions), 'has_more': has_more}
+
+
+def compact(before=None, batch_size=5000):
+    """Delete tombstones older than ``before`` (default: the retention window), in batches; returns the count."""
+    before = before or timezone.now() - retention()
+    total = 0
+    while True:
+        ids = list(TaskTombstone.objects.filter(deleted_at__lt=before)
+                   .order_by('deleted_at').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += TaskTombstone.objects.filter(pk__in=ids).delete()[0]
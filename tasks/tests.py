@@ -0,0 +1,1188 @@
+import asyncio
+import base64
+import datetime
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.testing import QueryBudgetMixin, QueryPlanMixin, create_sample_data
+from tasks import archive, deadlines, events, payloads, search, stats, sync
+from tasks.models import ArchivedTask, Task, TaskTombstone
+from tasks.pagination import KeysetPagination
+from tasks.serializers import TASK_SUMMARY_FIELDS, TaskReportSerializer, TaskSerializer
+from tasks.visibility import Hidden, Visibility
+
+
+class TaskApiQueryPlanTests(QueryPlanMixin, TestCase):
+    """The role-scoped API querysets must stay on the indexes in Task.Meta."""
+
+    ordering_indexes = {'due_date': 'task_due_idx', 'updated_at': 'task_updated_idx'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_task_list(self):
+        for user in (self.data.superadmin, self.data.admins[0], self.data.users[0]):
+            client = self.client_for(user)
+            for ordering in ('due_date', '-due_date', 'updated_at', '-updated_at'):
+                with self.subTest(role=user.role, ordering=ordering):
+                    url = reverse('user-tasks') + f'?ordering={ordering}&page_size=2'
+                    # The superadmin's first page walks the ordering index up to the LIMIT,
+                    # and the ETag aggregate counts every task.
+                    allowed = (self.ordering_indexes[ordering.lstrip('-')], 'task_changed_idx') \
+                        if user == self.data.superadmin else ()
+                    response = self.assertNoFullScans(client.get, url, allow_index_scan=allowed)
+                    self.assertEqual(response.status_code, 200)
+                    # Second page exercises the keyset position filter.
+                    response = self.assertNoFullScans(client.get, response.data['next'], allow_index_scan=allowed)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_index_walks_count_as_full_scans(self):
+        def walk():
+            return list(Task.objects.order_by('due_date'))
+
+        with self.assertRaisesMessage(AssertionError, 'USING INDEX task_due_idx'):
+            self.assertNoFullScans(walk)
+        self.assertNoFullScans(walk, allow_index_scan=('task_due_idx',))
+
+    def test_task_update(self):
+        user = self.data.users[0]
+        task = user.tasks.filter(status='pending').first()
+        response = self.assertNoFullScans(
+            self.client_for(user).put,
+            reverse('user-task-update', args=[task.pk]),
+            {'status': 'in_progress'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_report(self):
+        task = self.data.users[0].tasks.filter(status='completed').first()
+        for user in (self.data.superadmin, self.data.admins[0]):
+            with self.subTest(role=user.role):
+                response = self.assertNoFullScans(
+                    self.client_for(user).get, reverse('task-report', args=[task.pk])
+                )
+                self.assertEqual(response.status_code, 200)
+
+
+class TaskApiQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """API views run a fixed number of queries per request, whatever the row count."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(users_per_admin=4, tasks_per_user=6)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_task_list(self):
+        for user in (self.data.superadmin, self.data.admins[0], self.data.users[0]):
+            with self.subTest(role=user.role):
+                # The ETag aggregate plus the page itself.
+                response = self.assertQueryBudget(2, self.client_for(user).get, reverse('user-tasks'))
+                self.assertEqual(response.status_code, 200)
+
+    def test_task_report(self):
+        task = self.data.users[0].tasks.filter(status='completed').first()
+        response = self.assertQueryBudget(
+            1, self.client_for(self.data.admins[0]).get, reverse('task-report', args=[task.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class ConditionalGetTests(QueryPlanMixin, QueryBudgetMixin, TestCase):
+    """Unchanged polls get 304 from one aggregate query, without serializing."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_task_list(self):
+        url = reverse('user-tasks') + '?page_size=2'
+        for user in (self.data.superadmin, self.data.admins[0], self.data.users[0]):
+            with self.subTest(role=user.role):
+                client = self.client_for(user)
+                etag = client.get(url)['ETag']
+                response = self.assertQueryBudget(1, client.get, url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                # The superadmin's aggregate counts every task.
+                allowed = ('task_changed_idx',) if user == self.data.superadmin else ()
+                self.assertNoFullScans(client.get, url, HTTP_IF_NONE_MATCH=etag, allow_index_scan=allowed)
+                # Another page of the same scope is a different representation.
+                self.assertEqual(client.get(url + '&ordering=-due_date', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_task_list_changes(self):
+        user = self.data.users[0]
+        client = self.client_for(user)
+        url = reverse('user-tasks')
+        etag = client.get(url)['ETag']
+        task = user.tasks.filter(status='pending').first()
+        task.status = 'in_progress'
+        task.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        user.tasks.filter(status='completed').delete()
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_task_report(self):
+        task = self.data.users[0].tasks.filter(status='completed').first()
+        client = self.client_for(self.data.admins[0])
+        url = reverse('task-report', args=[task.pk])
+        etag = client.get(url)['ETag']
+        response = self.assertQueryBudget(1, client.get, url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Permission checks still run before the validator is compared.
+        other = self.client_for(self.data.admins[1])
+        self.assertEqual(other.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 403)
+        self.data.users[0].username = 'renamed'
+        self.data.users[0].save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['assigned_to_username'], 'renamed')
+
+
+class AsyncApiTests(TestCase):
+    """The ported views behave the same when served through the ASGI handler."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from tasks.views import CustomTokenObtainPairSerializer
+
+        cls.data = create_sample_data()
+        cls.headers = {
+            user.username: {'authorization': f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}'}
+            for user in (cls.data.admins[0], cls.data.users[0], cls.data.users[2])
+        }
+
+    async def test_list_update_and_report(self):
+        user, admin = self.data.users[0], self.data.admins[0]
+        response = await self.async_client.get(reverse('user-tasks'), headers=self.headers[user.username])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual({t['assigned_to'] for t in results}, {user.pk})
+
+        task = next(t for t in results if t['status'] == 'pending')
+        url = reverse('user-task-update', args=[task['id']])
+        response = await self.async_client.put(url, {'status': 'in_progress'}, content_type='application/json',
+                                               headers=self.headers[user.username])
+        self.assertEqual(response.json()['status'], 'in_progress')
+        self.assertEqual(list(response.json()), [
+            'id', 'title', 'description', 'due_date', 'status', 'completion_report', 'worked_hours',
+            'created_at', 'updated_at', 'overdue_since', 'assigned_to', 'assigned_by'])
+        # Related fields are looked up while validating, off the event loop.
+        response = await self.async_client.put(url, {'status': 'pending', 'assigned_by': admin.pk},
+                                               content_type='application/json', headers=self.headers[user.username])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['assigned_by'], admin.pk)
+        response = await self.async_client.put(url, {'status': 'pending', 'assigned_by': 0},
+                                               content_type='application/json', headers=self.headers[user.username])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('assigned_by', response.json())
+        # Another user's task is not found, and an anonymous request is rejected.
+        other = await self.async_client.put(url, {'status': 'pending'}, content_type='application/json',
+                                            headers=self.headers['user1_0'])
+        self.assertEqual(other.status_code, 404)
+        self.assertEqual((await self.async_client.get(reverse('user-tasks'))).status_code, 401)
+
+        completed = next(t for t in results if t['status'] == 'completed')
+        url = reverse('task-report', args=[completed['id']])
+        response = await self.async_client.get(url, headers=self.headers[admin.username])
+        self.assertEqual(response.json()['assigned_to_username'], user.username)
+        response = await self.async_client.get(url, headers=self.headers[user.username])
+        self.assertEqual(response.status_code, 403)
+
+
+class GenerateDatasetTests(TestCase):
+    def test_shape_and_mix(self):
+        from core.datagen import generate_dataset, parse_status_mix
+
+        data = generate_dataset(admins=2, users_per_admin=3, tasks_per_user=20, batch_size=25,
+                                status_mix=parse_status_mix('pending=1,completed=1'), report_size=40)
+        self.assertEqual(data.tasks, 120)
+        self.assertEqual(Task.objects.count(), 120)
+        self.assertEqual(data.users[0].username, 'user0_0')
+        self.assertFalse(Task.objects.filter(status='in_progress').exists())
+        for task in Task.objects.filter(status='completed'):
+            task.full_clean()
+            self.assertEqual(task.assigned_by_id, task.assigned_to.assigned_admin_id)
+        self.assertEqual(stats.verify(), [])
+        with self.assertRaises(ValueError):
+            parse_status_mix('done=1')
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def setUp(self):
+        from core.metrics import registry
+
+        registry.reset()
+        self.client = APIClient()
+
+    def scrape(self):
+        self.client.force_authenticate(self.data.superadmin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_records_per_view(self):
+        self.client.force_authenticate(self.data.users[0])
+        for _ in range(2):
+            self.client.get(reverse('user-tasks'))
+        self.client.force_authenticate(None)
+        self.client.force_login(self.data.admins[0])
+        export = self.client.get(reverse('adminpanel:export_task_reports') + '?format=csv')
+        body = b''.join(export.streaming_content)
+
+        text = self.scrape()
+        self.assertIn('app_http_requests_total{view="user-tasks"} 2', text)
+        # The ETag aggregate and the page, for each of the two requests.
+        self.assertIn('app_db_queries_total{view="user-tasks"} 4', text)
+        self.assertIn('app_http_request_duration_seconds_count{view="user-tasks"} 2', text)
+        self.assertIn('app_http_request_duration_seconds_bucket{view="user-tasks",le="+Inf"} 2', text)
+        # Streamed bodies are counted once drained.
+        self.assertIn(f'app_http_response_bytes_total{{view="adminpanel:export_task_reports"}} {len(body)}', text)
+
+    async def test_records_queries_under_asgi(self):
+        from core.metrics import registry
+        from tasks.views import CustomTokenObtainPairSerializer
+
+        token = CustomTokenObtainPairSerializer.get_token(self.data.users[0]).access_token
+        response = await self.async_client.get(reverse('user-tasks'), headers={'authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        # The ORM runs in a sync_to_async worker thread, on that thread's connection.
+        series = registry.snapshot()['user-tasks']
+        self.assertGreater(series.queries, 0)
+        self.assertGreater(series.query_seconds, 0)
+
+    def test_superadmin_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.client.force_authenticate(self.data.admins[0])
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        self.client.force_authenticate(self.data.users[0])
+        self.client.get(reverse('user-tasks'))
+        self.assertNotIn('view="user-tasks"', self.scrape())
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def test_log_and_report(self):
+        import io
+        import json
+        import tempfile
+        from pathlib import Path
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'slow.jsonl'
+            with override_settings(SLOW_QUERY_LOG=str(path), SLOW_QUERY_THRESHOLD_MS=0):
+                client = Client()
+                client.force_login(self.data.admins[0])
+                for _ in range(2):
+                    self.assertEqual(client.get(reverse('adminpanel:manage_tasks')).status_code, 200)
+            entries = [json.loads(line) for line in path.read_text().splitlines()]
+            page = [e for e in entries if e['view'] == 'adminpanel:manage_tasks' and 'tasks_task' in e['sql']]
+            self.assertTrue(page)
+            self.assertTrue(all(e['plan'] for e in page))
+            self.assertIn(self.data.admins[0].pk, page[0]['params'])
+
+            out = io.StringIO()
+            call_command('slow_query_report', log=str(path), plans=True, stdout=out)
+            report = out.getvalue()
+            self.assertIn('adminpanel:manage_tasks', report)
+            self.assertIn('SEARCH', report)
+
+    async def test_log_under_asgi(self):
+        from tasks.views import CustomTokenObtainPairSerializer
+
+        token = CustomTokenObtainPairSerializer.get_token(self.data.users[0]).access_token
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'slow.jsonl'
+            with override_settings(SLOW_QUERY_LOG=str(path), SLOW_QUERY_THRESHOLD_MS=0):
+                # The middleware chain is built per client, after the override.
+                client = AsyncClient()
+                response = await client.get(reverse('user-tasks'), headers={'authorization': f'Bearer {token}'})
+                self.assertEqual(response.status_code, 200)
+                await client.aforce_login(self.data.admins[0])
+                self.assertEqual((await client.get(reverse('adminpanel:manage_tasks'))).status_code, 200)
+            views = {json.loads(line)['view'] for line in path.read_text().splitlines()}
+            self.assertIn('user-tasks', views)
+            self.assertIn('adminpanel:manage_tasks', views)
+
+    def test_normalize(self):
+        from core.slowlog import normalize
+
+        self.assertEqual(
+            normalize('SELECT * FROM "t" WHERE "a" IN (%s, %s,%s) AND b = \'x\'  LIMIT 51'),
+            'SELECT * FROM "t" WHERE "a" IN (...) AND b = ? LIMIT ?',
+        )
+
+
+@override_settings(READ_DATABASE='replica')
+class ReplicaRoutingTests(TransactionTestCase):
+    """Listings read from the replica alias; writers are pinned to the primary for a while.
+
+    In tests the replica is a second connection to the test database, so
+    data has to be committed for it to be visible, hence TransactionTestCase.
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.data = create_sample_data()
+
+    def queries_by_alias(self, func, *args, **kwargs):
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = func(*args, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_api_read_after_write(self):
+        user = self.data.users[0]
+        client = APIClient()
+        client.force_authenticate(user)
+        response, primary, replica = self.queries_by_alias(client.get, reverse('user-tasks'))
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual((primary, replica), (0, 2))
+
+        task = user.tasks.filter(status='pending').first()
+        response, primary, replica = self.queries_by_alias(
+            client.put, reverse('user-task-update', args=[task.pk]), {'status': 'in_progress'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(replica, 0)
+
+        # The writer now reads from the primary; everyone else stays on the replica.
+        response, primary, replica = self.queries_by_alias(client.get, reverse('user-tasks'))
+        self.assertEqual((primary, replica), (2, 0))
+        other = APIClient()
+        other.force_authenticate(self.data.users[1])
+        _, primary, replica = self.queries_by_alias(other.get, reverse('user-tasks'))
+        self.assertEqual((primary, replica), (0, 2))
+
+    def test_admin_panel_listing(self):
+        client = Client()
+        client.force_login(self.data.admins[0])
+        response, primary, replica = self.queries_by_alias(client.get, reverse('adminpanel:manage_tasks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['page'])
+        self.assertTrue(replica)
+
+    @override_settings(READ_DATABASE='default')
+    def test_disabled(self):
+        client = APIClient()
+        client.force_authenticate(self.data.users[0])
+        _, primary, replica = self.queries_by_alias(client.get, reverse('user-tasks'))
+        self.assertEqual((primary, replica), (2, 0))
+
+
+class TaskBulkUpdateTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(tasks_per_user=6)
+
+    def setUp(self):
+        self.user = self.data.users[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_mixed_batch(self):
+        own = list(self.user.tasks.exclude(status='completed').order_by('id'))
+        other = self.data.users[1].tasks.first()
+        payload = [
+            {'id': own[0].pk, 'status': 'completed', 'completion_report': 'Shipped.', 'worked_hours': '2.50'},
+            {'id': own[1].pk, 'status': 'completed'},
+            {'id': other.pk, 'status': 'in_progress'},
+            {'id': own[0].pk, 'status': 'pending'},
+            {'id': own[2].pk, 'status': 'archived'},
+        ]
+        response = self.client.put(reverse('user-task-bulk-update'), payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([r['updated'] for r in results], [True, False, False, False, False])
+        self.assertIn('completion_report', results[1]['errors'])
+        self.assertEqual(results[2]['errors'], {'id': ['Not found.']})
+        self.assertIn('Duplicate', results[3]['errors']['id'][0])
+        self.assertIn('status', results[4]['errors'])
+
+        own[0].refresh_from_db()
+        self.assertEqual(own[0].status, 'completed')
+        self.assertEqual(str(own[0].worked_hours), '2.50')
+        self.assertGreater(own[0].updated_at, own[1].updated_at)
+        other.refresh_from_db()
+        self.assertNotEqual(other.status, 'in_progress')
+
+    def test_query_count_does_not_grow_with_batch(self):
+        tasks = list(self.user.tasks.all())
+        payload = [{'id': t.pk, 'status': 'in_progress'} for t in tasks]
+        # Fetch owned rows, then one UPDATE; under TestCase the atomic block
+        # adds a SAVEPOINT / RELEASE pair. TaskStat adds one UPDATE per
+        # (status, week) group touched (5 here) plus the admin lookup and
+        # INSERT for the one group that did not exist yet.
+        response = self.assertQueryBudget(
+            11, self.client.put, reverse('user-task-bulk-update'), payload, format='json'
+        )
+        self.assertTrue(all(r['updated'] for r in response.data['results']))
+
+    def test_rejects_non_list(self):
+        response = self.client.put(reverse('user-task-bulk-update'), {'id': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskStatsTests(TestCase):
+    """TaskStat follows every kind of task write and serves /api/stats/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(tasks_per_user=4)
+
+    def assertStatsMatch(self):
+        self.assertEqual(stats.verify(), [])
+
+    def test_single_writes(self):
+        self.assertStatsMatch()
+        task = Task.objects.filter(status='pending').first()
+        task.status = 'completed'
+        task.completion_report = 'Done.'
+        task.worked_hours = '3.25'
+        task.due_date = '2025-06-30'
+        task.save()
+        self.assertStatsMatch()
+        task.assigned_to = self.data.users[-1]
+        task.save()
+        self.assertStatsMatch()
+        Task.objects.filter(assigned_to=self.data.users[0]).delete()
+        self.assertStatsMatch()
+
+    def test_partially_loaded_writes(self):
+        # Neither instance holds the tracked fields, so the old values come from the row before it is written.
+        task = Task.objects.only('id').get(pk=Task.objects.filter(status='pending').first().pk)
+        task.status = 'in_progress'
+        task.save()
+        self.assertStatsMatch()
+        self.assertEqual(Task.objects.get(pk=task.pk).status, 'in_progress')
+        task = Task.objects.defer('status', 'due_date').get(pk=task.pk)
+        task.due_date = datetime.date(2025, 9, 1)
+        task.save()
+        self.assertStatsMatch()
+
+    def test_bulk_writes_and_reassignment(self):
+        user = self.data.users[0]
+        client = APIClient()
+        client.force_authenticate(user)
+        payload = [{'id': t.pk, 'status': 'in_progress'} for t in user.tasks.all()]
+        client.put(reverse('user-task-bulk-update'), payload, format='json')
+        self.assertStatsMatch()
+        user.assigned_admin = self.data.admins[1]
+        user.save()
+        self.assertStatsMatch()
+        self.data.users[1].delete()
+        self.assertStatsMatch()
+
+    def test_api_is_scoped(self):
+        admin = self.data.admins[0]
+        client = APIClient()
+        client.force_authenticate(admin)
+        data = client.get(reverse('task-stats')).data
+        managed = Task.objects.filter(assigned_to__assigned_admin=admin)
+        self.assertEqual(data['global']['tasks'], managed.count())
+        self.assertEqual(data['global']['by_status']['completed'], managed.filter(status='completed').count())
+        self.assertEqual([a['admin_id'] for a in data['per_admin']], [admin.pk])
+
+        client.force_authenticate(self.data.superadmin)
+        data = client.get(reverse('task-stats') + '?from=2025-01-06').data
+        self.assertEqual(data['global']['tasks'], Task.objects.filter(due_date__gte='2025-01-06').count())
+
+
+class ArchiveTests(QueryPlanMixin, TestCase):
+    """Old completed tasks move to the archive in batches and stay readable as reports."""
+
+    cutoff = datetime.date(2025, 1, 5)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data(tasks_per_user=6)
+        Task.objects.update(updated_at=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+        # Completed long ago but edited after the cutoff: stays hot.
+        cls.recent = Task.objects.filter(status='completed', due_date__lt=cls.cutoff).first()
+        cls.recent.save()
+
+    def test_moves_old_completed_tasks_in_batches(self):
+        expected = set(archive.archivable(self.cutoff).values_list('id', flat=True))
+        self.assertEqual(len(expected), len(self.data.users) - 1)
+        out = StringIO()
+        call_command('archive_tasks', before='2025-01-05', dry_run=True, stdout=out)
+        self.assertIn(f'{len(expected)} task(s)', out.getvalue())
+
+        self.assertEqual(archive.archive_completed(self.cutoff, batch_size=2), len(expected))
+        self.assertEqual(set(ArchivedTask.objects.values_list('id', flat=True)), expected)
+        self.assertFalse(Task.objects.filter(pk__in=expected).exists())
+        self.assertTrue(Task.objects.filter(pk=self.recent.pk).exists())
+        # Sync clients see archived tasks as deleted.
+        self.assertEqual(set(TaskTombstone.objects.values_list('task_id', flat=True)), expected)
+        # Archived tasks keep counting in the summary table.
+        self.assertEqual(stats.verify(), [])
+        self.assertEqual(archive.archive_completed(self.cutoff), 0)
+
+    def test_reports_fall_back_to_the_archive(self):
+        archive.archive_completed(self.cutoff)
+        archived = ArchivedTask.objects.filter(assigned_to__assigned_admin=self.data.admins[0]).first()
+        client = APIClient()
+        client.force_authenticate(self.data.admins[0])
+        response = self.assertNoFullScans(client.get, reverse('task-report', args=[archived.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['completion_report'], archived.completion_report)
+        client.force_authenticate(self.data.admins[1])
+        self.assertEqual(client.get(reverse('task-report', args=[archived.pk])).status_code, 403)
+
+        # The task list only reads the hot table.
+        client.force_authenticate(archived.assigned_to)
+        ids = [t['id'] for t in client.get(reverse('user-tasks')).data['results']]
+        self.assertNotIn(archived.pk, ids)
+        self.assertEqual(len(ids), Task.objects.filter(assigned_to=archived.assigned_to).count())
+
+
+class TaskSearchTests(QueryPlanMixin, TestCase):
+    """/api/tasks/search/ ranks FTS5 matches, follows every write and keeps the Manage Tasks scoping."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+        mine, other = cls.data.users[0].tasks.all(), cls.data.users[-1].tasks.all()
+        Task.objects.filter(pk=mine[0].pk).update(title='Quarterly budget review')
+        Task.objects.filter(pk=mine[1].pk).update(description='Check the budget numbers twice.')
+        Task.objects.filter(pk=other[0].pk).update(title='Budget sign-off')
+        cls.title_hit, cls.text_hit, cls.other_hit = mine[0], mine[1], other[0]
+
+    def ids(self, user, query):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = self.assertNoFullScans(client.get, reverse('task-search'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [t['id'] for t in response.data['results']]
+
+    def test_ranked_and_scoped(self):
+        self.assertEqual(self.ids(self.data.admins[0], 'budget'), [self.title_hit.pk, self.text_hit.pk])
+        self.assertEqual(set(self.ids(self.data.superadmin, 'BUDGET')),
+                         {self.title_hit.pk, self.text_hit.pk, self.other_hit.pk})
+        self.assertEqual(self.ids(self.data.admins[0], 'budg*'), [self.title_hit.pk, self.text_hit.pk])
+        self.assertEqual(self.ids(self.data.admins[0], 'budg'), [])
+        # Operators are searched for as words, not parsed.
+        self.assertEqual(self.ids(self.data.admins[0], 'budget NOT review'), [])
+
+        client = APIClient()
+        client.force_authenticate(self.data.users[0])
+        self.assertEqual(client.get(reverse('task-search'), {'q': 'budget'}).status_code, 403)
+        client.force_authenticate(self.data.admins[0])
+        self.assertEqual(client.get(reverse('task-search'), {'q': ' ?! '}).status_code, 400)
+        page = client.get(reverse('task-search'), {'q': 'budget', 'limit': 1}).data
+        self.assertEqual([t['id'] for t in page['results']], [self.title_hit.pk])
+        self.assertEqual([t['id'] for t in client.get(page['next']).data['results']], [self.text_hit.pk])
+
+    def test_index_follows_writes(self):
+        task = Task.objects.get(pk=self.title_hit.pk)
+        task.title = 'Annual audit'
+        task.save()
+        self.assertEqual(self.ids(self.data.superadmin, 'quarterly'), [])
+        self.assertEqual(self.ids(self.data.superadmin, 'audit'), [task.pk])
+        Task.objects.filter(pk=task.pk).update(completion_report='Vendor contract signed.')
+        self.assertEqual(self.ids(self.data.superadmin, 'vendor contract'), [task.pk])
+        task.delete()
+        self.assertEqual(self.ids(self.data.superadmin, 'audit'), [])
+        search.rebuild_index()
+        self.assertEqual(len(self.ids(self.data.superadmin, 'budget')), 2)
+
+
+class DeadlineFeedTests(QueryPlanMixin, TestCase):
+    """The upcoming/overdue feeds stay on indexes; the sweeper flags each overdue task once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+        user = cls.data.users[0]
+        today = timezone.localdate()
+        cls.future = {}
+        for days, status in ((10, 'pending'), (3, 'in_progress'), (1, 'pending'), (2, 'completed')):
+            cls.future[days] = Task.objects.create(
+                title=f'Due in {days}', description='Later', assigned_to=user, assigned_by=user.assigned_admin,
+                due_date=today + datetime.timedelta(days=days), status=status,
+                completion_report='Done.' if status == 'completed' else None,
+                worked_hours='1.00' if status == 'completed' else None)
+
+    def ids(self, user, name, query=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = self.assertNoFullScans(client.get, reverse(name), query)
+        self.assertEqual(response.status_code, 200)
+        return [t['id'] for t in response.data['results']]
+
+    def test_feeds(self):
+        user, admin = self.data.users[0], self.data.admins[0]
+        self.assertEqual(self.ids(user, 'user-tasks-upcoming'), [self.future[1].pk, self.future[3].pk])
+        self.assertEqual(self.ids(user, 'user-tasks-upcoming', {'days': 30}),
+                         [self.future[1].pk, self.future[3].pk, self.future[10].pk])
+        self.assertEqual(self.ids(admin, 'user-tasks-upcoming'), [self.future[1].pk, self.future[3].pk])
+        self.assertEqual(self.ids(self.data.admins[1], 'user-tasks-upcoming'), [])
+
+        expected = (Task.objects.filter(assigned_to__assigned_admin=admin, status__in=Task.OPEN_STATUSES,
+                                        due_date__lt=timezone.localdate())
+                    .order_by('due_date', 'id').values_list('id', flat=True))
+        self.assertEqual(self.ids(admin, 'user-tasks-overdue'), list(expected))
+        self.assertEqual(len(self.ids(self.data.superadmin, 'user-tasks-overdue')),
+                         len(self.data.users) * 2)
+
+    def test_sweeper_flags_in_batches(self):
+        overdue = deadlines.overdue(Task.objects.all())
+        count = overdue.count()
+        flagged = self.assertNoFullScans(deadlines.flag_overdue, batch_size=3)
+        self.assertEqual(flagged, count)
+        self.assertFalse(overdue.filter(overdue_since__isnull=True).exists())
+        self.assertEqual(deadlines.flag_overdue(), 0)
+
+        # Completing a task through the API clears its flag.
+        task = overdue.filter(assigned_to=self.data.users[0]).first()
+        client = APIClient()
+        client.force_authenticate(self.data.users[0])
+        response = client.put(reverse('user-task-update', args=[task.pk]),
+                              {'status': 'completed', 'completion_report': 'Late.', 'worked_hours': '2.00'},
+                              format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['overdue_since'])
+        out = StringIO()
+        call_command('flag_overdue_tasks', stdout=out)
+        self.assertIn('Flagged 0', out.getvalue())
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class TaskSyncTests(QueryPlanMixin, TestCase):
+    """/api/tasks/changes/ returns only what changed since the cursor, deletions included."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def sync(self, user, cursor=None, limit=None):
+        """Follow the feed until has_more is false: (task ids, deleted ids, cursor)."""
+        client = APIClient()
+        client.force_authenticate(user)
+        tasks, deleted = [], []
+        while True:
+            params = {k: v for k, v in (('since', cursor), ('limit', limit)) if v}
+            response = self.assertNoFullScans(client.get, reverse('task-changes'), params)
+            self.assertEqual(response.status_code, 200)
+            tasks += [t['id'] for t in response.data['tasks']]
+            deleted += [t['id'] for t in response.data['deleted']]
+            cursor = response.data['cursor']
+            if not response.data['has_more']:
+                return tasks, deleted, cursor
+
+    def test_changes_and_tombstones(self):
+        admin, user = self.data.admins[0], self.data.users[0]
+        scope = set(Task.objects.filter(assigned_to__assigned_admin=admin).values_list('id', flat=True))
+        tasks, deleted, admin_cursor = self.sync(admin, limit=2)
+        self.assertEqual((sorted(tasks), deleted), (sorted(scope), []))
+        _, _, user_cursor = self.sync(user)
+        _, _, root_cursor = self.sync(self.data.superadmin)
+        self.assertEqual(self.sync(admin, admin_cursor)[:2], ([], []))
+
+        edited, removed = user.tasks.all()[:2]
+        edited.title = 'Renamed'
+        edited.save()
+        removed_id = removed.pk
+        removed.delete()
+        gone_with_user = list(self.data.users[1].tasks.values_list('id', flat=True))
+        self.data.users[1].delete()
+        tasks, deleted, admin_cursor = self.sync(admin, admin_cursor, limit=1)
+        self.assertEqual(tasks, [edited.pk])
+        self.assertEqual(sorted(deleted), sorted([removed_id, *gone_with_user]))
+        tasks, deleted, user_cursor = self.sync(user, user_cursor)
+        self.assertEqual((tasks, deleted), ([edited.pk], [removed_id]))
+        self.assertEqual(sorted(self.sync(self.data.superadmin, root_cursor)[1]),
+                         sorted([removed_id, *gone_with_user]))
+
+        # Reassigned to another admin's user: gone for the old assignee and admin only.
+        edited.assigned_to = self.data.users[2]
+        edited.save()
+        _, deleted, user_cursor = self.sync(user, user_cursor)
+        self.assertEqual(deleted, [edited.pk])
+        self.assertEqual(self.sync(admin, admin_cursor)[1], [edited.pk])
+
+        # The user moves to the other admin: their tasks leave this admin's view.
+        _, _, new_admin_cursor = self.sync(self.data.admins[1])
+        edited_at = dict(user.tasks.values_list('id', 'updated_at'))
+        user.assigned_admin = self.data.admins[1]
+        user.save()
+        moved = sorted(user.tasks.values_list('id', flat=True))
+        self.assertEqual(sorted(self.sync(admin, admin_cursor)[1]), sorted([edited.pk, *moved]))
+        tasks, _, _ = self.sync(self.data.admins[1], new_admin_cursor)
+        self.assertEqual(sorted(tasks), moved)
+        # The tasks themselves did not change.
+        self.assertEqual(dict(user.tasks.values_list('id', 'updated_at')), edited_at)
+
+    def test_overdue_flags(self):
+        user = self.data.users[0]
+        _, _, cursor = self.sync(user)
+        edited_at = dict(user.tasks.values_list('id', 'updated_at'))
+        self.assertTrue(deadlines.flag_overdue())
+        flagged = sorted(user.tasks.filter(overdue_since__isnull=False).values_list('id', flat=True))
+        self.assertTrue(flagged)
+        self.assertEqual(sorted(self.sync(user, cursor)[0]), flagged)
+        self.assertEqual(dict(user.tasks.values_list('id', 'updated_at')), edited_at)
+
+    def test_cursor_errors_and_compaction(self):
+        client = APIClient()
+        client.force_authenticate(self.data.users[0])
+        response = client.get(reverse('task-changes'), {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        naive = base64.urlsafe_b64encode(json.dumps(
+            {'t': [None, 0], 'd': ['2030-01-01T00:00:00', 0]}).encode('utf-8')).decode('ascii')
+        self.assertEqual(client.get(reverse('task-changes'), {'since': naive}).status_code, 400)
+
+        old = timezone.now() - sync.retention() - datetime.timedelta(days=1)
+        stale = sync.encode_cursor({'t': (old, 0), 'd': (old, 0)})
+        self.assertEqual(client.get(reverse('task-changes'), {'since': stale}).status_code, 410)
+
+        TaskTombstone.objects.bulk_create([TaskTombstone(task_id=1, deleted_at=old), TaskTombstone(task_id=2)])
+        out = StringIO()
+        call_command('compact_tombstones', batch_size=1, stdout=out)
+        self.assertIn('Removed 1 tombstone(s).', out.getvalue())
+        self.assertEqual(list(TaskTombstone.objects.values_list('task_id', flat=True)), [2])
+
+
+class TaskEventTests(TestCase):
+    """Task writes reach the open event streams in scope, after commit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def write(self, change):
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+
+    async def next_event(self, subscription):
+        event = await subscription.get(timeout=2)
+        self.assertIsNotNone(event)
+        return event['type'], event['task']['id']
+
+    async def test_stream(self):
+        own, other = self.data.users[0], self.data.users[2]
+        own_task = await own.tasks.afirst()
+        own_id = own_task.pk
+        client = AsyncClient()
+        await client.aforce_login(own)
+        response = await client.get(reverse('task-events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(content), b'retry: 3000\n\n')
+
+            def change():
+                for task in (own_task, *Task.objects.filter(assigned_to=other)[:1]):
+                    task.status = 'in_progress'
+                    task.save()
+                own_task.delete()
+            await sync_to_async(self.write)(change)
+            updated = (await asyncio.wait_for(anext(content), 2)).decode()
+            self.assertTrue(updated.startswith('event: updated\ndata: {"id":%d,' % own_id))
+            # The other user's task is not in this stream.
+            deleted = (await asyncio.wait_for(anext(content), 2)).decode()
+            self.assertEqual(deleted, 'event: deleted\ndata: {"id":%d}\n\n' % own_id)
+        finally:
+            await content.aclose()
+
+    async def test_wsgi_gets_no_stream(self):
+        # A WSGI worker would buffer the endless stream and never respond.
+        client = Client()
+        await sync_to_async(client.force_login)(self.data.admins[0])
+        response = await sync_to_async(client.get)(reverse('task-events'))
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+        page = await sync_to_async(client.get)(reverse('adminpanel:manage_tasks'))
+        self.assertNotContains(page, 'EventSource')
+        async_client = AsyncClient()
+        await async_client.aforce_login(self.data.admins[0])
+        self.assertContains(await async_client.get(reverse('adminpanel:manage_tasks')), 'EventSource')
+
+    async def test_scopes_on_reassignment_and_admin_change(self):
+        broker = events.get_broker()
+        streams = {name: broker.subscribe(user) for name, user in (
+            ('root', self.data.superadmin), ('admin0', self.data.admins[0]),
+            ('admin1', self.data.admins[1]), ('user0', self.data.users[0]))}
+        try:
+            task = await self.data.users[0].tasks.afirst()
+
+            def reassign():
+                task.assigned_to = self.data.users[2]
+                task.save()
+            await sync_to_async(self.write)(reassign)
+            self.assertEqual(await self.next_event(streams['root']), ('updated', task.pk))
+            self.assertEqual(await self.next_event(streams['admin1']), ('updated', task.pk))
+            self.assertEqual(await self.next_event(streams['admin0']), ('deleted', task.pk))
+            self.assertEqual(await self.next_event(streams['user0']), ('deleted', task.pk))
+
+            def move():
+                user = self.data.users[2]
+                user.assigned_admin = self.data.admins[0]
+                user.save()
+            await sync_to_async(self.write)(move)
+            moved = [pk async for pk in Task.objects.filter(assigned_to=self.data.users[2]).values_list('pk', flat=True)]
+            self.assertEqual({(await self.next_event(streams['admin1']))[1] for _ in moved}, set(moved))
+            self.assertEqual({(await self.next_event(streams['admin0']))[1] for _ in moved}, set(moved))
+            self.assertTrue(streams['root'].queue.empty())
+        finally:
+            for subscription in streams.values():
+                broker.unsubscribe(subscription)
+
+    async def test_slow_stream_is_reset(self):
+        subscription = events.Subscription(self.data.users[0], asyncio.get_running_loop(), maxsize=2)
+        for pk in range(3):
+            subscription.deliver(events._event('updated', pk, None, self.data.users[0].pk, None))
+        self.assertIs(await subscription.get(timeout=1), events.RESET)
+        self.assertIsNone(await subscription.get(timeout=0.01))
+
+    async def test_file_backend_shares_events_between_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'events.jsonl'
+            reader = events.Broker(events.FileBackend, path=path)
+            writer = events.Broker(events.FileBackend, path=path)
+            subscription = reader.subscribe(self.data.admins[0])
+            try:
+                admin_id = self.data.admins[0].pk
+                writer.publish([events._event('deleted', 1, None, None, admin_id),
+                                events._event('deleted', 2, None, None, admin_id + 1)])
+                writer.publish([events._event('created', 3, {'id': 3, 'title': 'T'}, None, admin_id)])
+                self.assertEqual(await self.next_event(subscription), ('deleted', 1))
+                self.assertEqual(await self.next_event(subscription), ('created', 3))
+                # Truncated by log rotation: reading starts over.
+                path.write_text('')
+                writer.publish([events._event('deleted', 4, None, None, admin_id)])
+                self.assertEqual(await self.next_event(subscription), ('deleted', 4))
+            finally:
+                reader.backend.stop()
+
+
+class VisibilityTests(QueryPlanMixin, TestCase):
+    """One scope rule per role, checked in one indexed query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+        cls.mine, cls.theirs = (admin.assigned_users.first().tasks.first() for admin in cls.data.admins)
+
+    def test_scopes(self):
+        admin, user = self.data.admins[0], self.data.users[0]
+        for who, expected in ((self.data.superadmin, Task.objects.all()),
+                              (admin, Task.objects.filter(assigned_to__assigned_admin=admin)),
+                              (user, Task.objects.filter(assigned_to=user))):
+            with self.subTest(who.username):
+                self.assertEqual(set(Visibility(who).tasks()), set(expected))
+        for who in (admin, user):
+            self.assertNoFullScans(list, Visibility(who).tasks().order_by('due_date')[:10])
+        self.assertEqual(set(Visibility(admin).managed_users()), set(admin.assigned_users.all()))
+
+    def test_lookups_by_pk(self):
+        visibility = Visibility(self.data.admins[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(visibility.get(self.mine.pk, Task.objects.all()), self.mine)
+        with self.assertRaises(Hidden):
+            visibility.get(self.theirs.pk, Task.objects.all())
+        with self.assertRaises(Task.DoesNotExist):
+            visibility.get(0, Task.objects.all())
+        # Reports also cover the tasks an admin assigned to someone else's user.
+        Task.objects.filter(pk=self.theirs.pk).update(assigned_by=self.data.admins[0])
+        self.assertEqual(visibility.get(self.theirs.pk, Task.objects.all(), reports=True), self.theirs)
+        # Users read no reports, not even their own.
+        with self.assertRaises(Hidden):
+            Visibility(self.data.users[0]).get(self.mine.pk, Task.objects.all(), reports=True)
+
+    def test_views_answer_403_and_404(self):
+        self.client.force_login(self.data.admins[0])
+        for name in ('adminpanel:edit_task', 'adminpanel:delete_task'):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(reverse(name, args=[self.theirs.pk])).status_code, 403)
+                self.assertEqual(self.client.get(reverse(name, args=[0])).status_code, 404)
+        self.client.force_login(self.data.users[0])
+        self.assertEqual(self.client.get(reverse('adminpanel:edit_task', args=[self.mine.pk])).status_code, 403)
+
+
+class TaskPayloadTests(TestCase):
+    """The serializer-free listing and report payloads match DRF's output byte for byte."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+        task = cls.data.users[0].tasks.filter(status='completed').first()
+        Task.objects.filter(pk=task.pk).update(
+            title='Überprüfung ✓ "quoted" \\ back\x01slash',
+            description='line\u2028separator\u2029paragraph\nnewline 😀',
+            worked_hours=Decimal('7.5'), assigned_by=None,
+            overdue_since=datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc))
+        cls.task = Task.objects.get(pk=task.pk)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_task_list_matches_serializer(self):
+        seen = b''
+        for user in (self.data.users[0], self.data.admins[0]):
+            self.client.force_authenticate(user)
+            for params in ({}, {'fields': 'all'}, {'ordering': '-updated_at', 'page_size': 2, 'fields': 'all'},
+                           {'ordering': '-updated_at', 'fields': 'status,title,id'}):
+                with self.subTest(user=user.username, **params):
+                    response = self.client.get(reverse('user-tasks'), params)
+                    body = response.json()
+                    ordering = params.get('ordering', 'due_date')
+                    tasks = Task.objects.filter(pk__in=[t['id'] for t in body['results']])
+                    tasks = sorted(tasks, key=lambda t: (getattr(t, ordering.lstrip('-')), t.pk),
+                                   reverse=ordering.startswith('-'))
+                    fields = {'all': None, 'status,title,id': ['id', 'title', 'status']}.get(
+                        params.get('fields'), TASK_SUMMARY_FIELDS)
+                    expected = JSONRenderer().render({'next': body['next'], 'previous': body['previous'],
+                                                      'results': TaskSerializer(tasks, many=True, fields=fields).data})
+                    self.assertEqual(response.content, expected)
+                    self.assertEqual(response['Content-Type'], 'application/json')
+                    seen += response.content
+        self.assertIn(b'\\u2028', seen)
+
+    def test_report_matches_serializer(self):
+        self.client.force_authenticate(self.data.admins[0])
+        response = self.client.get(reverse('task-report', args=[self.task.pk]))
+        task = Task.objects.select_related('assigned_to', 'assigned_by').get(pk=self.task.pk)
+        self.assertEqual(response.content, JSONRenderer().render(TaskReportSerializer(task).data))
+
+    def test_stdlib_encoder_and_other_renderers(self):
+        data = payloads.TASKS.convert(list(payloads.TASKS.rows(Task.objects.order_by('id'))))
+        with mock.patch.object(payloads, 'orjson', None):
+            self.assertEqual(payloads.dumps(data), JSONRenderer().render(data))
+        self.client.force_authenticate(self.data.users[0])
+        response = self.client.get(reverse('user-tasks'), HTTP_ACCEPT='text/html')
+        self.assertContains(response, 'Überprüfung')
+        response = self.client.get(reverse('user-tasks'), HTTP_ACCEPT='application/json; indent=2')
+        self.assertTrue(response.content.startswith(b'{\n  "next"'))
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= trims both the payload and the columns read; lists default to the summary."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+        cls.report = cls.data.users[0].tasks.filter(status='completed').first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.data.admins[0])
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, HTTP_ACCEPT=params.pop('accept', 'application/json'))
+        return response, ' '.join(q['sql'] for q in queries)
+
+    def test_task_list(self):
+        for accept in ('application/json', 'text/html'):
+            with self.subTest(accept=accept):
+                response, sql = self.get(reverse('user-tasks'), accept=accept)
+                self.assertEqual(list(response.data['results'][0]), list(TASK_SUMMARY_FIELDS))
+                self.assertNotIn('"description"', sql)
+                self.assertNotIn('"completion_report"', sql)
+        response, sql = self.get(reverse('user-tasks'), fields='due_date, title', ordering='-updated_at', page_size=2)
+        self.assertEqual(list(response.json()['results'][0]), ['title', 'due_date'])
+        self.assertIn('cursor=', response.json()['next'])
+        response, sql = self.get(reverse('user-tasks'), fields='all')
+        self.assertEqual(list(response.json()['results'][0]), list(TaskSerializer().fields))
+        self.assertIn('"description"', sql)
+
+    def test_unknown_fields(self):
+        for url in (reverse('user-tasks'), reverse('task-report', args=[self.report.pk])):
+            for fields in ('title,secret', ','):
+                with self.subTest(url=url, fields=fields):
+                    response, _ = self.get(url, fields=fields)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('fields', response.json())
+
+    def test_report(self):
+        url = reverse('task-report', args=[self.report.pk])
+        full, sql = self.get(url)
+        self.assertIn('"description"', sql)
+        response, sql = self.get(url, fields='worked_hours,assigned_to_username')
+        self.assertEqual(response.json(), {'worked_hours': full.json()['worked_hours'],
+                                           'assigned_to_username': self.data.users[0].username})
+        self.assertNotIn('"description"', sql)
+        self.assertNotEqual(response['ETag'], full['ETag'])
+        response, _ = self.get(url, accept='text/html', fields='title')
+        self.assertEqual(response.data, {'title': self.report.title})
+
+
+class TaskFkValidationTests(TestCase):
+    """Task.clean_fields() only queries foreign keys it cannot vouch for."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = create_sample_data()
+
+    def fk_checks(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            func(*args, **kwargs)
+        return sum(q['sql'].startswith('SELECT 1 AS "a" FROM "accounts_user"') for q in queries)
+
+    def test_known_foreign_keys_are_not_queried(self):
+        task = Task.objects.filter(assigned_to=self.data.users[0]).exclude(status='completed').first()
+        task.assigned_by = self.data.admins[0]
+        self.assertEqual(self.fk_checks(task.save), 0)
+        task.title = 'Saved again'
+        self.assertEqual(self.fk_checks(task.save), 0)
+        # A bare id may name anyone, or no one.
+        task.assigned_to_id = self.data.users[1].pk
+        self.assertEqual(self.fk_checks(task.save), 1)
+        task.assigned_to_id = 0
+        with self.assertRaises(ValidationError) as raised:
+            task.save()
+        self.assertIn('assigned_to', raised.exception.message_dict)
+        with mock.patch.object(Task, 'validate_known_fks', True):
+            task = Task.objects.get(pk=task.pk)
+            self.assertEqual(self.fk_checks(task.save), 2)
+
+    def test_write_paths(self):
+        user, admin = self.data.users[0], self.data.admins[0]
+        task = user.tasks.exclude(status='completed').first()
+        api = APIClient()
+        api.force_authenticate(user)
+        self.assertEqual(self.fk_checks(api.put, reverse('user-task-update', args=[task.pk]),
+                                        {'status': 'in_progress'}, format='json'), 0)
+        panel = Client()
+        panel.force_login(admin)
+        form = {'title': 'New', 'description': 'd', 'due_date': '2030-01-01', 'status': 'pending',
+                'assigned_to': user.pk}
+        # The form's own lookup of the assignee is the only check left.
+        self.assertEqual(self.fk_checks(panel.post, reverse('adminpanel:add_task'), form), 0)
+        self.assertEqual(self.fk_checks(panel.post, reverse('adminpanel:edit_task', args=[task.pk]), form), 0)
+        self.assertTrue(Task.objects.filter(title='New', assigned_by=admin).exists())
+        self.assertEqual(Task.objects.get(pk=task.pk).title, 'New')
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages of GET /api/tasks/ walk the whole (field, id) order in both directions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Several tasks share each due date, so the id tie-break matters.
+        cls.data = create_sample_data(tasks_per_user=4)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.data.superadmin)
+
+    def expected(self, ordering):
+        field = ordering.lstrip('-')
+        if ordering.startswith('-'):
+            return list(Task.objects.order_by(f'-{field}', '-id').values_list('id', flat=True))
+        return list(Task.objects.order_by(field, 'id').values_list('id', flat=True))
+
+    def walk(self, url, params=None, link='next'):
+        """The pages from ``url`` following ``link`` links, as lists of ids."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([t['id'] for t in response.data['results']])
+            if response.data[link] is None:
+                return pages, response
+            response = self.client.get(response.data[link])
+
+    def test_forward_and_back_in_every_ordering(self):
+        for ordering in KeysetPagination.orderings:
+            with self.subTest(ordering=ordering):
+                expected = self.expected(ordering)
+                pages, last = self.walk(reverse('user-tasks'), {'ordering': ordering, 'page_size': 5})
+                self.assertEqual([len(p) for p in pages], [5, 5, 5, 1])
+                self.assertEqual(sum(pages, []), expected)
+                self.assertIsNone(self.client.get(reverse('user-tasks'), {'ordering': ordering}).data['previous'])
+                # Back from the last page through reversed cursors, to the top.
+                back, first = self.walk(last.data['previous'], link='previous')
+                self.assertEqual(sum(reversed(back), []), expected[:-1])
+                self.assertEqual(back[-1], pages[0])
+                self.assertIsNotNone(first.data['next'])
+
+    def test_page_size_limits(self):
+        paginator = KeysetPagination()
+        factory = APIRequestFactory()
+        for raw, size in ((None, 50), ('7', 7), ('0', 50), ('-3', 50), ('abc', 50), ('100000', 500)):
+            with self.subTest(page_size=raw):
+                params = {} if raw is None else {'page_size': raw}
+                self.assertEqual(paginator.get_page_size(Request(factory.get('/', params))), size)
+        response = self.client.get(reverse('user-tasks'), {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_invalid_cursors(self):
+        url = reverse('user-tasks')
+        response = self.client.get(url, {'ordering': 'due_date', 'page_size': 5})
+        cursor = response.data['next'].split('cursor=')[1].split('&')[0]
+        for params in ({'cursor': 'garbage'}, {'cursor': 'e30='},
+                       # A cursor only works with the ordering it was issued for.
+                       {'cursor': cursor, 'ordering': '-due_date', 'page_size': 5}):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get(url, params).status_code, 404)
+        # An unknown ordering falls back to the default.
+        self.assertEqual(self.client.get(url, {'ordering': 'title'}).data['results'][0]['id'],
+                         self.expected('due_date')[0])
+
+    def test_pages_are_stable_under_inserts(self):
+        url = reverse('user-tasks')
+        first = self.client.get(url, {'page_size': 5})
+        before = self.expected('due_date')
+        user, admin = self.data.users[0], self.data.admins[0]
+        early = Task.objects.create(title='Early', description='d', assigned_to=user, assigned_by=admin,
+                                    due_date=datetime.date(2024, 1, 1))
+        late = Task.objects.create(title='Late', description='d', assigned_to=user, assigned_by=admin,
+                                   due_date=datetime.date(2030, 1, 1))
+        rest, _ = self.walk(first.data['next'])
+        seen = [t['id'] for t in first.data['results']] + sum(rest, [])
+        # Rows inserted before the cursor do not shift later pages; rows after it show up.
+        self.assertEqual(seen, before + [late.pk])
+        self.assertNotIn(early.pk, seen)
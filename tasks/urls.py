@@ -1,16 +1,30 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     CustomTokenObtainPairView,
+    CustomTokenRefreshView,
     UserTaskListView,
+    UpcomingTaskListView,
+    OverdueTaskListView,
+    TaskChangesView,
+    TaskEventStreamView,
     UserTaskUpdateView,
+    TaskBulkUpdateView,
     TaskReportView,
+    TaskSearchView,
+    TaskStatsView,
 )
 
 urlpatterns = [
     path('login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('tasks/', UserTaskListView.as_view(), name='user-tasks'),
+    path('tasks/bulk/', TaskBulkUpdateView.as_view(), name='user-task-bulk-update'),
+    path('tasks/upcoming/', UpcomingTaskListView.as_view(), name='user-tasks-upcoming'),
+    path('tasks/overdue/', OverdueTaskListView.as_view(), name='user-tasks-overdue'),
+    path('tasks/changes/', TaskChangesView.as_view(), name='task-changes'),
+    path('tasks/events/', TaskEventStreamView.as_view(), name='task-events'),
+    path('tasks/search/', TaskSearchView.as_view(), name='task-search'),
     path('tasks/<int:pk>/', UserTaskUpdateView.as_view(), name='user-task-update'),
     path('tasks/<int:pk>/report/', TaskReportView.as_view(), name='task-report'),
+    path('stats/', TaskStatsView.as_view(), name='task-stats'),
 ]
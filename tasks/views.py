@@ -1,60 +1,350 @@
+import datetime
 
-from rest_framework import generics, permissions, status
+from asgiref.sync import sync_to_async
+from rest_framework import permissions, status
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .models import Task
-from .serializers import TaskSerializer, TaskReportSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .models import ArchivedTask, Task, TaskStat
+from . import deadlines, events, payloads, search, stats, sync
+from .pagination import DeadlinePagination
+from .visibility import Hidden, Visibility
+from .conditional import add_validators, aqueryset_validators, make_etag, not_modified
+from .signals import tasks_bulk_saved
+from .serializers import TASK_SUMMARY_FIELDS, TaskSerializer, TaskReportSerializer, TaskBulkUpdateItemSerializer
 from accounts.models import User
 from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
+from django.http import Http404, StreamingHttpResponse
+from rest_framework.authentication import SessionAuthentication
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
 
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.authentication import add_token_claims, get_token_version
+from accounts.throttling import LoginRateThrottle
+from core.async_views import AsyncAPIView
+from core.routers import read_replica
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 	@classmethod
 	def get_token(cls, user):
 		token = super().get_token(user)
-		token['role'] = user.role
-		return token
+		return add_token_claims(token, user)
 class CustomTokenObtainPairView(TokenObtainPairView):
 	serializer_class = CustomTokenObtainPairSerializer
+	# Refuses bursts before the serializer hashes the password.
+	throttle_classes = [LoginRateThrottle]
 
-class UserTaskListView(generics.ListAPIView):
-    serializer_class = TaskSerializer
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+	def validate(self, attrs):
+		# Access tokens copy their claims from the refresh token, so a revoked
+		# refresh token must not mint new ones.
+		refresh = RefreshToken(attrs['refresh'])
+		if 'ver' in refresh and refresh['ver'] != get_token_version(refresh[jwt_settings.USER_ID_CLAIM]):
+			raise InvalidToken('Token has been revoked.')
+		return super().validate(attrs)
+class CustomTokenRefreshView(TokenRefreshView):
+	serializer_class = CustomTokenRefreshSerializer
+
+class UserTaskListView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    # Rows carry these unless ?fields= names others (or all).
+    default_fields = TASK_SUMMARY_FIELDS
+
+    def get_queryset(self):
+        return Visibility.for_request(self.request).tasks()
+
+    async def get(self, request):
+        fields = payloads.requested_fields(request, payloads.TASKS, self.default_fields)
+        layout = payloads.TASKS.select(fields)
+        with read_replica(request.user):
+            queryset = self.get_queryset()
+            # Pollers mostly get the same page back: answer them from one aggregate.
+            # The ETag covers the caller and the full URL, since links in the page embed both.
+            parts, last_modified = await aqueryset_validators(queryset)
+            etag = make_etag(request.user.id, getattr(request.user, 'role', None),
+                             request.build_absolute_uri(), *parts)
+            # Last-Modified is informational only: it does not move when a task is deleted.
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+            paginator = self.pagination_class()
+            # Only the columns of the requested fields are read, plus the ones
+            # the cursor is built from.
+            columns = ['id', paginator.get_ordering(request).lstrip('-')]
+            if not payloads.accepts_plain_json(request):
+                page = await paginator.apaginate_queryset(queryset.only(*layout.paths, *columns), request, view=self)
+                response = paginator.get_paginated_response(TaskSerializer(page, many=True, fields=fields).data)
+                return add_validators(response, etag, last_modified)
+            # Plain JSON: the same bytes, from column values instead of serializer fields.
+            page = await paginator.apaginate_queryset(layout.rows(queryset, *columns), request, view=self)
+            data = {'next': paginator.get_next_link(), 'previous': paginator.get_previous_link(),
+                    'results': layout.convert(page)}
+            return add_validators(payloads.PayloadResponse(data), etag, last_modified)
+
+class UpcomingTaskListView(UserTaskListView):
+    """Open tasks due today through ?days= days ahead (default 7), soonest first."""
+    pagination_class = DeadlinePagination
+
+    def get_days(self):
+        try:
+            days = int(self.request.query_params.get('days', deadlines.DEFAULT_UPCOMING_DAYS))
+        except (TypeError, ValueError):
+            return deadlines.DEFAULT_UPCOMING_DAYS
+        return min(max(days, 0), deadlines.MAX_UPCOMING_DAYS)
 
     def get_queryset(self):
-        user = self.request.user
-        if getattr(user, 'role', None) == 'superadmin':
-            return Task.objects.all()
-        if getattr(user, 'role', None) == 'admin':
-            return Task.objects.filter(assigned_to__assigned_admin=user)
-        return Task.objects.filter(assigned_to=user)
+        return deadlines.upcoming(super().get_queryset(), days=self.get_days())
 
-class UserTaskUpdateView(generics.UpdateAPIView):
-    serializer_class = TaskSerializer
+class OverdueTaskListView(UserTaskListView):
+    """Open tasks past their due date, most overdue first."""
+    pagination_class = DeadlinePagination
+
+    def get_queryset(self):
+        return deadlines.overdue(super().get_queryset())
+
+class TaskChangesView(APIView):
+    """
+    Incremental sync: GET ?since=<cursor>&limit=.
+
+    Returns the tasks in the caller's scope (as for GET /api/tasks/) created
+    or updated after the cursor, tombstones for tasks that left the scope,
+    and the cursor for the next call; call again while ``has_more``. Reads
+    the primary: a lagging replica could let the cursor skip writes.
+    """
     permission_classes = [IsAuthenticated]
+    default_limit = 500
+    max_limit = 1000
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except (TypeError, ValueError):
+            limit = self.default_limit
+        limit = min(limit, self.max_limit) if limit > 0 else self.default_limit
+        try:
+            result = sync.changes(request.user, request.query_params.get('since') or None, limit)
+        except sync.InvalidCursor:
+            return Response({'since': ['Invalid cursor.']}, status=status.HTTP_400_BAD_REQUEST)
+        except sync.ExpiredCursor:
+            return Response({'error': 'Cursor expired; sync again without since.'}, status=status.HTTP_410_GONE)
+        return Response({
+            'tasks': TaskSerializer(result['tasks'], many=True).data,
+            'deleted': [{'id': t.task_id, 'deleted_at': t.deleted_at} for t in result['deleted']],
+            'cursor': result['cursor'],
+            'has_more': result['has_more'],
+        })
+
+class TaskEventStreamView(AsyncAPIView):
+    """
+    Server-sent events for the caller's scope: created / updated / deleted,
+    each with the task (only its id when deleted). Needs ASGI (501 under
+    WSGI); the admin panel session works too, since EventSource cannot send
+    a JWT header.
+    """
+    authentication_classes = [*api_settings.DEFAULT_AUTHENTICATION_CLASSES, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        if not events.available(request):
+            return Response({'error': 'Live events need the ASGI server (core.asgi:application).'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        response = StreamingHttpResponse(events.stream(request.user), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keeps nginx from buffering the stream.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class UserTaskUpdateView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['put']
 
     def get_queryset(self):
-        return Task.objects.filter(assigned_to=self.request.user)
+        return Visibility.for_request(self.request).owned()
+
+    @staticmethod
+    def _validate_and_save(serializer):
+        serializer.is_valid(raise_exception=True)
+        # save() validates the FKs and updates TaskStat in one transaction.
+        serializer.save()
+
+    async def put(self, request, pk):
+        try:
+            task = await self.get_queryset().aget(pk=pk)
+        except Task.DoesNotExist:
+            raise Http404('No Task matches the given query.')
+        serializer = TaskSerializer(task, data=request.data)
+        # Validation may query too (related fields look up their rows), so
+        # both run in a worker thread.
+        await sync_to_async(self._validate_and_save)(serializer)
+        return Response(serializer.data)
+
+class TaskBulkUpdateView(APIView):
+    """
+    PUT a list of {id, status, completion_report, worked_hours} items.
 
+    Items are checked one by one with the same rules as a single PUT, then
+    every valid item is written with one bulk UPDATE inside a transaction.
+    Invalid items, and ids the caller does not own, are reported per item
+    and do not block the rest of the batch.
+    """
+    permission_classes = [IsAuthenticated]
     http_method_names = ['put']
+    max_items = 500
+    update_fields = ['status', 'completion_report', 'worked_hours']
+
+    def get_queryset(self):
+        # Same ownership rule as UserTaskUpdateView.
+        return Visibility.for_request(self.request).owned()
+
+    def put(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of tasks.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({'error': f'At most {self.max_items} tasks can be updated at once.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = TaskBulkUpdateItemSerializer(data=item)
+            if not serializer.is_valid():
+                results[index] = {'id': item.get('id') if isinstance(item, dict) else None,
+                                  'updated': False, 'errors': serializer.errors}
+            elif serializer.validated_data['id'] in valid:
+                results[index] = {'id': serializer.validated_data['id'], 'updated': False,
+                                  'errors': {'id': ['Duplicate task in this batch.']}}
+            else:
+                valid[serializer.validated_data['id']] = (index, serializer.validated_data)
 
-class TaskReportView(APIView):
+        tasks = self.get_queryset().in_bulk(list(valid))
+        changed = []
+        now = timezone.now()
+        for pk, (index, attrs) in valid.items():
+            task = tasks.get(pk)
+            if task is None:
+                results[index] = {'id': pk, 'updated': False, 'errors': {'id': ['Not found.']}}
+                continue
+            for field in self.update_fields:
+                if field in attrs:
+                    setattr(task, field, attrs[field])
+            try:
+                task.clean()
+            except DjangoValidationError as e:
+                detail = getattr(e, 'message_dict', None) or {'non_field_errors': e.messages}
+                results[index] = {'id': pk, 'updated': False, 'errors': detail}
+                continue
+            task.clear_stale_overdue()
+            # bulk_update() skips auto_now, so stamp them like save() would.
+            task.updated_at = task.changed_at = now
+            changed.append((index, task))
+
+        if changed:
+            tasks = [task for _, task in changed]
+            with transaction.atomic():
+                Task.objects.bulk_update(tasks, self.update_fields + ['overdue_since', 'updated_at', 'changed_at'])
+                tasks_bulk_saved.send(sender=Task, instances=tasks, created=False)
+            data = TaskSerializer([task for _, task in changed], many=True).data
+            for (index, task), task_data in zip(changed, data):
+                results[index] = {'id': task.pk, 'updated': True, 'task': task_data}
+
+        return Response({'results': results})
+
+class TaskStatsView(APIView):
+    """
+    Task counts and worked hours from the TaskStat summary table.
+
+    Superadmins see everything, admins the users they manage, users
+    themselves. Optional ?from= / ?to= dates limit the due weeks counted.
+    """
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, pk):
+    def get(self, request):
         user = request.user
-        task = get_object_or_404(Task, pk=pk)
+        role = getattr(user, 'role', None)
+        rows = TaskStat.objects.all()
+        if role == 'admin':
+            rows = rows.filter(admin_id=user.id)
+        elif role != 'superadmin':
+            rows = rows.filter(assigned_to_id=user.id)
+        for param, lookup in (('from', 'week__gte'), ('to', 'week__lte')):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                day = datetime.date.fromisoformat(value)
+            except ValueError:
+                return Response({param: ['Use YYYY-MM-DD.']}, status=status.HTTP_400_BAD_REQUEST)
+            rows = rows.filter(**{lookup: stats.week_start(day)})
+        data = stats.summarize(rows)
+        if role not in ('admin', 'superadmin'):
+            data.pop('per_admin')
+        return Response(data)
+
+class TaskSearchView(APIView):
+    """
+    Ranked full-text search: GET ?q=words (``word*`` for a prefix).
+
+    Scoped like the admin panel's Manage Tasks: superadmins search every
+    task, admins the tasks of their users. Paged with ?limit= / ?offset=,
+    since results are ordered by relevance (lower ``rank`` is better).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        visibility = Visibility.for_request(request)
+        if not visibility.is_staff:
+            return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+        tasks = visibility.tasks()
+        query = request.query_params.get('q', '')
+        if not search.match_expression(query):
+            return Response({'q': ['Enter at least one word to search for.']}, status=status.HTTP_400_BAD_REQUEST)
+        with read_replica(request.user):
+            results, previous_url, next_url = search.search_page(
+                tasks, query, request.query_params, request.build_absolute_uri())
+        data = TaskSerializer(results, many=True).data
+        for item, task in zip(data, results):
+            item['rank'] = round(task.rank, 4)
+        return Response({'next': next_url, 'previous': previous_url, 'results': data})
+
+class TaskReportView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+    # Read whatever ?fields= asks for: the completed check and the ETag use them.
+    required_columns = ('status', 'updated_at', 'assigned_to__username', 'assigned_by__username')
+
+    async def get(self, request, pk):
+        fields = payloads.requested_fields(request, payloads.REPORTS)
+        layout = payloads.REPORTS.select(fields)
+        # Admins may read the reports of their users' tasks and of tasks they assigned.
+        visibility = Visibility.for_request(request)
+        try:
+            with read_replica(request.user):
+                # Archived tasks keep their id, so old report links still work.
+                task = await visibility.aget(
+                    pk, *(model.objects.select_related('assigned_to', 'assigned_by')
+                          .only(*layout.paths, *self.required_columns) for model in (Task, ArchivedTask)),
+                    reports=True)
+        except Task.DoesNotExist:
+            raise Http404('No Task matches the given query.')
+        except Hidden:
+            return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
         if task.status != 'completed':
             return Response({'error': 'Task is not completed.'}, status=status.HTTP_400_BAD_REQUEST)
-        if user.role not in ['admin', 'superadmin']:
-            return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
-        if user.role == 'admin':
-            manages_user = getattr(task.assigned_to, 'assigned_admin_id', None) == user.id
-            assigned_by_admin = getattr(task, 'assigned_by_id', None) == user.id
-            if not (manages_user or assigned_by_admin):
-                return Response({'error': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
-        serializer = TaskReportSerializer(task)
-        return Response(serializer.data)
+        # The report also shows usernames, which can change without touching the task.
+        etag = make_etag(task.pk, task.updated_at.isoformat(),
+                         task.assigned_to.username, getattr(task.assigned_by, 'username', None), *fields)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        if payloads.accepts_plain_json(request):
+            response = payloads.PayloadResponse(payloads.report(task, layout))
+        else:
+            response = Response(TaskReportSerializer(task, fields=fields).data)
+        return add_validators(response, etag, task.updated_at)
@@ -0,0 +1,112 @@
+"""
+Who may see which tasks, in one place for the API and the admin panel.
+
+Superadmins see every task, admins the tasks of the users they manage,
+users their own. ``Visibility`` turns that into queryset filters, so a
+scoped listing and a permission check are each one SQL statement: an
+admin's managed users enter as a subquery on the assigned_admin index.
+Lookups by pk only ever read rows inside the scope; a second query, on
+failure only, tells "not yours" (403) from "not there" (404).
+
+Use ``Visibility.for_request(request)``: one instance, and one managed-user
+queryset, serve every check a request makes. The managed set is resolved
+inside each statement rather than fetched into Python first, which would
+cost a query of its own and could not run from async views.
+"""
+
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from accounts.models import User
+from .models import Task
+
+
+class Hidden(Exception):
+    """The row exists but is outside the caller's scope."""
+
+
+class Visibility:
+    def __init__(self, user):
+        self.user_id = user.id
+        self.role = getattr(user, 'role', None)
+
+    @classmethod
+    def for_request(cls, request):
+        # Kept on the Django request, which DRF's Request wraps.
+        request = getattr(request, '_request', request)
+        visibility = getattr(request, '_task_visibility', None)
+        if visibility is None:
+            visibility = request._task_visibility = cls(request.user)
+        return visibility
+
+    @property
+    def is_superadmin(self):
+        return self.role == 'superadmin'
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def is_staff(self):
+        return self.role in ('admin', 'superadmin')
+
+    @cached_property
+    def _managed_users(self):
+        if self.is_superadmin:
+            return User.objects.filter(role='user')
+        if self.is_admin:
+            return User.objects.filter(role='user', assigned_admin_id=self.user_id)
+        return User.objects.none()
+
+    def managed_users(self):
+        """Users the caller may assign tasks to and filter by."""
+        return self._managed_users
+
+    def _scope(self, queryset, reports=False):
+        if self.is_superadmin:
+            return queryset
+        if self.is_admin:
+            # Only admins' users have assigned_admin set, so the subquery can
+            # skip the role and stay on the covering assigned_admin index.
+            scope = Q(assigned_to_id__in=User.objects.filter(assigned_admin_id=self.user_id).values('pk'))
+            if reports:
+                scope |= Q(assigned_by_id=self.user_id)
+            return queryset.filter(scope)
+        if reports:
+            return queryset.none()
+        return queryset.filter(assigned_to_id=self.user_id)
+
+    def tasks(self, model=Task):
+        """The caller's tasks (or archived tasks, with ``model=ArchivedTask``)."""
+        return self._scope(model.objects.all())
+
+    def owned(self, model=Task):
+        """Tasks assigned to the caller: the ones they may update, whatever their role."""
+        return model.objects.filter(assigned_to_id=self.user_id)
+
+    def get(self, pk, *querysets, reports=False):
+        """The row with ``pk`` from the first of ``querysets`` (unscoped) that has it in scope.
+
+        With ``reports``, admins also reach the tasks they assigned and users
+        reach nothing. One query per queryset until a row is found. Raises ``Hidden`` if a
+        queryset has the row out of scope, else ``DoesNotExist`` of the
+        first queryset's model.
+        """
+        for queryset in querysets:
+            row = self._scope(queryset, reports).filter(pk=pk).first()
+            if row is not None:
+                return row
+        if any(queryset.filter(pk=pk).exists() for queryset in querysets):
+            raise Hidden
+        raise querysets[0].model.DoesNotExist
+
+    async def aget(self, pk, *querysets, reports=False):
+        for queryset in querysets:
+            row = await self._scope(queryset, reports).filter(pk=pk).afirst()
+            if row is not None:
+                return row
+        for queryset in querysets:
+            if await queryset.filter(pk=pk).aexists():
+                raise Hidden
+        raise querysets[0].model.DoesNotExist